@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_ast_memory.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# Measures the memory taken by the AST of a synthetic module with about
+# 100k nodes: the size of the node objects themselves (with their
+# attribute dicts, if they have any) and everything the parse keeps
+# alive (nodes, lists, locations, types), both per node.
+#
+# usage: python bench_ast_memory.py [number of nodes] [peg|rd]
+
+import gc
+import sys
+import tracemalloc
+
+import context
+
+from parser.parse_file import parse_file
+from ast_.compilation  import Compilation
+from ast_.node         import Node
+
+from synthetic import make_module
+
+
+# every AST node reachable from the functions
+def collect_nodes(functions):
+    found = {}
+    stack = list(functions)
+
+    while stack:
+        value = stack.pop()
+        if id(value) in found:
+            continue
+
+        if isinstance(value, Node):
+            found[id(value)] = value
+            stack.extend(value for field, value in value.fields())
+        elif type(value) == dict:
+            stack.extend(value.values())
+        elif type(value) == list:
+            stack.extend(value)
+
+    return list(found.values())
+
+
+def object_size(node):
+    size = sys.getsizeof(node)
+    if hasattr(node, "__dict__"):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def main(args):
+    num_nodes = int(args[1]) if len(args) > 1 else 100000
+    engine    = args[2] if len(args) > 2 else "rd"
+
+    # about 18 nodes per function (see synthetic.py)
+    num_functions = num_nodes // 18
+    text = make_module(num_functions)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    context   = Compilation()
+    functions = parse_file(text, engine = engine, context = context)
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes   = collect_nodes(functions)
+    objects = sum(object_size(node) for node in nodes)
+
+    print("functions:             %d" % len(functions))
+    print("AST nodes:             %d" % len(nodes))
+    print("node objects:          %.1f MB, %.0f bytes per node" % (objects / 2**20, objects / len(nodes)))
+    print("retained by the parse: %.1f MB, %.0f bytes per node" % (retained / 2**20, retained / len(nodes)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_grammar.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# Measures the PEG grammar alone (without the TreeVisitor) on a synthetic
+# module: parse time, rule calls and the rules called most.
+#
+# usage: python bench_grammar.py [number of functions] [rules to show]
+
+import time
+
+import context
+import synthetic
+
+import parser.parse_file
+from parser.grammar_profiler import GrammarProfile
+
+
+def main(args):
+    num_functions = int(args[1]) if len(args) > 1 else 800
+    num_rules     = int(args[2]) if len(args) > 2 else 10
+
+    text = synthetic.make_module(num_functions)
+    parser.parse_file.load_grammar()
+    grammar = parser.parse_file.grammar
+
+    best = None
+    for r in range(5):
+        start = time.perf_counter()
+        grammar.parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    profile = GrammarProfile()
+    profile.instrument(grammar).parse(text)
+    calls = sum(r.calls for r in profile.rules.values())
+
+    print("%d functions, %d lines" % (num_functions, text.count("\n") + 1))
+    print("parse: %.3f s, %d rule calls (%d without \"_\")" % (best, calls, calls - profile.rules["_"].calls))
+    print("\n".join(profile.report("calls").splitlines()[1:num_rules + 2]))
+
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv))
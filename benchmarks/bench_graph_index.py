@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_graph_index.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Measures compiling the JSON IR of functions with wide scopes into C++:
+# both branches of an "if" hold a sum of "size" terms, so every branch has
+# about 2 * size nodes and edges. The parent map and the edge indexes of
+# compiler/nodes.py answer every query without going through the scope's
+# nodes, so the time per edge should stay flat as the scopes get wider.
+#
+# usage: python bench_graph_index.py [max terms]
+
+import json
+import sys
+import time
+
+import context
+
+from parser.parse_file    import parse_file
+from ast_.location        import location_to_json
+from ast_.compilation     import Compilation
+from compiler.json_parser import compile_to_cpp
+
+
+# a sum of "size" terms as a balanced tree of additions,
+# so the expression is wide but not deep
+def balanced_sum(terms):
+    if len(terms) == 1:
+        return terms[0]
+    middle = len(terms) // 2
+    return "(%s + %s)" % (balanced_sum(terms[:middle]), balanced_sum(terms[middle:]))
+
+
+def make_program(size):
+    then_sum = balanced_sum(["M * %d" % n for n in range(size)])
+    else_sum = balanced_sum(["N * %d" % n for n in range(size)])
+
+    return ("function main(M, N : integer returns integer)\n"
+            "  if M < N then\n    %s\n  else\n    %s\n  end if\nend function\n") % (then_sum, else_sum)
+
+
+def make_ir(size):
+    context   = Compilation()
+    functions = parse_file(make_program(size), context = context)
+    return json.loads(json.dumps(dict(functions = [f.emit_json(context, None) for f in functions],
+                                      declarations = {}),
+                                 default = location_to_json))
+
+
+def count_edges(node):
+    return len(node.get("edges", [])) + sum(count_edges(child) for child in node.get("nodes", []) +
+                                            node.get("branches", []) +
+                                            ([node["condition"]] if "condition" in node else []))
+
+
+def main(args):
+    max_size = int(args[1]) if len(args) > 1 else 4000
+
+    print("%10s %10s %12s %12s" % ("terms", "edges", "compile, s", "us/edge"))
+
+    size = 250
+    while size <= max_size:
+        ir    = make_ir(size)
+        edges = sum(count_edges(function) for function in ir["functions"])
+
+        start = time.perf_counter()
+        str(compile_to_cpp(ir))
+        elapsed = time.perf_counter() - start
+
+        print("%10d %10d %12.3f %12.1f" % (size, edges, elapsed, elapsed / edges * 1e6))
+        size *= 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_incremental_parse.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Measures per-function (incremental) parsing: after one function of
+# a big module is edited only that function has to be parsed again.
+#
+# usage: python bench_incremental_parse.py [number of functions]
+
+import time
+
+import context
+import synthetic
+
+from parser.parse_file  import parse_file
+from parser.parse_cache import ParseCache
+
+
+def timed(text, cache = None):
+    start = time.perf_counter()
+    parse_file(text, cache = cache)
+    return time.perf_counter() - start
+
+
+def main(args):
+    num_functions = int(args[1]) if len(args) > 1 else 200
+
+    text   = synthetic.make_module(num_functions)
+    # change a constant in one function in the middle of the module
+    middle = "function f%d(" % (num_functions // 2)
+    edited = text[:text.index(middle)] + text[text.index(middle):].replace("+ 1", "+ 2", 1)
+
+    timed(text)  # loads the grammar
+
+    cache = ParseCache()
+
+    print("whole module:              %.3f s" % timed(edited))
+    print("per function, cold cache:  %.3f s" % timed(text, cache))
+    print("  " + cache.report())
+
+    cache.reset_stats()
+    print("one function edited:       %.3f s" % timed(edited, cache))
+    print("  " + cache.report())
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv))
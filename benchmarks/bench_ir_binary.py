@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_ir_binary.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Compares loading the IR of a synthetic module from JSON text and from the
+# binary IR (ir/binary.py), and building the compiler's nodes
+# (compiler/nodes.py) out of the dicts and out of the binary IR's node views.
+#
+# usage: python bench_ir_binary.py [number of functions]
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import context
+
+from parser.parse_file    import parse_file
+from ast_.compilation     import Compilation
+from exporters.json       import export_module_to_store
+from exporters.ir_writer  import ir_chunks
+from compiler.json_parser import parse_node
+from ir                   import binary
+
+from synthetic import make_module
+
+
+def timed(function, *args):
+    start  = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def parse_nodes(functions):
+    return [parse_node(function) for function in functions]
+
+
+def main(args):
+    num_functions = int(args[1]) if len(args) > 1 else 2000
+
+    module = make_module(num_functions)
+
+    compilation = Compilation()
+    text = "".join(ir_chunks(compilation, parse_file(module, context = compilation), None))
+
+    compilation = Compilation()
+    data = binary.dumps(export_module_to_store(compilation, parse_file(module, context = compilation)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "module.sir")
+        with open(path, "wb") as ir_file:
+            ir_file.write(data)
+
+        ir,     json_time   = timed(json.loads, text)
+        store,  loads_time  = timed(binary.loads, data)
+        mapped, mmap_time   = timed(binary.load, path)
+
+        _, dict_nodes_time = timed(parse_nodes, ir["functions"])
+        _, view_nodes_time = timed(parse_nodes, mapped.function_views())
+
+        del store, mapped
+
+    print("functions:              %d" % num_functions)
+    print("JSON text (compact):    %8.1f MB" % (len(text) / 2**20))
+    print("binary IR:              %8.1f MB" % (len(data) / 2**20))
+    print("json.loads:             %8.3f s" % json_time)
+    print("binary.loads (bytes):   %8.3f s" % loads_time)
+    print("binary.load (mmap):     %8.3f s" % mmap_time)
+    print("compiler nodes, dicts:  %8.3f s (%.3f s with loading)" % (dict_nodes_time, json_time + dict_nodes_time))
+    print("compiler nodes, views:  %8.3f s (%.3f s with loading)" % (view_nodes_time, mmap_time + view_nodes_time))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_ir_loader.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Measures how many IR nodes per second compiler/nodes.py loads into the
+# C++ backend's nodes (parse_node), from the JSON IR's dicts and from the
+# NodeViews of an IRStore (ir/store.py). The time of decoding the JSON
+# is not counted and the garbage collector is off while timing (like timeit
+# does), the collections going through the whole IR would hide the loader's time.
+#
+# usage: python bench_ir_loader.py [max number of functions]
+
+import gc
+import json
+import sys
+import time
+
+import context
+
+from parser.parse_file    import parse_file
+from ast_.location        import location_to_json
+from ast_.compilation     import Compilation
+from compiler.json_parser import parse_node, reset_graph
+from compiler.nodes       import Node
+from ir.store             import IRStore
+
+from synthetic import make_cpp_module
+
+
+def make_ir(num_functions):
+    compilation = Compilation()
+    functions   = parse_file(make_cpp_module(num_functions), context = compilation)
+    return json.loads(json.dumps(dict(functions = [f.emit_json(compilation, None) for f in functions],
+                                      declarations = {}),
+                                 default = location_to_json))
+
+
+# the best of a few runs, returns the number of nodes and the time
+def timed(functions, runs = 3):
+    best = None
+
+    for run in range(runs):
+        reset_graph()
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        for function in functions():
+            parse_node(function)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best    = elapsed if best is None else min(best, elapsed)
+
+    nodes = len(Node.nodes_)
+    reset_graph()
+    return nodes, best
+
+
+def main(args):
+    max_functions = int(args[1]) if len(args) > 1 else 2000
+
+    print("%10s %10s %12s %14s %12s %14s" %
+          ("functions", "nodes", "dicts, s", "dicts, nodes/s", "views, s", "views, nodes/s"))
+
+    num_functions = 250
+    while num_functions <= max_functions:
+        ir    = make_ir(num_functions)
+        store = IRStore.from_json(ir)
+
+        nodes, dicts_time = timed(lambda: ir["functions"])
+        _,     views_time = timed(store.function_views)
+
+        print("%10d %10d %12.3f %14.0f %12.3f %14.0f" %
+              (num_functions, nodes, dicts_time, nodes / dicts_time, views_time, nodes / views_time))
+        num_functions *= 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_ir_store.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# Compares the memory taken by the JSON IR of a synthetic module as nested
+# dicts (as json.load gives it) and as an IRStore (ir/store.py), and
+# times the conversions.
+#
+# usage: python bench_ir_store.py [number of functions]
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import context
+
+from parser.parse_file import parse_file
+from ast_.compilation  import Compilation
+from ast_.location     import location_to_json
+from ir.store          import IRStore
+
+from synthetic import make_module
+
+
+# returns the result of make() and the memory it keeps allocated
+def measure(make):
+    gc.collect()
+    tracemalloc.start()
+    result = make()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(function, *args):
+    start  = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(args):
+    num_functions = int(args[1]) if len(args) > 1 else 2000
+
+    compilation = Compilation()
+    functions   = parse_file(make_module(num_functions), context = compilation)
+    text = json.dumps(dict(functions = [f.emit_json(compilation, None) for f in functions],
+                           declarations = {}),
+                      default = location_to_json)
+    del functions, compilation
+
+    ir,    dict_size  = measure(lambda: json.loads(text))
+    store, store_size = measure(lambda: IRStore.from_json(ir))
+
+    _, load_time    = timed(IRStore.from_json, ir)
+    back, dump_time = timed(store.to_json)
+    assert back == ir
+
+    print("functions:      %d" % num_functions)
+    print("IR nodes:       %d" % store.num_nodes())
+    print("edges:          %d" % len(store.edge_src))
+    print("JSON text:      %8.1f MB" % (len(text) / 2**20))
+    print("dicts:          %8.1f MB" % (dict_size / 2**20))
+    print("IRStore:        %8.1f MB (arrays %.1f MB), %.1fx smaller"
+          % (store_size / 2**20, store.array_bytes() / 2**20, dict_size / store_size))
+    print("dicts -> store: %8.3f s" % load_time)
+    print("store -> dicts: %8.3f s" % dump_time)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
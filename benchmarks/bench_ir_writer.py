@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_ir_writer.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Compares the peak memory of writing the JSON IR of a synthetic module
+# with json.dumps (all the functions' dicts and the whole text at once) and
+# with the streaming writer (exporters/ir_writer.py), which should not
+# depend on the number of functions.
+#
+# usage: python bench_ir_writer.py [max number of functions]
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import context
+
+from parser.parse_file   import parse_file
+from ast_.compilation    import Compilation
+from ast_.location       import location_to_json
+from exporters.ir_writer import write_ir
+
+from synthetic import make_module
+
+
+def with_dumps(compilation, functions, out, indent):
+    out.write(json.dumps(dict(functions = [f.emit_json(compilation, None) for f in functions],
+                              declarations = {}),
+                         indent = indent,
+                         default = location_to_json))
+
+
+def with_writer(compilation, functions, out, indent):
+    write_ir(compilation, functions, out, indent)
+
+
+# peak memory allocated while writing (the parsed module is not counted)
+# and the time it takes (measured separately, tracemalloc slows everything down)
+def measure(write, module, indent):
+    result = []
+
+    for trace in [True, False]:
+        compilation = Compilation()
+        functions   = parse_file(module, context = compilation)
+
+        with open(os.devnull, "w") as out:
+            gc.collect()
+            if trace:
+                tracemalloc.start()
+            start = time.perf_counter()
+            write(compilation, functions, out, indent)
+            elapsed = time.perf_counter() - start
+            if trace:
+                result.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            else:
+                result.append(elapsed)
+
+    return result
+
+
+def main(args):
+    max_functions = int(args[1]) if len(args) > 1 else 1000
+
+    print("%10s %8s %14s %14s %12s %12s" %
+          ("functions", "indent", "dumps, MB", "writer, MB", "dumps, s", "writer, s"))
+
+    num_functions = 250
+    while num_functions <= max_functions:
+        module = make_module(num_functions)
+        for indent in [2, None]:
+            dumps_peak,  dumps_time  = measure(with_dumps,  module, indent)
+            writer_peak, writer_time = measure(with_writer, module, indent)
+            print("%10d %8s %14.1f %14.1f %12.3f %12.3f" %
+                  (num_functions, indent, dumps_peak / 2**20, writer_peak / 2**20, dumps_time, writer_time))
+        num_functions *= 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_json_stream.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Compares compiling a big JSON IR file into C++ after loading all of it
+# with json.load (compile_to_cpp) and while reading it a function at a time
+# (stream_to_cpp, see ir/json_stream.py), the peak memory (resident set
+# size of a separate process for every run), the time and how soon the
+# first function reaches the C++ backend.
+# The IR files get to hundreds of MB (about 18KB per function), they are
+# written to a temporary directory.
+#
+# usage: python bench_json_stream.py [max number of functions]
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import context
+
+
+# every step runs in a process of it's own (started with "--write" or "--run"),
+# a child process starts with the peak RSS of it's parent
+
+
+# writes the IR of a synthetic module, the module is parsed in parts
+# so the benchmark doesn't need the memory for all of it at once
+def write_module(num_functions, file_name):
+    from parser.parse_file   import parse_file
+    from ast_.compilation    import Compilation
+    from exporters.ir_writer import write_ir
+
+    from synthetic import make_cpp_module
+
+    compilation = Compilation()
+
+    def functions():
+        for start in range(0, num_functions, 1000):
+            yield from parse_file(make_cpp_module(min(1000, num_functions - start), start),
+                                  context = compilation)
+
+    with open(file_name, "w") as out:
+        write_ir(compilation, functions(), out)
+
+
+# runs in the child process: compiles the file, prints the time to the first
+# function, the whole time and the peak RSS
+def run(how, file_name):
+    import compiler.json_parser
+    from compiler.json_parser import compile_to_cpp, stream_to_cpp
+
+    # the time the first function is parsed at
+    first      = []
+    parse_node = compiler.json_parser.parse_node
+
+    def timed_parse_node(node):
+        if not first:
+            first.append(time.perf_counter() - start)
+        return parse_node(node)
+
+    compiler.json_parser.parse_node = timed_parse_node
+
+    start = time.perf_counter()
+    with open(file_name) as ir_file:
+        if how == "load":
+            str(compile_to_cpp(json.load(ir_file)))
+        else:
+            # the code is written as it's made, so it's not kept either
+            with open(os.devnull, "w") as out:
+                stream_to_cpp(ir_file, out = out)
+    elapsed = time.perf_counter() - start
+
+    print(first[0], elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def child(*args):
+    output = subprocess.run([sys.executable, __file__] + list(args),
+                            check = True, capture_output = True, text = True).stdout
+    return [float(value) for value in output.split()]
+
+
+def main(args):
+    if len(args) > 1 and args[1] == "--write":
+        return write_module(int(args[2]), args[3])
+    if len(args) > 1 and args[1] == "--run":
+        return run(args[2], args[3])
+
+    max_functions = int(args[1]) if len(args) > 1 else 16000
+
+    print("%10s %8s %12s %12s %12s %12s %12s %12s" %
+          ("functions", "IR, MB", "load, MB", "stream, MB", "load, s", "stream, s",
+           "load 1st, s", "stream 1st, s"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "module.json")
+
+        num_functions = 1000
+        while num_functions <= max_functions:
+            child("--write", str(num_functions), file_name)
+            size = os.path.getsize(file_name)
+
+            load_first,   load_time,   load_peak   = child("--run", "load",   file_name)
+            stream_first, stream_time, stream_peak = child("--run", "stream", file_name)
+            print("%10d %8.1f %12.1f %12.1f %12.3f %12.3f %12.3f %12.3f" %
+                  (num_functions, size / 2**20, load_peak / 2**20, stream_peak / 2**20,
+                   load_time, stream_time, load_first, stream_first))
+            num_functions *= 4
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
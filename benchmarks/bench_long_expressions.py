@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_long_expressions.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# Measures building the JSON IR of one long arithmetic chain, this should
+# grow linearly with the length of the chain.
+#
+# usage: python bench_long_expressions.py [max length]
+
+import json
+import sys
+import time
+
+import context
+
+from parser.parse_file import parse_file
+from ast_.location     import location_to_json
+from ast_.compilation  import Compilation
+
+
+def timed(text):
+    context   = Compilation()
+    functions = parse_file(text, engine = "rd", context = context)
+    start = time.perf_counter()
+    json.dumps([f.emit_json(context, None) for f in functions], default = location_to_json)
+    return time.perf_counter() - start
+
+
+def main(args):
+    max_length = int(args[1]) if len(args) > 1 else 4000
+
+    # the exporter walks the tree of operations recursively
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), max_length * 4))
+
+    print("%8s %8s %12s %12s" % ("operator", "length", "export, s", "us/operand"))
+
+    for operator in ["+", "*"]:
+        length = 250
+        while length <= max_length:
+            chain   = (" %s " % operator).join(["M"] * length)
+            text    = "function main(M : integer returns integer)\n  %s\nend function\n" % chain
+            elapsed = timed(text)
+            print("%8s %8d %12.3f %12.1f" % (operator, length, elapsed, elapsed / length * 1e6))
+            length *= 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_parallel_parse.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Measures parse_file with functions parsed in a process pool (jobs=N).
+#
+# usage: python bench_parallel_parse.py [number of functions] [max jobs]
+
+import os
+import time
+
+import context
+import synthetic
+
+from parser.parse_file import parse_file
+
+
+def timed(text, jobs, repeats = 3):
+    best = None
+    for r in range(repeats):
+        start = time.perf_counter()
+        parse_file(text, jobs = jobs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(args):
+    num_functions = int(args[1]) if len(args) > 1 else 800
+    max_jobs      = int(args[2]) if len(args) > 2 else os.cpu_count()
+
+    text = synthetic.make_module(num_functions)
+
+    print("%d cpus" % os.cpu_count())
+    print("%6s %10s %10s" % ("jobs", "parse, s", "speedup"))
+
+    sequential = timed(text, 1)
+    print("%6d %10.3f %10.2f" % (1, sequential, 1.0))
+
+    jobs = 2
+    while jobs <= max(max_jobs, 2):
+        elapsed = timed(text, jobs)
+        print("%6d %10.3f %10.2f" % (jobs, elapsed, sequential / elapsed))
+        jobs *= 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv))
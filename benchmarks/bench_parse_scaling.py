@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_parse_scaling.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Measures how parse time grows with the length of the module.
+# With linear parsing the time per line stays (roughly) the same
+# when the module gets bigger.
+#
+# usage: python bench_parse_scaling.py [max number of functions]
+
+import time
+
+import context
+import synthetic
+
+from parser.parse_file import parse_file
+
+
+def measure(num_functions, repeats = 3):
+    text = synthetic.make_module(num_functions)
+    best = None
+    for r in range(repeats):
+        start = time.perf_counter()
+        parse_file(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return text.count("\n") + 1, best
+
+
+def main(args):
+    max_functions = int(args[1]) if len(args) > 1 else 1600
+
+    sizes = []
+    num_functions = 100
+    while num_functions <= max_functions:
+        sizes.append(num_functions)
+        num_functions *= 2
+
+    print("%10s %10s %12s %14s" % ("functions", "lines", "parse, s", "us per line"))
+
+    first_per_line = None
+    for size in sizes:
+        lines, elapsed = measure(size)
+        per_line = elapsed / lines * 1e6
+        if first_per_line is None:
+            first_per_line = per_line
+        print("%10d %10d %12.3f %14.1f" % (size, lines, elapsed, per_line))
+
+    print("time per line, largest vs smallest module: %.2fx" % (per_line / first_per_line))
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv))
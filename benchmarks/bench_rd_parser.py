@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_rd_parser.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# Compares parsing throughput of the PEG grammar and the recursive
+# descent engine on the same synthetic module.
+#
+# usage: python bench_rd_parser.py [number of functions]
+
+import time
+
+import context
+import synthetic
+
+from parser.parse_file import parse_file, load_grammar
+
+
+def timed(text, engine, repeats = 3):
+    best = None
+    for r in range(repeats):
+        start = time.perf_counter()
+        parse_file(text, engine = engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(args):
+    num_functions = int(args[1]) if len(args) > 1 else 400
+
+    text  = synthetic.make_module(num_functions)
+    lines = text.count("\n") + 1
+    kb    = len(text) / 1024
+
+    # keep grammar loading out of the measurement
+    load_grammar()
+
+    print("%d functions, %d lines, %.0f KB" % (num_functions, lines, kb))
+    print("%6s %10s %12s %10s" % ("engine", "parse, s", "lines/s", "KB/s"))
+
+    for engine in ["peg", "rd"]:
+        elapsed = timed(text, engine)
+        print("%6s %10.3f %12.0f %10.1f" % (engine, elapsed, lines / elapsed, kb / elapsed))
+
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_scope_symbols.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Measures building the JSON IR of functions with many parameters and
+# let-bindings. Every name is looked up in the scope's symbol table
+# (exporters/symbols.py), so the time per reference should stay flat
+# as the number of variables grows.
+#
+# usage: python bench_scope_symbols.py [max variables]
+
+import json
+import sys
+import time
+
+import context
+
+from parser.parse_file import parse_file
+from ast_.location     import location_to_json
+from ast_.compilation  import Compilation
+
+
+# a function with "size" parameters and a let with "size" definitions,
+# each definition reads two parameters and the let's body reads all definitions
+def make_program(size):
+    params      = ", ".join("P%d" % n for n in range(size))
+    definitions = ";\n".join("    X%d := P%d + P%d" % (n, n, size - 1 - n) for n in range(size))
+    body        = " + ".join("X%d" % n for n in range(size))
+
+    return ("function main(%s : integer returns integer)\n"
+            "  let\n%s\n  in\n    %s\n  end let\nend function\n") % (params, definitions, body)
+
+
+def timed(text):
+    context   = Compilation()
+    functions = parse_file(text, engine = "rd", context = context)
+    start = time.perf_counter()
+    json.dumps([f.emit_json(context, None) for f in functions], default = location_to_json)
+    return time.perf_counter() - start
+
+
+def main(args):
+    max_size = int(args[1]) if len(args) > 1 else 800
+
+    # the let's body is one long chain of additions
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), max_size * 8))
+
+    print("%10s %12s %12s %16s" % ("variables", "references", "export, s", "us/reference"))
+
+    size = 100
+    while size <= max_size:
+        references = size * 3
+        elapsed    = timed(make_program(size))
+        print("%10d %12d %12.3f %16.1f" % (size, references, elapsed, elapsed / references * 1e6))
+        size *= 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_startup.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Measures the cold start of sisal_parse.py with and without
+# the compiled grammar in the on-disk cache (see parser/grammar_cache.py),
+# and the import time of the entry points (python -X importtime)
+#
+# usage: python bench_startup.py [number of runs]
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+sample_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sample")
+program    = os.path.join("sample_sisal_programs", "fibs.sis")
+
+
+def run_parser(cache_dir, runs, clear_cache):
+    environment = dict(os.environ, CPPS_CACHE_DIR = cache_dir)
+    best = None
+
+    for r in range(runs):
+        if clear_cache:
+            shutil.rmtree(cache_dir, ignore_errors = True)
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "sisal_parse.py", program],
+                       cwd = sample_dir, env = environment,
+                       stdout = subprocess.DEVNULL, check = True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def load_grammar_time(cache_dir, clear_cache):
+    if clear_cache:
+        shutil.rmtree(cache_dir, ignore_errors = True)
+
+    code = "import time, parser.parse_file as p\n"\
+           "start = time.perf_counter()\n"\
+           "p.load_grammar()\n"\
+           "print(time.perf_counter() - start)"
+
+    environment = dict(os.environ, CPPS_CACHE_DIR = cache_dir)
+    output = subprocess.run([sys.executable, "-c", code], cwd = sample_dir,
+                            env = environment, capture_output = True, check = True)
+    return float(output.stdout)
+
+
+# cumulative import time of "module" in us, and the number of modules it imports
+def import_time(module):
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            cwd = sample_dir, capture_output = True, text = True, check = True)
+    lines = [line for line in output.stderr.splitlines() if line.startswith("import time:")][1:]
+    cumulative = int(lines[-1].split("|")[1])
+    return cumulative, len(lines)
+
+
+def main(args):
+    runs      = int(args[1]) if len(args) > 1 else 5
+    cache_dir = tempfile.mkdtemp()
+
+    try:
+        without_cache = run_parser(cache_dir, runs, True)
+        with_cache    = run_parser(cache_dir, runs, False)
+        grammar_cold  = min(load_grammar_time(cache_dir, True) for r in range(runs))
+        grammar_warm  = min(load_grammar_time(cache_dir, False) for r in range(runs))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors = True)
+
+    print("sisal_parse.py %s, best of %d runs:" % (program, runs))
+    print("  grammar built from text:   %.3f s (grammar %.1f ms)" % (without_cache, grammar_cold * 1000))
+    print("  grammar loaded from cache: %.3f s (grammar %.1f ms)" % (with_cache,    grammar_warm * 1000))
+
+    print("import time, best of %d runs:" % runs)
+    for module in ["sisal_parse", "sisal_compile_ir", "sisal_server"]:
+        times = [import_time(module) for r in range(runs)]
+        print("  %-18s %6.1f ms (%d modules)" % (module, min(times)[0] / 1000, times[0][1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+# makes the compiler's modules (parser, ast_, exporters...) importable
+# when a benchmark is started as "python benchmarks/<name>.py"
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'sample')))
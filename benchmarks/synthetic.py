@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  synthetic.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Generates large Sisal modules out of the constructs the front end supports,
+# so benchmarks can scale the input size freely.
+
+templates = [
+"""function f{n}(M, N : integer returns integer)
+  if M < N then
+    M * {n} + N - 1
+  else
+    N * 2 + M
+  end if
+end function
+""",
+"""function f{n}(M, N : integer returns integer)
+  let
+    A := M + {n};
+    B := N * 2
+  in
+    A + B
+  end let
+end function
+""",
+"""function f{n}(A : array of integer returns array of integer)
+  for a in A
+    returns array of a when a < {n}
+  end for
+end function
+""",
+"""function f{n}(M, N : integer returns integer)
+  g{n}(M, N) + M * (N - {n})
+end function
+
+function g{n}(M, N : integer returns integer)
+  M + N
+end function
+""",
+]
+
+
+def make_function(n):
+    return templates[n % len(templates)].format(n = n)
+
+
+def make_module(num_functions):
+    return "\n".join(make_function(n) for n in range(num_functions))
+
+
+# the C++ backend doesn't compile "let" yet and needs the functions to be
+# defined before they are called
+cpp_templates = [templates[0], templates[2],
+"""function g{n}(M, N : integer returns integer)
+  M + N
+end function
+
+function f{n}(M, N : integer returns integer)
+  g{n}(M, N) + M * (N - {n})
+end function
+""",
+]
+
+
+# a module the C++ backend compiles (see cpp_templates),
+# it's functions are numbered from "start"
+def make_cpp_module(num_functions, start = 0):
+    return "\n".join(cpp_templates[n % len(cpp_templates)].format(n = n)
+                     for n in range(start, start + num_functions))
+
+
+# an arithmetic chain "M + 1 + 2 + ... " of the given length
+def make_long_expression_module(length):
+    chain = " + ".join(["M"] + [str(n) for n in range(length)])
+    return "function main(M : integer returns integer)\n  %s\nend function\n" % chain
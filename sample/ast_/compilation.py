@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  compilation.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# State of one compilation (parsing a module and exporting it's IR).
+# Everything that used to be kept in class fields and module globals
+# (Node.nodes, Node.node_counter, Function.functions and exporters/json.py's
+# json_nodes) lives here, so modules can be compiled in several threads at
+# once. The parser and the exporter get it passed explicitly.
+
+
+class Compilation:
+
+    # locations = False leaves source locations out of the IR, "relative" counts
+    # their rows from the first line of the function (see ast_/location.py),
+    # check_types = True compares the types of the ports every edge connects
+    def __init__(self, locations = True, check_types = False):
+        self.locations    = locations
+        self.check_types  = check_types
+        self.nodes        = {}  # node id -> AST node
+        self.node_counter = 0
+        self.functions    = {}  # function name -> Function or FunctionImport
+        self.json_nodes   = {}  # node id -> IR node (dict), filled while exporting
+        self.symbols      = {}  # scope's node id -> SymbolTable (exporters/symbols.py)
+
+        # function name -> it's first line, filled while exporting with
+        # locations = "relative" (see ast_/location.py)
+        self.function_lines = {}
+
+        # messages about edges connecting ports of different types (check_types)
+        self.type_mismatches = []
+
+        # node_counter's value when the last function was finished
+        self.function_start = 0
+
+    def get_node_id(self):
+        self.node_counter += 1
+        return "node" + str(self.node_counter)
+
+    # Called when a function's node is created (it's created after all the
+    # nodes inside it). The ids given out since the previous function get the
+    # function's name as a prefix and are counted from the function's start:
+    # "node12" becomes "main:node3", so a function's ids depend only on the
+    # function itself, not on the functions before it.
+    def finish_function(self, function):
+        from ast_.node import Node
+
+        prefix = function.function_name + ":node"
+        base   = self.function_start
+
+        def rename(node_id):
+            return prefix + str(int(node_id[4:]) - base)
+
+        # walks the AST with a stack, expressions can be nested too deep for recursion
+        stack = [function]
+        seen  = set()
+
+        while stack:
+            value = stack.pop()
+            if id(value) in seen:
+                continue
+
+            if isinstance(value, Node):
+                seen.add(id(value))
+                old_id = getattr(value, "node_id", None)
+
+                for field, field_value in value.fields():
+                    if field.endswith("_id"):
+                        setattr(value, field, rename(field_value))
+                    else:
+                        stack.append(field_value)
+
+                if old_id:
+                    del self.nodes[old_id]
+                    self.nodes[value.node_id] = value
+
+            elif type(value) == dict:
+                seen.add(id(value))
+                for key, item in value.items():
+                    if key == "id":
+                        value[key] = rename(item)
+                    else:
+                        stack.append(item)
+
+            elif type(value) == list:
+                seen.add(id(value))
+                stack.extend(value)
+
+        self.function_start = self.node_counter
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  location.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Source locations of AST nodes.
+# The parser only stores character offsets, the "row:column-row:column" text
+# is produced when the IR is written out or when an error message needs it.
+
+import threading
+
+# settings.emit_locations: when False, "location" fields are left out of the IR
+# (set from Compilation.locations when a function is exported). It's kept per
+# thread, so compilations running in different threads don't see each other's.
+# With locations = RELATIVE the rows are counted from the first line of the
+# function being exported (settings.line_base, which is row 1), so a function's
+# IR doesn't change when the lines before it do. The functions' first lines
+# are written in the module's "lines" table (see exporters/ir_writer.py)
+settings = threading.local()
+
+RELATIVE = "relative"
+
+
+class Location:
+
+    __slots__ = ("index", "start", "end")
+
+    # index is the LineIndex of the text the offsets point into
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end   = end
+
+    def __str__(self):
+        return self.index.location(self.start, self.end)
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def row(self):
+        return self.index.row_column(self.start)[0]
+
+    # the location's text with the rows counted from line_base
+    def relative(self, line_base):
+        start_row, start_column = self.index.row_column(self.start)
+        end_row,   end_column   = self.index.row_column(self.end)
+
+        return "{}:{}-{}:{}".format(start_row - line_base + 1,
+                                    start_column,
+                                    end_row - line_base + 1,
+                                    end_column)
+
+    # locations are never changed once created, so copies of the IR can share them
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# location covering everything from "first" to "last"
+def span(first, last):
+    if first is None or last is None:
+        return None
+    return Location(first.index, first.start, last.end)
+
+
+# returns {"location": location} to be unpacked into an IR dict,
+# or an empty dict if locations are not emitted
+def location_field(location):
+    emit_locations = getattr(settings, "emit_locations", True)
+    if not emit_locations:
+        return {}
+    if emit_locations == RELATIVE and isinstance(location, Location):
+        return {"location": location.relative(settings.line_base)}
+    return {"location": location}
+
+
+# line_base is the first line of the function being exported (used with RELATIVE)
+def set_emit_locations(emit_locations, line_base = None):
+    settings.emit_locations = emit_locations
+    settings.line_base      = line_base if emit_locations == RELATIVE else None
+
+
+# lets json.dump(s) write Location objects (pass it as "default")
+def location_to_json(obj):
+    if isinstance(obj, Location):
+        return str(obj)
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
@@ -24,100 +24,124 @@
 
 
 from exporters.json    import *
-from exporters.graphml import *
 
+from parser.arithmetic_helpers import build_tree
 
-class Node:
 
-    nodes = {}
-    node_counter = 0
+# marks fields that were not given to the constructor (see Node.fields)
+unset = object()
+
 
-    def get_node_id():
+class Node:
 
-        Node.node_counter += 1
-        return "node" + str(Node.node_counter)
+    # every node class lists it's fields in __slots__ (so nodes have no
+    # __dict__), all_fields has them together with the base classes' fields
+    __slots__  = ("node_id",)
+    all_fields = __slots__
 
-    def __init__(self, *args, **kwargs):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.all_fields = cls.__base__.all_fields + cls.__dict__.get("__slots__", ())
 
-        if not ( "no_id" in kwargs and kwargs["no_id"]):
-            self.node_id = Node.get_node_id()
-            Node.nodes[self.node_id] = self
+    # context is the Compilation (ast_/compilation.py) the node belongs to,
+    # it gives the node it's id (nodes with no_id = True don't need it)
+    def __init__(self, *args, context = None, **kwargs):
 
-        if "no_id" in kwargs: kwargs.pop("no_id")
+        if not kwargs.pop("no_id", False):
+            self.node_id = context.get_node_id()
+            context.nodes[self.node_id] = self
 
-        # TODO consider list of allowed props (https://stackoverflow.com/questions/8187082/how-can-you-set-class-attributes-from-variable-arguments-kwargs-in-python)
-        self.__dict__.update(kwargs)
+        # fields that are not in __slots__ raise AttributeError
+        for field, value in kwargs.items():
+            setattr(self, field, value)
+
+    # (name, value) pairs of the fields that are set, in the order of all_fields
+    def fields(self):
+        values = [(field, getattr(self, field, unset)) for field in self.all_fields]
+        return [(field, value) for field, value in values if value is not unset]
     
-    def emit_json(self, parent_node, slot, current_scope):
+    def emit_json(self, context, parent_node, slot, current_scope):
         if not getattr(type(self),"__emit_json__", None):
             class_name = self.__class__.__name__
             type(self).__emit_json__ = globals() [ "export_" + class_name.lower() + "_to_json"];
-        return type(self).__emit_json__(self, parent_node, slot, current_scope)
+        return type(self).__emit_json__(context, self, parent_node, slot, current_scope)
 
     def emit_cpp(self):
         pass
 
     def __repr__(self):
-        return (str(self.__dict__))
+        return (str(dict(self.fields())))
 
     def __str__(self):
-        return (str(self.__dict__))
+        return (str(dict(self.fields())))
 
 
 class Function(Node):
 
-    #static field storing name - function node pairs
-    functions = {}
+    __slots__ = ("name", "function_name", "nodes", "location", "params", "ret_types")
+
     built_ins = {
                     "size" : dict (in_ports = [ArrayType(IntegerType())], out_ports = [IntegerType()])
                 }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(**kwargs)
-        Function.functions[self.function_name] = self
+    def __init__(self, *args, context, **kwargs):
+        super().__init__(context = context, **kwargs)
+        context.functions[self.function_name] = self
+        context.finish_function(self)
 
-    def emit_json(self, parent_node, slot = 0, current_scope = None):
-            return export_function_to_json(self, parent_node, slot, current_scope)
+    def emit_json(self, context, parent_node, slot = 0, current_scope = None):
+            return export_function_to_json(context, self, parent_node, slot, current_scope)
 
-    def emit_graphml(self, parent_node):
-            return export_function_to_graphml(self, parent_node)
+    def emit_graphml(self, context, parent_node):
+            # graphml is only used with sisal_parse.py --graph
+            from exporters.graphml import export_function_to_graphml
+            return export_function_to_graphml(context, self, parent_node)
 
 
 class FunctionImport(Node):
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(**kwargs)
-        Function.functions[self.function_name] = self
+    __slots__ = ("name", "function_name", "params", "ret_types", "location", "nodes", "edges")
 
-    def emit_json(self, parent_node, slot = 0, current_scope = None):
-            return export_functionimport_to_json(self, parent_node, slot, current_scope)
+    def __init__(self, *args, context, **kwargs):
+        super().__init__(context = context, **kwargs)
+        context.functions[self.function_name] = self
+        context.finish_function(self)
 
-    def emit_graphml(self, parent_node):
-            return export_function_to_graphml(self, parent_node)
+    def emit_json(self, context, parent_node, slot = 0, current_scope = None):
+            return export_functionimport_to_json(context, self, parent_node, slot, current_scope)
+
+    def emit_graphml(self, context, parent_node):
+            from exporters.graphml import export_function_to_graphml
+            return export_function_to_graphml(context, self, parent_node)
 
 class If(Node):
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(**kwargs)
+    __slots__ = ("conditions", "then_nodes", "elseif_nodes", "else_nodes", "location")
+
+    def __init__(self, *args, context, **kwargs):
+        super().__init__(context = context, **kwargs)
 
         # give the conditions and branches ids:
 
         for n, elseif in enumerate(self.elseif_nodes):
-            self.elseif_nodes[n] = dict(id = Node.get_node_id(), nodes = elseif)
+            self.elseif_nodes[n] = dict(id = context.get_node_id(), nodes = elseif)
 
-        self.conditions = dict(id = Node.get_node_id(), nodes = self.conditions)
-        self.then_nodes = dict(id = Node.get_node_id(), nodes = self.then_nodes)
-        self.else_nodes = dict(id = Node.get_node_id(), nodes = self.else_nodes)
+        self.conditions = dict(id = context.get_node_id(), nodes = self.conditions)
+        self.then_nodes = dict(id = context.get_node_id(), nodes = self.then_nodes)
+        self.else_nodes = dict(id = context.get_node_id(), nodes = self.else_nodes)
 
 
 class Loop(Node):
 
-    def __init__(self, *args, **kwargs):
-       super().__init__(**kwargs, no_id = False)
+    __slots__ = ("range", "init", "while_", "returns", "location",
+                 "range_id", "init_id", "returns_id", "while_id")
+
+    def __init__(self, *args, context, **kwargs):
+       super().__init__(**kwargs, context = context, no_id = False)
        # sub_nodes will have their own IDs so we calculate them
        for sub in ["range", "init", "returns", "while"]:
-            if sub in self.__dict__:
-                self.__dict__[sub + "_id"] = Node.get_node_id()
+            if hasattr(self, sub):
+                setattr(self, sub + "_id", context.get_node_id())
        #self.init_id = Node.get_node_id()
        #self.test_id = Node.get_node_id()
        #self.body_id = Node.get_node_id()
@@ -126,85 +150,107 @@ class Loop(Node):
 
 class Scatter(Node):
     
-    pass
+    __slots__ = ("what", "in_what")
 
 
 class Init(Node):
     
-    pass
+    __slots__ = ()
     
 
 class Let(Node):
 
-    def __init__(self, *args, **kwargs):
-       super().__init__(**kwargs, no_id = False)
+    __slots__ = ("init", "body", "location", "init_id", "body_id")
+
+    def __init__(self, *args, context, **kwargs):
+       super().__init__(**kwargs, context = context, no_id = False)
        # sub_nodes will have their own IDs so we calculate them
-       self.init_id = Node.get_node_id()
-       self.body_id = Node.get_node_id()
+       self.init_id = context.get_node_id()
+       self.body_id = context.get_node_id()
 
 
 class Algebraic(Node):
 
+    __slots__ = ("expression", "location", "tree")
+
     def __init__(self, *args, **kwargs):
         super().__init__(**kwargs, no_id = True)
+        # operations as nested [left, Bin, right] lists (see arithmetic_helpers.py)
+        self.tree = build_tree(self.expression)
 
 
 class Identifier(Node):
 
+    __slots__ = ("name", "location")
+
     def __init__(self, *args, **kwargs):
         super().__init__(**kwargs, no_id = True)
 
 
 class Literal(Node):
 
-    pass
+    __slots__ = ("value", "location", "type")
 
 
 class Statement(Node):
 
-    pass
+    __slots__ = ()
 
 
 class Assignment(Statement):
 
+    __slots__ = ("identifier", "value")
+
     def __init__(self, *args, **kwargs):
        super().__init__(**kwargs, no_id = True)
 
-    pass
-
 
 # ~ class Returns(Node):
     # ~ pass
 
 
 class OldValue(Node):
+
+    __slots__ = ("name", "location")
+
     def __init__(self, *args, **kwargs):
        super().__init__(**kwargs, no_id = False)
 
-    pass
-
 
 class ArrayAccess(Node):
-    pass
+
+    # inline_indices is only set on the outermost ArrayAccess (see TreeVisitor.visit_name)
+    __slots__ = ("name", "location", "index", "subarray", "array_index", "inline_indices")
 
 
 class Bin(Node):
-    pass
+
+    __slots__ = ("location", "operator")
 
 
 class Call(Node):
-    pass
+
+    __slots__ = ("function_name", "args", "location")
 
 
 class Reduction(Node):
-    pass
+
+    __slots__ = ("type", "of_what", "when", "location", "one_id")
+
+    def __init__(self, *args, context, **kwargs):
+       super().__init__(**kwargs, context = context)
+       # the "1" literal created by the JSON export (see export_reduction_to_json)
+       self.one_id = context.get_node_id()
 
 
 class BuiltInCall(Node):
-    pass
+
+    __slots__ = ("function_name", "args", "location")
+
 
 class Equation(Node):
-    pass
+
+    __slots__ = ("left", "right")
 
 # ~ class Sum(Reduction):
     # ~ pass
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  backends.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# The code generators the IR can be compiled with. A backend's module
+# registers it (register_backend) when it's imported: a dispatch table from
+# the node classes of compiler/nodes.py to the functions emitting them and
+# the function making a module out of the parsed functions.
+# The module is imported when the backend is first used (compiling to C++
+# doesn't load llvmlite), after that the backend stays registered, so
+# several backends can be used side by side (see compile_ir in json_parser.py).
+
+
+BACKEND_MODULES = {
+    "C++"  : "compiler.cpp",
+    "LLVM" : "compiler.llvm",
+}
+
+backends = {} # name -> Backend
+
+
+class Backend:
+
+    def __init__(self, name, module, table, create_module):
+        self.name          = name
+        self.module        = module        # the backend's python module
+        self.table         = table         # node class -> export function
+        self.create_module = create_module # (parsed functions, module name, scheduling policy) -> module
+
+    def __repr__(self):
+        return "Backend(%s)" % self.name
+
+
+def register_backend(name, module, table, create_module):
+    backends[name] = Backend(name, module, table, create_module)
+    return backends[name]
+
+
+def get_backend(name):
+    backend = backends.get(name)
+    if backend is None:
+        if not name in BACKEND_MODULES:
+            raise Exception ("unknown backend: %s" % name)
+        __import__(BACKEND_MODULES[name])
+        backend = backends[name]
+    return backend
@@ -23,6 +23,7 @@
 #
 
 from compiler.cpp_codegen import *
+from compiler.scheduler   import schedule
 
 
 type_map = {
@@ -41,22 +42,47 @@ def resolve(edge, scope):
     if to_node.is_node_parent(edge.from_) or from_node == to_node:
         return scope.vars[edge.from_index]
     else:
-        return from_node.emit_cpp(scope)
+        return emit(from_node, scope)
+
+
+# a node is emitted once per scope, all the nodes using it's value
+# (there may be several, the dataflow graph can fan out) get the same C++ value.
+# The nodes it needs are emitted before it in the order scheduler.py gives
+# (with the scope's scheduling_policy)
+def emit(node, scope):
+    if not node.id in scope.values:
+        emitted = lambda other: other.id in scope.values
+        for current in schedule(node, emitted, scope.scheduling_policy):
+            scope.values[current.id] = current.emit(backend, scope)
+    return scope.values[node.id]
 
 
 def sisal_to_cpp_type(type_):
     return type_map[str(type_)]
 
 
-def create_cpp_module(functions, name):
+# emits a function (or a function import), the scope given to it only carries
+# the scheduling policy (see scheduler.py) to the function's scopes
+def emit_function(function, scheduling_policy = None):
+    return function.emit_cpp(CppScope(scheduling_policy = scheduling_policy))
+
+
+def create_cpp_module(functions, name, scheduling_policy = None):
     module = Module(name)
 
     for f in functions:
         # cpp_function is a function object from C++ code generator
         # it can be converted to a string C++ src. code using the standardized "str" method
-        for cpp_function in f.emit_cpp():
+        # emit_function returns a list because one function can translate to several functions in C++
+        # like main produces "main" and "sisal_main"
+        cpp_data = emit_function(f, scheduling_policy)
+
+        for cpp_function in cpp_data["functions"]:
             module.add_function(cpp_function)
 
+        for import_ in cpp_data["imports"]:
+            module.add_header(import_)
+
     return module
 
 
@@ -106,7 +132,9 @@ def export_function_to_cpp(node, scope):
         functions["main"] = cpp_main
 
     builder = Builder(this_function.get_entry_block())
-    scope = CppScope(this_function.get_arguments(), builder)
+    # (functions emitted without a scope use the default policy)
+    scope = CppScope(this_function.get_arguments(), builder,
+                     scheduling_policy = getattr(scope, "scheduling_policy", None))
 
     for edge in node.get_input_edges()[:1]:  # do only one for now
         scope.builder.ret(resolve(edge, scope))
@@ -155,7 +183,9 @@ def export_functionimport_to_cpp(node, scope):
         functions["main"] = cpp_main
 
     builder = Builder(this_function.get_entry_block())
-    scope = CppScope(this_function.get_arguments(), builder)
+    # (functions emitted without a scope use the default policy)
+    scope = CppScope(this_function.get_arguments(), builder,
+                     scheduling_policy = getattr(scope, "scheduling_policy", None))
 
     return dict(functions=[], imports=[names_to_header[node.function_name]])
 
@@ -183,7 +213,7 @@ def export_binary_to_cpp(node, scope):
 def export_condition_to_cpp(node, scope):
     ((result, edge),) = node.get_result_nodes()
 
-    return result.emit_cpp(scope)
+    return emit(result, scope)
 
 
 def export_branch_to_cpp(node, scope):
@@ -243,7 +273,7 @@ def export_let_to_cpp(node, scope):
     for index, port in enumerate(node.init.out_ports):
         init_values = node.init.get_result_nodes()
         value_node = next(node for node, edge in init_values if edge.to_index == index)
-        calculated_value = value_node.emit_cpp(scope)
+        calculated_value = emit(value_node, scope)
         # ~ if index != 1:
             # ~ calculated_value = value_node.emit_cpp(scope)
         # ~ else:
@@ -260,7 +290,7 @@ def export_let_to_cpp(node, scope):
 
     scope.builder.add_block(value_block)
     new_vars = new_vars + scope.vars
-    value_scope = CppScope(new_vars, value_builder)
+    value_scope = CppScope(new_vars, value_builder, scheduling_policy = scope.scheduling_policy)
     result = node.body.emit_cpp(value_scope)
     # ~ body
     return result#
@@ -278,12 +308,12 @@ def export_if_to_cpp(node, scope):
     result = scope.builder.define(type_, name="if_result")
 
     then = if_.get_then_builder()
-    then_scope = CppScope(scope.vars, then)
+    then_scope = CppScope(scope.vars, then, scheduling_policy = scope.scheduling_policy)
     then_result = get_branch("Then").emit_cpp(then_scope)
     then_scope.builder.assignment(result, then_result)
 
     else_ = if_.get_else_builder()
-    else_scope = CppScope(scope.vars, else_)
+    else_scope = CppScope(scope.vars, else_, scheduling_policy = scope.scheduling_policy)
     else_result = get_branch("Else").emit_cpp(else_scope)
     else_scope.builder.assignment(result, else_result)
     # ~ print (get_branch("Else").name)
@@ -293,7 +323,7 @@ def export_if_to_cpp(node, scope):
 def export_precondition_to_cpp(node, scope):
     # the node that puts out the condition value:
     result_node, result_edge = node.get_result_nodes()[0]
-    result_node.emit_cpp(scope)
+    emit(result_node, scope)
 
 
 def export_oldvalue_to_cpp(node, scope):
@@ -307,7 +337,7 @@ def export_body_to_cpp(node, scope):
 
     for result_node, result_edge in node.get_result_nodes():
         index = result_edge.to_index
-        value = result_node.emit_cpp(scope)
+        value = emit(result_node, scope)
         # ~ scope.builder.assignment(scope.vars[index], value)
         return value
 
@@ -341,7 +371,7 @@ def export_reduction_to_cpp(node, scope):
 def export_returns_to_cpp(node, scope):
     # ~ print ("returns")
     for result_node, result_edge in node.get_result_nodes():
-        return result_node.emit_cpp(scope)
+        return emit(result_node, scope)
 
 
 def get_name_by_index(obj, index):
@@ -409,14 +439,14 @@ def export_loopexpression_to_cpp(node, scope):
     loop = scope.builder.loop()
 
     if "range" in node.__dict__:
-        range_scope = CppScope(loop_scope_vars, loop.get_range_builder())
+        range_scope = CppScope(loop_scope_vars, loop.get_range_builder(), scheduling_policy = scope.scheduling_policy)
         range_scope.loop_init_builder = loop.get_init_builder()
         scope.items = node.range.emit_cpp(range_scope) #it's a list!
 
     reduction_vars = scope.items + loop_scope_vars
 
     if "reduction" in node.__dict__:
-        reduction_scope = CppScope(reduction_vars, loop.get_reduction_builder())
+        reduction_scope = CppScope(reduction_vars, loop.get_reduction_builder(), scheduling_policy = scope.scheduling_policy)
         reduction_scope.result = result
         node.reduction.emit_cpp(reduction_scope)
 
@@ -451,3 +481,32 @@ def export_arrayaccess_to_cpp(node, scope):
     return scope.builder.array_access(
         resolve(array_edge, scope), resolve(index_edge, scope)
     )
+
+
+# the node classes of compiler/nodes.py and the functions emitting them
+# (nodes.py imports this module when it's first needed, so it's loaded by now)
+import sys
+import compiler.nodes
+from compiler.backends import register_backend
+
+backend = register_backend("C++", sys.modules[__name__], {
+    compiler.nodes.Function            : export_function_to_cpp,
+    compiler.nodes.FunctionImport      : export_functionimport_to_cpp,
+    compiler.nodes.Literal             : export_literal_to_cpp,
+    compiler.nodes.Binary              : export_binary_to_cpp,
+    compiler.nodes.Condition           : export_condition_to_cpp,
+    compiler.nodes.Branch              : export_branch_to_cpp,
+    compiler.nodes.FunctionCall        : export_functioncall_to_cpp,
+    compiler.nodes.BuiltInFunctionCall : export_builtinfunctioncall_to_cpp,
+    compiler.nodes.Let                 : export_let_to_cpp,
+    compiler.nodes.If                  : export_if_to_cpp,
+    compiler.nodes.PreCondition        : export_precondition_to_cpp,
+    compiler.nodes.OldValue            : export_oldvalue_to_cpp,
+    compiler.nodes.Body                : export_body_to_cpp,
+    compiler.nodes.Reduction           : export_reduction_to_cpp,
+    compiler.nodes.Returns             : export_returns_to_cpp,
+    compiler.nodes.Scatter             : export_scatter_to_cpp,
+    compiler.nodes.RangeGen            : export_rangegen_to_cpp,
+    compiler.nodes.LoopExpression      : export_loopexpression_to_cpp,
+    compiler.nodes.ArrayAccess         : export_arrayaccess_to_cpp,
+}, create_cpp_module)
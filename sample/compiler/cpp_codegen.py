@@ -40,13 +40,18 @@ from copy import copy
 
 
 class CppScope:
-    def __init__(self, vars_=None, builder=None, base_scope=None):
+    # scheduling_policy orders the emission of the scope's nodes (see scheduler.py),
+    # the scopes inside it get the same policy
+    def __init__(self, vars_=None, builder=None, base_scope=None, scheduling_policy=None):
         if base_scope == None:
             self.builder = builder
             self.vars = copy(vars_)
         else:
             self.builder = base_scope.builder
             self.vars = copy(base_scope.vars_)
+        # node id -> the value the node was emitted as in this scope (see cpp.py's emit)
+        self.values = {}
+        self.scheduling_policy = scheduling_policy
 
     def add_var_to_front(self, var):
         self.vars.insert(0, var)
@@ -571,6 +576,12 @@ class Function:
     def get_arguments(self):
         return self.arguments
 
+    # once the function's text is made only what it's callers need (the name,
+    # return type and arguments) is kept (see json_parser.py's cpp_chunks)
+    def drop_body(self):
+        self.statements  = []
+        self.entry_block = Block(name="entry")
+
     def __str__(self):
         text = ""
         footer = ""
@@ -790,9 +801,14 @@ class Module:
         if not header_name in self.headers:
             self.headers.append(header_name)
 
-    def __str__(self):
+    # the text before the functions
+    def head(self):
         text = "//" + self.name + "\n"
         text += header
         text += "\n\n".join([f"#include <{str(h)}>" for h in self.headers]) + "\n\n"
+        return text
+
+    def __str__(self):
+        text = self.head()
         text += "\n\n".join([str(f) for name, f in self.functions.items()])
         return text.strip()
@@ -22,7 +22,8 @@
 #
 #
 
-from compiler.nodes import *
+from compiler.nodes    import *
+from compiler.backends import get_backend
 # ~ from compiler.llvm import *
 # ~ from compiler.cpp import *
 
@@ -32,31 +33,110 @@ from compiler.nodes import *
     # ~ print ( create_llvm_module(functions, "module") )
 
 
-def compile_to_cpp(json_data, name = "module"):
-    Node.nodes = {}
-    Edge.edges = []
+# the nodes and edges of the IR being compiled are kept in class fields
+def reset_graph():
+    Node.nodes_     = {}
+    Node.parents    = {}
+    Port.ports      = {}
+    Edge.edges      = []
     Edge.edges_from = {}
     Edge.edges_to   = {}
-    module = Module(name)
+    Edge.results    = {}
+    Edge.parameters = {}
+    Edge.indexed    = 0
 
-    functions = [parse_node (function) for function in json_data["functions"]]
 
-    for f in functions:
-        # cpp_function is a function object from C++ code generator
-        # it can be converted to a string C++ src. code using the standardized "str" method
-        # f.emit_cpp() returns a list because one function can translate to several functions in C++
-        # like main produces "main" and "sisal_main"
-        cpp_data = f.emit_cpp()
+# json_data is the JSON IR (a dict, the ordinary or the compact dialect, see
+# ir/compact.py) or an IRStore (ir/store.py, also what ir/binary.py loads),
+# the store's nodes are read through NodeViews.
+# backend is the name of the code generator (see backends.py), every call can
+# use a different one, the module it makes is returned (a cpp_codegen.Module for "C++").
+# scheduling_policy orders the emitted code (see scheduler.py), it's a policy
+# function or it's name in scheduler.POLICIES
+def compile_ir(json_data, name = "module", backend = "C++", scheduling_policy = None):
+    from ir.store             import IRStore
+    from ir.compact           import is_compact, Expander
+    from compiler.scheduler   import get_policy
 
-        for cpp_function in cpp_data["functions"]:
-            module.add_function (cpp_function)
+    backend           = get_backend(backend)
+    scheduling_policy = get_policy(scheduling_policy)
+    reset_graph()
+
+    if isinstance(json_data, IRStore):
+        functions = [parse_node (function) for function in json_data.function_views()]
+    elif is_compact(json_data):
+        # compact functions are expanded one at a time
+        functions = [parse_node (function) for function in Expander(json_data).functions(json_data)]
+    else:
+        functions = [parse_node (function) for function in json_data["functions"]]
+
+    return backend.create_module(functions, name, scheduling_policy)
+
+
+def compile_to_cpp(json_data, name = "module", scheduling_policy = None):
+    return compile_ir(json_data, name, "C++", scheduling_policy)
+
+
+# compiles the JSON IR read from ir_file (see ir/json_stream.py) a function at
+# a time: every function is made into C++ as soon as it's read, it's text is
+# given out and it's nodes and edges are dropped before the next one is parsed,
+# only the functions' signatures are kept.
+# Calls only need the C++ functions emitted before (see cpp.py's "functions"),
+# so no function needs the nodes of another one.
+# The headers of the imports read before the first function are written
+# before it (in the IR imports come first), an import read later gets it's
+# "#include" where it's read (before the functions calling it).
+# The pieces put together are the text str(compile_to_cpp(...)) gives
+# (the whitespace at the end of the last piece is left out the way str(Module) strips it).
+def cpp_chunks(ir_file, name = "module", chunk_size = 1 << 16, scheduling_policy = None):
+    from compiler.cpp_codegen import Module
+    from ir.json_stream       import StreamedIR, expanded_functions
+    from compiler.scheduler   import get_policy
+
+    cpp               = get_backend("C++").module
+    scheduling_policy = get_policy(scheduling_policy)
+    module            = Module(name)
+    streamed          = StreamedIR(ir_file, chunk_size)
+    started           = False # the head is given out
+    pending           = ""    # the whitespace after the text given out so far
+
+    for function in expanded_functions(streamed):
+        reset_graph()
+        cpp_data = cpp.emit_function(parse_node (function), scheduling_policy)
+        texts    = []
 
         for import_ in cpp_data["imports"]:
-            module.add_header(import_)
+            if not import_ in module.headers:
+                module.add_header(import_)
+                if started:
+                    texts.append(f"#include <{import_}>")
+
+        for cpp_function in cpp_data["functions"]:
+            texts.append(str(cpp_function))
+            cpp_function.drop_body()
+
+        for text in texts:
+            text     = "\n\n" + text if started else module.head() + text
+            started  = True
+            stripped = text.rstrip()
+            yield pending + stripped
+            pending  = text[len(stripped):]
+
+    reset_graph()
+    if not started:
+        yield str(module)
+
 
-    # ~ module = create_cpp_module(functions, name)
+# writes the C++ code of the JSON IR read from ir_file to out a function at a
+# time (see cpp_chunks), without out the text is returned
+def stream_to_cpp(ir_file, name = "module", chunk_size = 1 << 16, scheduling_policy = None, out = None):
+    if out is None:
+        return "".join(cpp_chunks(ir_file, name, chunk_size, scheduling_policy))
 
-    return module
+    for text in cpp_chunks(ir_file, name, chunk_size, scheduling_policy):
+        out.write(text)
+        if hasattr(out, "flush"):
+            out.flush()
 
 
 def main(args):
@@ -25,6 +25,7 @@
 from llvmlite import ir, binding
 from copy import deepcopy
 import compiler.nodes
+from compiler.scheduler import schedule
 
 
 llvm_initialized = False
@@ -54,7 +55,8 @@ type_map = {
 
 class LlvmScope:
 
-    def __init__(self, builder, expected_type = None, name = "", function = None):
+    # scheduling_policy orders the emission of the nodes (see scheduler.py)
+    def __init__(self, builder, expected_type = None, name = "", function = None, scheduling_policy = None):
 
         self.builder       = builder
         self.name          = name
@@ -63,6 +65,8 @@ class LlvmScope:
         self.vars          = {}
         self.var_index     = {} # stores varname to index pairs
         self.function      = function
+        self.values        = {} # (node id, basic block) -> the node's value, see emit
+        self.scheduling_policy = scheduling_policy
 
     def add_var(self, name,  var_):
         self.vars[name] = var_
@@ -138,12 +142,13 @@ def add_bitcaster(builder, module):
     return fmt_arg
 
 
-def create_llvm_module(functions, module_name):
+# the scope given to the functions only carries the scheduling policy
+def create_llvm_module(functions, module_name, scheduling_policy = None):
     global module
     module = init_llvm(module_name)
 
     for function in functions:
-        function.emit_llvm()
+        function.emit_llvm(LlvmScope(None, scheduling_policy = scheduling_policy))
 
     return module
 
@@ -178,7 +183,8 @@ def export_function_to_llvm(function_node, scope = None):
     block = function.append_basic_block(name = "entry")
     builder = ir.IRBuilder(block)
 
-    scope = LlvmScope(builder, expected_type = return_llvm_type, function = function)
+    scope = LlvmScope(builder, expected_type = return_llvm_type, function = function,
+                      scheduling_policy = getattr(scope, "scheduling_policy", None))
 
     for n,p in enumerate(params):
         function.args[n].name = p
@@ -187,7 +193,7 @@ def export_function_to_llvm(function_node, scope = None):
     result_node, edge = function_node.get_input_nodes()[0]
 
     # TODO use scope.expected_type for further nodes
-    function_result = result_node.emit_llvm(scope)
+    function_result = emit(result_node, scope)
 
 
     exit_block = scope.builder.append_basic_block(name = "exit")
@@ -204,15 +210,21 @@ def export_function_to_llvm(function_node, scope = None):
     return function_result
 
 
-def is_parent(node1, node2):
+# the nodes are emitted once per basic block (the branches of an "if" share
+# the scope, but not the values), the nodes a node needs are emitted before it
+# in the order scheduler.py gives
+def emit(node, scope):
+    key = lambda other: (other.id, scope.builder.block)
+
+    if not key(node) in scope.values:
+        emitted = lambda other: key(other) in scope.values
+        for current in schedule(node, emitted, scope.scheduling_policy):
+            scope.values[key(current)] = current.emit(backend, scope)
+    return scope.values[key(node)]
 
-        N2 = compiler.nodes.Node.nodes_[node2]
-        if not "nodes" in N2.__dict__: return False
 
-        for n in N2.nodes:
-            if n.id == node1:
-                return True
-        return False
+def is_parent(node1, node2):
+    return compiler.nodes.Node.is_parent(node1, node2)
 
 
 def get_edge_between(a, b):
@@ -285,7 +297,7 @@ def export_binary_to_llvm(binary_node, scope):
             index = get_edges_between(operand, binary_node)[n].from_index
             dereference_and_add(scope.get_var_by_index(index))
         else:
-            dereference_and_add(operand.emit_llvm(scope))
+            dereference_and_add(emit(operand, scope))
 
     lhs, rhs = ops
 
@@ -322,7 +334,7 @@ def export_branch_to_llvm(branch_node, scope):
         for node, edge in result_nodes:
             # return first and only port value for now
             # TODO implement multiple outputs
-            return node.emit_llvm(scope)
+            return emit(node, scope)
     else:
         input_edges = branch_node.get_input_edges()
         for edge in input_edges:
@@ -333,7 +345,7 @@ def export_condition_to_llvm(condition_node, scope):
 
     for node, edge in condition_node.get_result_nodes():
         # return first and only port value for now
-        return node.emit_llvm(scope)
+        return emit(node, scope)
 
 
 def export_if_to_llvm(if_node, scope):
@@ -367,7 +379,7 @@ def export_functioncall_to_llvm(function_call_node, scope):
     # put argument values into appropriate argument slots:
     args = [None for i in range(num_in_ports)]
     for (node, edge) in arg_nodes:
-        args[edge.to_index] = node.emit_llvm(scope)
+        args[edge.to_index] = emit(node, scope)
 
     # ~ Call function fn with arguments args, a sequence of values.
     # ~ cconv is the optional calling convention.
@@ -390,7 +402,7 @@ def export_init_to_llvm(init_node, scope):
             #TODO store scope's var in this var
             pass
         else:
-            scope.builder.store(node.emit_llvm(scope), scope.vars[name])
+            scope.builder.store(emit(node, scope), scope.vars[name])
 
     # doesn't need to return anything, only to initialize the loop
 
@@ -403,7 +415,7 @@ def export_precondition_to_llvm (pre_cond_node, scope):
         raise Exception("only one loop condition is supported at the moment, location: " + pre_cond_node.location)
 
     node, edge = result_nodes[0]
-    return node.emit_llvm(scope)
+    return emit(node, scope)
 
 
 def export_reduction_to_llvm (reduction_node, scope):
@@ -422,7 +434,7 @@ def export_returns_to_llvm (returns_node, scope):
     # if it's "value" we return the value
     # if it's sum we must accumulate it each time after body is executed
     node, edge = returns_node.get_result_nodes()[0]
-    return node.emit_llvm(scope)
+    return emit(node, scope)
 
 
 def export_oldvalue_to_llvm (oldvalue_node, scope):
@@ -437,7 +449,7 @@ def export_body_to_llvm(body_node, scope):
     # TODO implement multiple statements
     result_node, edge = body_node.get_result_nodes()[0]
     index = edge.to_index
-    final_value = result_node.emit_llvm(scope)
+    final_value = emit(result_node, scope)
     scope.builder.store(final_value, scope.get_var_by_index(index))
 
 
@@ -468,5 +480,27 @@ def export_loopexpression_to_llvm(loopexpression_node, scope):
     return result
 
 
+# the node classes of compiler/nodes.py and the functions emitting them
+import sys
+from compiler.backends import register_backend
+
+backend = register_backend("LLVM", sys.modules[__name__], {
+    compiler.nodes.Binary         : export_binary_to_llvm,
+    compiler.nodes.Body           : export_body_to_llvm,
+    compiler.nodes.Branch         : export_branch_to_llvm,
+    compiler.nodes.Condition      : export_condition_to_llvm,
+    compiler.nodes.Function       : export_function_to_llvm,
+    compiler.nodes.FunctionCall   : export_functioncall_to_llvm,
+    compiler.nodes.If             : export_if_to_llvm,
+    compiler.nodes.Init           : export_init_to_llvm,
+    compiler.nodes.Literal        : export_literal_to_llvm,
+    compiler.nodes.LoopExpression : export_loopexpression_to_llvm,
+    compiler.nodes.OldValue       : export_oldvalue_to_llvm,
+    compiler.nodes.PreCondition   : export_precondition_to_llvm,
+    compiler.nodes.Reduction      : export_reduction_to_llvm,
+    compiler.nodes.Returns        : export_returns_to_llvm,
+}, create_llvm_module)
+
+
 if __name__ == "__main__":
     pass
@@ -25,38 +25,54 @@
 
 from compiler.json_parser import *
 
-COMPILER = "C++"
+from sisal_type.sisal_type import canonical_type
 
-if "COMPILER" in globals():
+# code generators are imported when they are first used (see backends.py),
+# so compiling to C++ doesn't load llvmlite
+from compiler.backends     import get_backend
 
-    if   COMPILER == "LLVM":
-        from compiler.llvm import *
 
-    elif COMPILER == "C++":
-        from compiler.cpp import *
-
-else:
-    raise Exception ("Compiler not specified!")
+BRANCH_NAMES = ["Else", "ElseIf", "Then"]
 
-import re
 
-BRANCH_NAMES = ["Else", "ElseIf", "Then"]
+# the key a type is interned by in Type.by_key: the name of the type
+# (or of the elements' type for arrays), without making a Sisal type
+def type_key(type_object):
+    element = type_object.get("element")
+    if element is None:
+        return type_object.get("name")
+    return ("array", type_key(element))
 
 
 def get_type(type_object):
-    return Type(type_object)
+    key   = type_key(type_object)
+    type_ = Type.by_key.get(key)
+    if type_ is None:
+        type_ = Type.by_key.setdefault(key, sisal_type_to_type(canonical_type(type_object)))
+    return type_
+
+
+# ports and edges of the same type share one Type (one per canonical Sisal type)
+def sisal_type_to_type(sisal_type):
+    type_ = Type.types.get(sisal_type)
+    if type_ is None:
+        type_ = Type.types.setdefault(sisal_type, Type(sisal_type))
+    return type_
+
+
+# ports are interned, the same (node, type, index) is one Port
+# (like a node's in and out ports with the same index and type)
+def get_port(node_id, type_, index):
+    key  = (node_id, type_, index)
+    port = Port.ports.get(key)
+    if port is None:
+        port = Port.ports[key] = Port(node_id, type_, index)
+    return port
 
 
 def get_ports(ports):
     try:
-        return [
-                    Port(
-                     node_id = p["nodeId"],
-                     type    = get_type(p["type"]),
-                     index   = p["index"]
-                    )
-                    for p in ports
-                ]
+        return [ get_port(p["nodeId"], get_type(p["type"]), p["index"]) for p in ports ]
     except Exception as e:
         print (ports)
         raise (e)
@@ -104,52 +120,79 @@ def replace_operators(op):
     return op.replace("&lt", "<").replace("&le", "<=").replace("&gt", ">").replace("&ge", ">=")
 
 
-def parse_json_fields(self, node):
-
-    if ("name" in node ):         self.name          = node["name"]
-    if ("location" in node ):     self.location      = node["location"]
-    if ("id" in node ):           self.id            = node["id"]
-    if ("functionName" in node ): self.function_name = node["functionName"]
-    if ("operator" in node ):     self.operator      = replace_operators(node["operator"])
-    if ("callee" in node ):       self.callee        = node["callee"]
-    if ("value" in node ):        self.value         = node["value"]
+# what is done with each field of an IR node: the attribute it's put into and
+# the function converting it's value (None if it's taken as it is). The fields
+# are parsed in this order (a node's edges are made before it's nodes' edges)
+FIELDS = [
+    ("name",         "name",          None),
+    ("location",     "location",      None),
+    ("id",           "id",            None),
+    ("functionName", "function_name", None),
+    ("operator",     "operator",      replace_operators),
+    ("callee",       "callee",        None),
+    ("value",        "value",         None),
 
-    if ("edges" in node ):        self.edges         = get_edges(node["edges"])
-    if ("inPorts" in node ):      self.in_ports      = get_ports(node["inPorts"] )
-    if ("outPorts" in node ):     self.out_ports     = get_ports(node["outPorts"])
-    if ("params" in node ):       self.params        = get_params(node["params"])
+    ("edges",        "edges",         get_edges),
+    ("inPorts",      "in_ports",      get_ports),
+    ("outPorts",     "out_ports",     get_ports),
+    ("params",       "params",        get_params),
 
-    if ("condition" in node ):    self.condition     = parse_node (node["condition"])
-    if ("branches" in node ):     self.branches      = parse_nodes(node["branches"])
-    if ("nodes" in node ):        self.nodes         = parse_nodes(node["nodes"])
+    ("condition",    "condition",     parse_node),
+    ("branches",     "branches",      parse_nodes),
+    ("nodes",        "nodes",         parse_nodes),
 
-    if ("range" in node ):        self.range         = parse_node(node["range"])
+    ("range",        "range",         parse_node),
 
     # Loop:
+    ("results",      "results",       get_params),
+    ("init",         "init",          parse_node),
+    ("preCondition", "pre_condition", parse_node),
+    ("body",         "body",          parse_node),
+    ("reduction",    "reduction",     parse_node),
+]
 
-    if ("results" in node ): self.results = get_params(node["results"])
+FIELD_ORDER = {key: n for n, (key, attribute, convert) in enumerate(FIELDS)}
 
-    for name in ["init", "preCondition", "body", "reduction"]:
-        # will replace names like "preCondition" with names like "pre_condition"
-        # to adhere to typical Python naming scheme:
-        conv_name = re.sub("([A-Z])", lambda m: "_" + m.group(0).lower(), name)
-        #
-        if (name in node ): self.__dict__[conv_name] = parse_node(node[name])
+# (node kind, the node's keys) -> the FIELDS entries of the keys, in order
+field_plans = {}
+
+
+def field_plan(kind, keys):
+    plan = field_plans.get((kind, keys))
+    if plan is None:
+        known = sorted((key for key in keys if key in FIELD_ORDER), key = FIELD_ORDER.get)
+        plan  = field_plans[(kind, keys)] = [FIELDS[FIELD_ORDER[key]] for key in known]
+    return plan
+
+
+def parse_json_fields(self, node):
+    fields = self.__dict__
+
+    for key, attribute, convert in field_plan(node["name"], tuple(node)):
+        value = node[key]
+        fields[attribute] = value if convert is None else convert(value)
 
 
 class Type:
 
-    def __init__(self, type_object):
-        self.location = type_object["location"]
-        if "name" in type_object:
-            self.descr = type_object["name"]
-        else: #presumably it has "element" otherwise
-            self.descr = Type(type_object["element"])
+    types  = {} # canonical Sisal type -> Type
+    by_key = {} # type_key of a type's JSON -> Type
+
+    # sisal_type is a canonical type from sisal_type.py
+    def __init__(self, sisal_type):
+        self.sisal_type = sisal_type
+        if sisal_type.element_type is not None: # an array
+            self.descr = sisal_type_to_type(sisal_type.element_type)
+        else:
+            self.descr = sisal_type.name
 
     def __repr__(self):
         return str(self.__dict__)
 
     def emit_llvm(self):
+        from llvmlite        import ir
+        from compiler.llvm   import SYSTEM_BIT_DEPTH
+
         type_map = {
             "integer" : ir.IntType(SYSTEM_BIT_DEPTH)
         }
@@ -157,6 +200,7 @@ class Type:
         return type_map[self.descr]
 
     def emit_cpp(self):
+        from compiler.cpp_codegen import ArrayType, IntegerType, RealType
 
         if type(self.descr) == Type:
             return ArrayType(self.descr.emit_cpp())
@@ -182,6 +226,12 @@ class Edge:
     edges_from = {}
     edges_to   = {}
 
+    # the edges bringing values from a node's child nodes (it's results)
+    # and from it's parent (it's parameters), filled in by index_edges
+    results    = {}
+    parameters = {}
+    indexed    = 0 # the number of edges index_edges went through
+
     def __init__(self, from_, to, from_type, to_type, from_index, to_index):
 
         self.from_      = from_
@@ -209,6 +259,8 @@ class Edge:
 
 class Port:
 
+    ports = {} # (node id, Type, index) -> Port, see get_port
+
     def __init__(self, node_id, type, index):
         self.node_id = node_id
         self.type    = type
@@ -218,14 +270,35 @@ class Port:
         return str(self.__dict__)
 
 
+# sorts the edges made since the last call into Edge.results and
+# Edge.parameters, the edges' nodes have to be parsed by then
+# (see Function.__init__)
+def index_edges():
+    for edge in Edge.edges[Edge.indexed:]:
+        if Node.parents.get(edge.from_) == edge.to:
+            Edge.results.setdefault(edge.to, []).append(edge)
+        elif Node.parents.get(edge.to) == edge.from_:
+            Edge.parameters.setdefault(edge.to, []).append(edge)
+
+    Edge.indexed = len(Edge.edges)
+
+
 class Node:
 
-    nodes_ = {}
+    nodes_  = {}
+    parents = {} # node id -> the id of the node whose "nodes" it's in
+
+    # IR produced without source locations has no "location" fields
+    location = "not available"
 
     def __init__(self, node):
         Node.nodes_[node["id"]] = self
         parse_json_fields (self, node)
 
+        if "nodes" in self.__dict__:
+            for child in self.nodes:
+                Node.parents[child.id] = self.id
+
     def __repr__(self):
         return str(self.__dict__)
 
@@ -239,12 +312,12 @@ class Node:
     # and edges that carry that final value:
     def get_result_nodes(self):
         return [( Node.nodes_[edge.from_], edge )
-            for edge in Edge.edges_to[self.id] if Node.is_parent(edge.from_, self.id)]
+            for edge in Edge.results.get(self.id, [])]
 
     # TODO check if this is needed
     def get_parameter_nodes(self):
         return [( Node.nodes_[edge.from_], edge )
-            for edge in Edge.edges_to[self.id] if Node.nodes_[edge.from_].has_nodes() and Node.is_parent(self.id, edge.from_)]
+            for edge in Edge.parameters.get(self.id, [])]
 
     # get all the pairs of nodes that output values to this node and corresponding edges
     def get_input_nodes(self):
@@ -257,43 +330,35 @@ class Node:
     def get_input_edges(self):
         return  Edge.edges_to[self.id]
 
+    # checks if node_id is this node's parent
     def is_node_parent(self, node_id):
-        if not "nodes" in Node.nodes_[node_id].__dict__:
-            return False
-
-        for n in Node.nodes_[node_id].nodes:
-            if n.id == self.id:
-                return True
-        return False
+        return Node.parents.get(self.id) == node_id
 
+    # checks if node1 is in node2's "nodes"
     @staticmethod
     def is_parent(node1, node2):
-        for n in Node.nodes_[node2].nodes:
-            if n.id == node1:
-                return True
-        return False
+        return Node.parents.get(node1) == node2
+
+    # emits the node with the function the backend's table has for it's class
+    # (see backends.py)
+    def emit(self, backend, scope):
+        function = backend.table.get(type(self))
+        if function:
+            return function(self, scope)
+        else:
+            raise Exception (f'compiling {type(self).__name__} to {backend.name} not implemented (at {self.location})')
 
     def emit_llvm(self, scope = None):
         if scope == None and type(self) != Function:
             raise Exception(f"No scope provided for{self.name} when emitting llvm-code")
 
-        class_name = self.__class__.__name__
-        func_name = "export_" + class_name.lower() + "_to_llvm"
-        if func_name in globals():
-            return globals() [ func_name ](self, scope)
-        else:
-            raise Exception (f'compiling {class_name} not implemented')
+        return self.emit(get_backend("LLVM"), scope)
 
     def emit_cpp(self, cpp_scope = None):
         if cpp_scope == None and type(self) != Function and type(self) != FunctionImport:
             raise Exception(f"No scope provided for{self.name} when emitting llvm-code")
 
-        class_name = self.__class__.__name__
-        func_name = "export_" + class_name.lower() + "_to_cpp"
-        if func_name in globals():
-            return globals() [ func_name ](self, cpp_scope)
-        else:
-            raise Exception (f'compiling {class_name} to C++ not implemented (at {self.location})')
+        return self.emit(get_backend("C++"), cpp_scope)
 
 
 class Condition(Node):
@@ -309,11 +374,19 @@ class If(Node):
 
 
 class Function(Node):
-    pass
+
+    # a function is made after all of it's nodes and edges,
+    # so they are indexed once it's parsed
+    def __init__(self, node):
+        super().__init__(node)
+        index_edges()
 
 
 class FunctionImport(Node):
-    pass
+
+    def __init__(self, node):
+        super().__init__(node)
+        index_edges()
 
 
 class Binary(Node):
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  scheduler.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Orders the emission of a scope's dataflow graph. Before a node is emitted
+# the nodes of it's scope it takes values from (and the ones they take values
+# from...) are sorted topologically and emitted one after another, so an
+# emitted node finds all of it's inputs already emitted and the code
+# generators don't recurse along the chains of nodes. Only the nesting of the
+# scopes (an "if" inside an "if"...) takes recursion.
+#
+# The order is chosen by a policy: a function that gets the node and a
+# function giving a node's inputs (the nodes it needs, not emitted yet) and
+# returns the nodes to emit, inputs before the nodes using them and the node
+# itself last.
+
+from compiler.nodes import Node, Edge
+
+
+# the order the code generators used to pull the values in: an input with
+# everything it needs, then the next one. A value is used soon after it's
+# made, so few temporaries are alive at a time
+def depth_first(node, inputs):
+    order   = []
+    visited = {node.id}
+    stack   = [(node, iter(inputs(node)))]
+
+    while stack:
+        current, pending = stack[-1]
+        for input_ in pending:
+            if not input_.id in visited:
+                visited.add(input_.id)
+                stack.append((input_, iter(inputs(input_))))
+                break
+        else:
+            stack.pop()
+            order.append(current)
+
+    return order
+
+
+# groups the nodes that don't depend on each other: first all the nodes
+# without inputs, then the ones that only need those and so on
+def by_level(node, inputs):
+    order  = depth_first(node, inputs)
+    levels = {}
+
+    for current in order:
+        levels[current.id] = max((levels[input_.id] + 1 for input_ in inputs(current)), default = 0)
+
+    # sorted is stable, the nodes of a level keep the depth first order
+    return sorted(order, key = lambda current: levels[current.id])
+
+
+# depth first, but the input that needs the most temporaries goes first
+# (Sethi-Ullman numbering), it's value is then the only one kept while
+# the other inputs are computed
+def fewest_live(node, inputs):
+    labels = {}
+
+    for current in depth_first(node, inputs):
+        needs = sorted((labels[input_.id] for input_ in inputs(current)), reverse = True)
+        labels[current.id] = max((label + n for n, label in enumerate(needs)), default = 1)
+
+    def by_label(current):
+        return sorted(inputs(current), key = lambda input_: -labels[input_.id])
+
+    return depth_first(node, by_label)
+
+
+POLICIES = {
+    "depth_first" : depth_first,
+    "by_level"    : by_level,
+    "fewest_live" : fewest_live,
+}
+
+
+# policy is None (depth_first), one of the functions above or it's name in POLICIES
+def get_policy(policy):
+    if isinstance(policy, str):
+        if not policy in POLICIES:
+            raise Exception("unknown scheduling policy: %s" % policy)
+        return POLICIES[policy]
+    return policy
+
+
+# the nodes of node's scope that node takes values from, in the order of it's
+# in ports (values from node's parent are the scope's variables and values
+# from node's own nodes belong to the scopes inside it)
+def scope_inputs(node):
+    parent = Node.parents.get(node.id)
+    inputs = []
+
+    for edge in Edge.edges_to.get(node.id, []):
+        if edge.from_ == parent or edge.from_ == node.id or Node.parents.get(edge.from_) == node.id:
+            continue
+        input_ = Node.nodes_[edge.from_]
+        if not input_ in inputs:
+            inputs.append(input_)
+
+    return inputs
+
+
+# the nodes to emit (in order) to emit node, emitted(node) tells which
+# nodes are emitted already, policy is one of the functions above
+def schedule(node, emitted, policy = None):
+    cache = {}
+
+    def inputs(current):
+        if not current.id in cache:
+            cache[current.id] = [input_ for input_ in scope_inputs(current) if not emitted(input_)]
+        return cache[current.id]
+
+    order = (policy or depth_first)(node, inputs)
+
+    # a policy has to give a topological order ending with the node
+    position = {current.id: n for n, current in enumerate(order)}
+    if not order or order[-1] is not node or any(
+            position.get(input_.id, len(order)) >= position[current.id]
+            for current in order for input_ in inputs(current)):
+        raise Exception("scheduling policy %s gave a wrong order for %s"
+                        % (getattr(policy, "__name__", policy), node.id))
+
+    return order
@@ -162,13 +162,13 @@ def make_node(node):
            f'</node>\n'
 
 
-def emit(IR, nodes):
-    global nodemap, json_nodes
-    nodemap = json_nodes
+def emit(context, IR, nodes):
+    global nodemap
+    nodemap = context.json_nodes
 
     graph = ""
     for ir in IR:
-        graph    += make_graph("id", make_node(ir.emit_json(None))) + "\n"
+        graph    += make_graph("id", make_node(ir.emit_json(context, None))) + "\n"
 
     document = make_document(graph)
 
@@ -181,11 +181,11 @@ if __name__ == '__main__':
     import sys
     sys.exit(main(sys.argv))
 
-def export_function_to_graphml(node, parent_node):
+def export_function_to_graphml(context, node, parent_node):
 
-    global nodemap, json_nodes
-    nodemap = json_nodes
+    global nodemap
+    nodemap = context.json_nodes
 
-    graph = make_graph("id", make_node(node.emit_json(None)))
+    graph = make_graph("id", make_node(node.emit_json(context, None)))
 
     return graph
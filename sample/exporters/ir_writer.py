@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  ir_writer.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Writes the JSON IR of a module while it's being exported: every function is
+# exported, written out and dropped before the next one, so the memory used
+# depends on the largest function and not on the whole module.
+# The text is the same json.dumps(dict(functions = [...], declarations = {}),
+# indent = indent) gives, indent = None writes it without any whitespace
+# (with relative locations the functions' "lines" follow the declarations).
+# dialect = "compact" writes the compact dialect (see ir/compact.py).
+
+import json
+
+from ast_.location   import location_to_json
+from exporters.json  import export_functions, module_fields
+
+
+# writes the IR to out: a file (sys.stdout too) or a socket
+def write_ir(context, functions, out, indent = 2, dialect = None):
+    if hasattr(out, "sendall"):
+        write = lambda text: out.sendall(text.encode())
+    else:
+        write = out.write
+
+    for chunk in ir_chunks(context, functions, indent, dialect = dialect):
+        write(chunk)
+
+
+# the IR's text in pieces of about chunk_size characters
+def ir_chunks(context, functions, indent = 2, chunk_size = 1 << 16, dialect = None):
+    buffer = []
+    size   = 0
+
+    for text in ir_text(context, functions, indent, dialect):
+        buffer.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size   = 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+# the IR's text, a piece for every function and the text between them
+def ir_text(context, functions, indent = 2, dialect = None):
+    irs = export_functions(context, functions)
+
+    # the module's fields before and after "functions"
+    head = {}
+    tail = lambda: module_fields(context)
+
+    if dialect == "compact":
+        from ir.compact import Compactor, DIALECT, VERSION
+
+        compactor = Compactor()
+        irs  = (compactor.function(ir) for ir in irs)
+        head = dict(dialect = DIALECT, version = VERSION)
+
+    elif dialect is not None:
+        raise Exception("unknown IR dialect: %s" % dialect)
+
+    if indent is None:
+        encoder = json.JSONEncoder(separators = (",", ":"), default = location_to_json)
+
+        yield "{" + "".join(encoder.encode(key) + ":" + encoder.encode(value) + ","
+                            for key, value in head.items())
+        yield '"functions":['
+        for n, ir in enumerate(irs):
+            if n:
+                yield ","
+            yield encoder.encode(ir)
+        yield "]"
+        for key, value in tail().items():
+            yield "," + encoder.encode(key) + ":" + encoder.encode(value)
+        yield "}"
+        return
+
+    encoder = json.JSONEncoder(indent = indent, default = location_to_json)
+    step    = " " * indent
+    # functions are two levels deep
+    newline = "\n" + step * 2
+
+    # a field of the module
+    def field(key, value):
+        return step + encoder.encode(key) + ": " + encoder.encode(value).replace("\n", "\n" + step)
+
+    yield "{\n" + "".join(field(key, value) + ",\n" for key, value in head.items())
+    yield step + '"functions": ['
+    empty = True
+    for ir in irs:
+        yield newline if empty else "," + newline
+        yield encoder.encode(ir).replace("\n", newline)
+        empty = False
+    yield "]" if empty else "\n" + step + "]"
+    for key, value in tail().items():
+        yield ",\n" + field(key, value)
+    yield "\n}"
@@ -37,8 +37,9 @@ import sys, os
 from ast_.port import *
 from sisal_type.sisal_type import *
 from ast_.node import *
+from ast_.location import span, location_field, set_emit_locations, Location, RELATIVE
+from exporters.symbols import scope_symbols, prepend_params, append_params
 
-json_nodes = {}
 
 
 # ---------------------------------------------------------------------------------------------
@@ -55,23 +56,31 @@ def make_port(index, node_id, type_):
 # ---------------------------------------------------------------------------------------------
 
 
-def check_type_matching(c_src_type, c_dst_type, from_, to):
+# types are compared as canonical type objects (see sisal_type.py), so this is
+# a couple of dict lookups per edge.
+# The exporter doesn't infer all the types yet (comparisons put out integers,
+# literals are always integers), so mismatches are collected in
+# context.type_mismatches instead of stopping the export, and the check only
+# runs when it's asked for (Compilation(check_types = True), sisal_parse.py --check-types)
+def check_type_matching(context, src_type, dst_type, from_, to, parent=False):
 
-    if c_src_type != c_dst_type:
-        src_node = ast_.node.Node.nodes[from_]
-        dst_node = ast_.node.Node.nodes[to]
+    json_nodes = context.json_nodes
 
-        summary = ""
-        if current_scope == to:
-            summary = (
-                "function or scope return type doesn't match the returned value (%s vs. %s)"
-                % (c_src_type["name"], c_dst_type["name"])
-            )
+    c_src_type = canonical_type(src_type)
+    c_dst_type = canonical_type(dst_type)
 
-        raise (
-            Exception(
-                "Type mismatch between %s and %s (%s)"
-                % (src_node.location, dst_node.location, summary)
+    if c_src_type is not c_dst_type:
+        if parent:
+            summary = "scope's output type doesn't match the value (%s vs. %s)"
+        else:
+            summary = "%s vs. %s"
+
+        context.type_mismatches.append(
+            "Type mismatch between %s and %s (%s)"
+            % (
+                json_nodes[from_].get("location", from_),
+                json_nodes[to].get("location", to),
+                summary % (c_src_type, c_dst_type),
             )
         )
 
@@ -84,7 +93,9 @@ def copy_type():
     pass
 
 
-def make_json_edge(from_, to, src_index, dst_index, parent=False, parameter=False):
+def make_json_edge(context, from_, to, src_index, dst_index, parent=False, parameter=False):
+
+    json_nodes = context.json_nodes
 
     if "name" in json_nodes[to] and json_nodes[to]["name"] == "Init":
         if parent == True:
@@ -114,26 +125,24 @@ def make_json_edge(from_, to, src_index, dst_index, parent=False, parameter=Fals
         raise (e)
 
     # check if parameters match:
-    # make copies for comparison (we are going to remove locations)
-    def remove_locations(dict_):
-        for k, v in dict_.items():
-            if k == "location":
-                dict_[k] = ""
-            if type(v) == dict:
-                dict_[k] = remove_locations(v)
-        return dict_
-
-    # ~ c_src_type = remove_locations(copy.deepcopy(src_type))
-    # ~ c_dst_type = remove_locations(copy.deepcopy(dst_type))
-
-    # check_type_matching(c_src_type, c_dst_type, from_, to)
+    if context.check_types:
+        check_type_matching(context, src_type, dst_type, from_, to, parent)
 
     return [
-        {"index": src_index, "nodeId": from_, "type": {"location": "TODO", **src_type}},
-        {"index": dst_index, "nodeId": to, "type": {"location": "TODO", **dst_type}},
+        {"index": src_index, "nodeId": from_, "type": edge_type(src_type)},
+        {"index": dst_index, "nodeId": to, "type": edge_type(dst_type)},
     ]
 
 
+# edges' types always have a location (a "TODO" one if the port's type has none),
+# port's types that start with a location are shared with the edge as they are
+def edge_type(type_):
+    todo = location_field("TODO")
+    if todo and (not type_ or next(iter(type_)) != "location"):
+        return {**todo, **type_}
+    return type_
+
+
 # ---------------------------------------------------------------------------------------------
 
 
@@ -209,14 +218,32 @@ field_sub_table = dict(
 # ---------------------------------------------------------------------------------------------
 
 
-def export_function_to_json(node, parent_node, slot=0, current_scope=None):
+# the first line of the function, kept in context.function_lines
+# (only needed with relative locations)
+def function_line(context, node):
+    location = getattr(node, "location", None)
+    if context.locations != RELATIVE or not isinstance(location, Location):
+        return None
+
+    context.function_lines[node.function_name] = location.row()
+    return context.function_lines[node.function_name]
+
+
+def export_function_to_json(context, node, parent_node, slot=0, current_scope=None):
+
+    json_nodes = context.json_nodes
+    # functions are where the export starts, so the compilation's setting is applied here
+    set_emit_locations(context.locations, function_line(context, node))
 
     current_scope = node.node_id
     ret_val = {}
 
-    for field, value in node.__dict__.items():
+    for field, value in node.fields():
         IR_name = field_sub_table[field] if field in field_sub_table else field
-        ret_val[IR_name] = value
+        if field == "location":
+            ret_val.update(location_field(value))
+        else:
+            ret_val[IR_name] = value
 
     ret_val["params"] = function_gen_params(node) if node.params else None
 
@@ -232,7 +259,7 @@ def export_function_to_json(node, parent_node, slot=0, current_scope=None):
     ret_val["edges"] = []
 
     for n, child in enumerate(node.nodes):
-        json_child = child.emit_json(node.node_id, n, current_scope)
+        json_child = child.emit_json(context, node.node_id, n, current_scope)
 
         ret_val["nodes"].extend(json_child["nodes"])
         ret_val["edges"] += json_child["edges"] + json_child["final_edges"]
@@ -252,15 +279,20 @@ def export_function_to_json(node, parent_node, slot=0, current_scope=None):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_functionimport_to_json(node, parent_node, slot=0, current_scope=None):
+def export_functionimport_to_json(context, node, parent_node, slot=0, current_scope=None):
+
+    set_emit_locations(context.locations, function_line(context, node))
 
     current_scope = node.node_id
     ret_val = {}
 
-    for field, value in node.__dict__.items():
+    for field, value in node.fields():
         IR_name = field_sub_table[field] if field in field_sub_table else field
 
-        ret_val[IR_name] = value
+        if field == "location":
+            ret_val.update(location_field(value))
+        else:
+            ret_val[IR_name] = value
 
     ret_val["params"] = function_gen_params(node) if node.params else None
 
@@ -314,7 +346,9 @@ def copy_ports_and_params(target, src_node, in_ports=True, out_ports=True, param
 
 
 # adds ports and parameters from src_node and changes "nodeId" to target's id
-def add_ports_and_params(target, src_node, in_ports=True, out_ports=True, params=True):
+def add_ports_and_params(
+    context, target, src_node, in_ports=True, out_ports=True, params=True
+):
     def process_block(name, param=False):
 
         if name in src_node:
@@ -326,7 +360,10 @@ def add_ports_and_params(target, src_node, in_ports=True, out_ports=True, params
                     n[1]["index"] = len(target[name])
                 else:
                     n["index"] = len(target[name])
-            target[name] += new_items
+            if param:
+                append_params(context, target, new_items)
+            else:
+                target[name] += new_items
             for i in target[name]:
                 if param:
                     i[1]["nodeId"] = target["id"]
@@ -353,14 +390,16 @@ def create_out_ports_for_condition_node(number, node_id):
 # ---------------------------------------------------------------------------------------------
 
 
-def generate_conditions(ret_val, node, parent_node, slot, current_scope):
+def generate_conditions(context, ret_val, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     ret_val["condition"] = {}
     condition = ret_val["condition"]
     condition["id"] = node.conditions["id"]
     json_nodes[condition["id"]] = condition
 
-    condition["location"] = "not applicable"
+    condition.update(location_field("not applicable"))
     condition["name"] = "Condition"
 
     copy_ports_and_params(condition, json_nodes[current_scope])
@@ -372,7 +411,7 @@ def generate_conditions(ret_val, node, parent_node, slot, current_scope):
     condition["nodes"] = []
 
     for port, cond in enumerate(node.conditions["nodes"]):
-        subnodes = cond.emit_json(condition["id"], port, condition["id"])
+        subnodes = cond.emit_json(context, condition["id"], port, condition["id"])
         nodes = subnodes["nodes"]
         edges = subnodes["edges"] + subnodes["final_edges"]
         condition["nodes"].extend(nodes)
@@ -382,7 +421,9 @@ def generate_conditions(ret_val, node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def generate_branches(ret_val, node, parent_node, slot, current_scope):
+def generate_branches(context, ret_val, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     ret_val["branches"] = []
     branches_list = []
@@ -405,7 +446,7 @@ def generate_branches(ret_val, node, parent_node, slot, current_scope):
 
         new_branch = dict(
             name=branch["name"],
-            location="",
+            **location_field(""),
             outPorts=[],
             inPorts=[],
             id=id_,
@@ -419,13 +460,14 @@ def generate_branches(ret_val, node, parent_node, slot, current_scope):
         # get the start location of first node and the end location of last node and construct a
         # "location" for this branch
 
-        location = ("|".join([br.location for br in branch["nodes"]])).split("-")
-        new_branch["location"] = location[0] + "-" + location[-1]
+        if "location" in new_branch:
+            nodes = branch["nodes"]
+            new_branch.update(location_field(span(nodes[0].location, nodes[-1].location) if nodes else "-"))
 
         json_nodes[id_] = new_branch
 
         for port, child_node in enumerate(branch["nodes"]):
-            nodes_and_edges = child_node.emit_json(id_, port, id_)
+            nodes_and_edges = child_node.emit_json(context, id_, port, id_)
             nodes = nodes_and_edges["nodes"]
             edges = nodes_and_edges["edges"] + nodes_and_edges["final_edges"]
             new_branch["nodes"].extend(nodes)
@@ -437,12 +479,14 @@ def generate_branches(ret_val, node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_if_to_json(node, parent_node, slot, current_scope):
+def export_if_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     ret_val = {}
 
     ret_val["name"] = "If"
-    ret_val["location"] = node.location
+    ret_val.update(location_field(node.location))
     ret_val["id"] = node.node_id
     ret_val["edges"] = []
     ret_val["nodes"] = []
@@ -453,10 +497,10 @@ def export_if_to_json(node, parent_node, slot, current_scope):
     json_nodes[node.node_id] = ret_val
 
     json_branches = []
-    generate_conditions(ret_val, node, node.node_id, slot, current_scope)
-    generate_branches(ret_val, node, node.node_id, slot, current_scope)
+    generate_conditions(context, ret_val, node, node.node_id, slot, current_scope)
+    generate_branches(context, ret_val, node, node.node_id, slot, current_scope)
 
-    final_edge = make_json_edge(node.node_id, parent_node, 0, slot)
+    final_edge = make_json_edge(context, node.node_id, parent_node, 0, slot)
 
     return dict(nodes=[ret_val], edges=[], final_edges=[final_edge])
 
@@ -464,11 +508,13 @@ def export_if_to_json(node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_call_to_json(node, parent_node, slot, current_scope):
+def export_call_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     function_name = node.function_name.name
 
-    if not function_name in ast_.node.Function.functions:
+    if not function_name in context.functions:
         raise Exception(
             "Function '%s' referenced to at %s not found"
             % (function_name, node.location)
@@ -476,11 +522,11 @@ def export_call_to_json(node, parent_node, slot, current_scope):
 
     ret_val = {}
 
-    for field, value in node.__dict__.items():
+    for field, value in node.fields():
         IR_name = field_sub_table[field] if field in field_sub_table else field
         ret_val[IR_name] = value
 
-    called_function = ast_.node.Function.functions[function_name]
+    called_function = context.functions[function_name]
 
     ret_val = dict(
         inPorts=function_gen_in_ports(called_function, node.node_id),
@@ -491,7 +537,7 @@ def export_call_to_json(node, parent_node, slot, current_scope):
         dict(
             id=node.node_id,
             callee=function_name,
-            location=node.location,
+            **location_field(node.location),
             name="FunctionCall",
             params=function_gen_params(called_function),
         )
@@ -503,14 +549,14 @@ def export_call_to_json(node, parent_node, slot, current_scope):
     args_edges = []
 
     for i, arg in enumerate(node.args):
-        children = arg.emit_json(node.node_id, 0, current_scope)
+        children = arg.emit_json(context, node.node_id, 0, current_scope)
         args_nodes.extend(children["nodes"])
         args_edges.extend(children["edges"] + children["final_edges"])
 
     json_nodes[node.node_id].update(ret_val)
 
     final_edge = make_json_edge(
-        node.node_id, parent_node, 0, slot, parent=(parent_node == current_scope)
+        context, node.node_id, parent_node, 0, slot, parent=(parent_node == current_scope)
     )
     return dict(
         nodes=[ret_val] + args_nodes, edges=args_edges, final_edges=[final_edge]
@@ -520,7 +566,9 @@ def export_call_to_json(node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_builtincall_to_json(node, parent_node, slot, current_scope):
+def export_builtincall_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     function_name = node.function_name
 
@@ -529,7 +577,7 @@ def export_builtincall_to_json(node, parent_node, slot, current_scope):
 
     ret_val = {}
 
-    for field, value in node.__dict__.items():
+    for field, value in node.fields():
         IR_name = field_sub_table[field] if field in field_sub_table else field
         ret_val[IR_name] = value
 
@@ -555,7 +603,7 @@ def export_builtincall_to_json(node, parent_node, slot, current_scope):
         params=params,
         id=node.node_id,
         callee=function_name,
-        location=node.location,
+        **location_field(node.location),
         name="BuiltInFunctionCall",
     )
 
@@ -565,14 +613,14 @@ def export_builtincall_to_json(node, parent_node, slot, current_scope):
     args_edges = []
 
     for i, arg in enumerate(node.args):
-        children = arg.emit_json(node.node_id, 0, current_scope)
+        children = arg.emit_json(context, node.node_id, 0, current_scope)
         args_nodes.extend(children["nodes"])
         args_edges.extend(children["edges"] + children["final_edges"])
 
     json_nodes[node.node_id].update(ret_val)
 
     final_edge = make_json_edge(
-        node.node_id, parent_node, 0, slot, parent=(parent_node == current_scope)
+        context, node.node_id, parent_node, 0, slot, parent=(parent_node == current_scope)
     )
     return dict(
         nodes=[ret_val] + args_nodes, edges=args_edges, final_edges=[final_edge]
@@ -592,7 +640,7 @@ def gen_ports(ins, outs, node_id):
             dict(
                 index=n,
                 nodeId=node_id,
-                type={"location": "not applicable", "name": inPort},
+                type={**location_field("not applicable"), "name": inPort},
             )
         )
 
@@ -601,7 +649,7 @@ def gen_ports(ins, outs, node_id):
             dict(
                 index=n,
                 nodeId=node_id,
-                type={"location": "not applicable", "name": outPort},
+                type={**location_field("not applicable"), "name": outPort},
             )
         )
 
@@ -655,19 +703,21 @@ def setup_binarys_ports(binary, left, right):
 # ---------------------------------------------------------------------------------------------
 
 # TODO make it return used variables (put them into the scope?)
-def export_algebraic_to_json(node, parent_node, slot, current_scope):
+def export_algebraic_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     return_nodes = []
     return_edges = []
-    exp = node.expression
 
-    # recursively splits the algebraic expression until we have a few nodes connected with edges
+    # walks the tree of operations built by the parser (Algebraic.tree),
+    # operations are [left, Bin, right] lists
 
     def get_nodes(chunk):
 
         # if only an operand left:
-        if len(chunk) == 1:
-            operand = chunk[0]
+        if type(chunk) != list:
+            operand = chunk
 
             # return parent node's (?) node_id
             if type(operand) == ast_.node.Identifier:
@@ -676,52 +726,33 @@ def export_algebraic_to_json(node, parent_node, slot, current_scope):
                 name = operand.name
 
                 # find the argument with identifier's name in scope's paramaeters:
-                identifier_slot = -1
-                for n, p in enumerate(json_nodes[current_scope]["params"]):
-                    var_name, var_type = p
-                    if var_name == name:
-                        identifier_slot = n
-                        type_ = var_type["type"]  # ["name"]
-                        break
+                symbol = scope_symbols(context, current_scope).find(name)
                 # if we haven't found it, raise an exception:
-                if identifier_slot == -1:
+                if symbol is None:
                     raise Exception(
                         "value {} ({}) not found in current scope".format(
                             name, operand.location
                         )
                     )
+                identifier_slot, type_ = symbol
 
                 return dict(
                     id=current_scope, slot=identifier_slot, type=type_, parameter=True
                 )
             else:
 
-                nodes = operand.emit_json(current_scope, 0, current_scope)
+                nodes = operand.emit_json(context, current_scope, 0, current_scope)
                 return_nodes.extend(nodes["nodes"])
                 return_edges.extend(nodes["edges"])
                 output_id = nodes["final_edges"][0][0]["nodeId"]
                 type_ = nodes["nodes"][0]["outPorts"][0]["type"]  # ["name"]
                 return dict(id=output_id, slot=0, type=type_, parameter=False)
 
-        # if we still have some splitting to do:
+        # an operation:
         else:
-            low_p = ["+", "-", ">", ">=", "<="]
-            high_p = ["*", "/", "//"]
-            # find low priority operation first
+            left, operator, right = chunk
 
-            split_point = 1
-
-            for n, op in enumerate(chunk):
-                if "operator" in op.__dict__ and op.operator in low_p:
-                    split_point = n
-                    break
-
-            operator = chunk[split_point]
-
-            left = chunk[:split_point]
-            right = chunk[split_point + 1 :]
-
-            op_json = operator.emit_json(parent_node, 0, current_scope)["nodes"]
+            op_json = operator.emit_json(context, parent_node, 0, current_scope)["nodes"]
             return_nodes.extend(op_json)
 
             left_node = get_nodes(left)
@@ -731,6 +762,7 @@ def export_algebraic_to_json(node, parent_node, slot, current_scope):
 
             return_edges.append(
                 make_json_edge(
+                    context,
                     left_node["id"],
                     operator.node_id,
                     left_node["slot"],
@@ -741,6 +773,7 @@ def export_algebraic_to_json(node, parent_node, slot, current_scope):
 
             return_edges.append(
                 make_json_edge(
+                    context,
                     right_node["id"],
                     operator.node_id,
                     right_node["slot"],
@@ -754,10 +787,10 @@ def export_algebraic_to_json(node, parent_node, slot, current_scope):
             return dict(id=operator.node_id, slot=0, type=type_, parameter=False)
 
     # the node that puts out result of this algebraic expression:
-    final_node = get_nodes(exp)["id"]
+    final_node = get_nodes(node.tree)["id"]
     # Here we check if target node is the scope, this determines wether we target our output edge at "in" or "out" port
     final_edge = make_json_edge(
-        final_node, parent_node, 0, slot, parent=(parent_node == current_scope)
+        context, final_node, parent_node, 0, slot, parent=(parent_node == current_scope)
     )
 
     # TODO is this necessary?
@@ -770,22 +803,26 @@ def export_algebraic_to_json(node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_identifier_to_json(node, parent_node, slot, current_scope):
+def export_identifier_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     parent = json_nodes[parent_node]
-    scope = json_nodes[current_scope]
-    final_edge = {}
-    # print (scope["params"])
-    for n, (name, arg) in enumerate(scope["params"]):
-        if name == node.name:
-            edge = make_json_edge(
-                current_scope,
-                parent["id"],
-                n,
-                slot,
-                parameter=True,
-                parent=(current_scope == parent_node),
-            )
+    symbol = scope_symbols(context, current_scope).find(node.name)
+    if symbol is None:
+        raise Exception(
+            "Identifier %s not found in this scope!(%s)" % (node.name, node.location)
+        )
+
+    edge = make_json_edge(
+        context,
+        current_scope,
+        parent["id"],
+        symbol[0],
+        slot,
+        parameter=True,
+        parent=(current_scope == parent_node),
+    )
 
     return dict(nodes=[], edges=[], final_edges=[edge])
 
@@ -793,17 +830,19 @@ def export_identifier_to_json(node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_literal_to_json(node, parent_node, slot, current_scope):
+def export_literal_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     ret_val = dict(
         id=node.node_id,
-        location=node.location,
+        **location_field(node.location),
         inPorts=[],
         outPorts=[
             make_port(
                 0,
                 node.node_id,
-                node.type if "type" in node.__dict__
+                node.type if hasattr(node, "type")
                 # provides default IntegerType if type wasn't provided:
                 else IntegerType(),
             )
@@ -814,7 +853,7 @@ def export_literal_to_json(node, parent_node, slot, current_scope):
 
     json_nodes[node.node_id] = ret_val
     final_edge = make_json_edge(
-        node.node_id, parent_node, 0, slot, parent=(parent_node == current_scope)
+        context, node.node_id, parent_node, 0, slot, parent=(parent_node == current_scope)
     )
     return dict(nodes=[ret_val], edges=[], final_edges=[final_edge])
 
@@ -822,13 +861,15 @@ def export_literal_to_json(node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_bin_to_json(node, parent_node, slot, current_scope):
+def export_bin_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     ret_val = dict(
         id=node.node_id,
         name="Binary",
         operator=node.operator,
-        location=node.location,
+        **location_field(node.location),
     )
     json_nodes[node.node_id] = ret_val
 
@@ -838,9 +879,11 @@ def export_bin_to_json(node, parent_node, slot, current_scope):
 # ---------------------------------------------------------------------------------------------
 
 
-def export_arrayaccess_to_json(node, parent_node, slot, current_scope):
+def export_arrayaccess_to_json(context, node, parent_node, slot, current_scope):
     # TODO check with array's definition if types and dimensions match
 
+    json_nodes = context.json_nodes
+
     # need to get array's type:
     params = json_nodes[current_scope]["params"]
     scope_node = json_nodes[current_scope]
@@ -852,136 +895,137 @@ def export_arrayaccess_to_json(node, parent_node, slot, current_scope):
         )
 
     # find this array in scope's parameters:
-    for array_index_in_params, p in enumerate(params):
-        var_name, var_desc = p
-        # params go in pairs["name", {description}], so p[0] is the name
-        # and we compare it with name of arrray requested:
-        if var_name == node.name:
-
-            # need to lower dimensions of the array in "type" according to node's index:
-            # i.e. array of array of integer -> array of integer
-            # array_index is a number (beginning from zero) of a "[ index ]" block in "A[][index][]...[]"
-
-            # check if array's measurements correspond to what we request in here:
-            if (
-                "inline_indices" in node.__dict__
-            ):  # means it's the first ArrayAccess node
-                # number of [...] in the expression:
-                access_length = len(node.inline_indices)
-                defined_type = var_desc["type"]
-                # check if there is enough dimensions in array's definition for the ammount of definitions we use
-                # in our ArrayAccess:
-                try:
-                    for i in range(access_length):
-                        defined_type = (
-                            defined_type["element"]
-                            if "element" in defined_type
-                            else defined_type["type"]
-                        )
-                except:
-                    raise Exception(
-                        "Array's (%s, %s) defined dimensions are smaller than ArrayAccess' dimensions (%s)."
-                        % (var_name, scope_node["location"], node.location)
-                    )
-
-            # strip "array of"s according to current dimension:
-            type_ = var_desc["type"]
-            for i in range(node.array_index):
-                type_ = type_["element"]
-
-            # form our dict that we will turn into json
-            json_node = dict(
-                name="ArrayAccess",
-                location=node.location,
-                # TODO replace with make_port:
-                inPorts=[
-                    dict(nodeId=node.node_id, type=type_, index=0),
-                    dict(
-                        nodeId=node.node_id,
-                        type=dict(location="not applicable", name="integer"),
-                        index=1,
-                    ),
-                ],
-                outPorts=[dict(nodeId=node.node_id, type=type_["element"], index=0)],
-                id=node.node_id,
+    symbol = scope_symbols(context, current_scope).find(node.name)
+    # if we didn't find it, raise an exception:
+    if symbol is None:
+        raise Exception(
+            "Array %s not found in this scope!(%s)" % (node.name, node.location)
+        )
+    array_index_in_params, array_type = symbol
+    var_name = node.name
+
+    # need to lower dimensions of the array in "type" according to node's index:
+    # i.e. array of array of integer -> array of integer
+    # array_index is a number (beginning from zero) of a "[ index ]" block in "A[][index][]...[]"
+
+    # check if array's measurements correspond to what we request in here:
+    if (
+        hasattr(node, "inline_indices")
+    ):  # means it's the first ArrayAccess node
+        # number of [...] in the expression:
+        access_length = len(node.inline_indices)
+        defined_type = array_type
+        # check if there is enough dimensions in array's definition for the ammount of definitions we use
+        # in our ArrayAccess:
+        try:
+            for i in range(access_length):
+                defined_type = (
+                    defined_type["element"]
+                    if "element" in defined_type
+                    else defined_type["type"]
+                )
+        except:
+            raise Exception(
+                "Array's (%s, %s) defined dimensions are smaller than ArrayAccess' dimensions (%s)."
+                % (var_name, scope_node.get("location"), node.location)
             )
 
-            json_nodes[node.node_id] = json_node
+    # strip "array of"s according to current dimension:
+    type_ = array_type
+    for i in range(node.array_index):
+        type_ = type_["element"]
+
+    # form our dict that we will turn into json
+    json_node = dict(
+        name="ArrayAccess",
+        **location_field(node.location),
+        # TODO replace with make_port:
+        inPorts=[
+            dict(nodeId=node.node_id, type=type_, index=0),
+            dict(
+                nodeId=node.node_id,
+                type=dict(**location_field("not applicable"), name="integer"),
+                index=1,
+            ),
+        ],
+        outPorts=[dict(nodeId=node.node_id, type=type_["element"], index=0)],
+        id=node.node_id,
+    )
 
-            index_nodes = node.index.emit_json(node.node_id, 1, current_scope)
+    json_nodes[node.node_id] = json_node
 
-            # we create final edge aimed at scope node only when it's a terminal (the final dimension's) ArrayAccess-node
-            # i.e A[][][][*this one*]
-            if not node.subarray:
-                final_edges = [
-                    make_json_edge(node.node_id, current_scope, 0, slot, True)
-                ]
-                array_input_edge = make_json_edge(
-                    parent_node,
-                    node.node_id,
-                    array_index_in_params,
-                    0,
-                    False,
-                    parameter=True,
-                )
-            else:
-                final_edges = []
-                array_input_edge = make_json_edge(
-                    parent_node,
-                    node.node_id,
-                    array_index_in_params,
-                    0,
-                    False,
-                    parameter=True,
-                )
+    index_nodes = node.index.emit_json(context, node.node_id, 1, current_scope)
 
-            # generate the rest of ArrayAccess's and connect them with edges:
-            sub_nodes = []
-            sub_edges = []
-
-            if node.subarray:
-                subarray = node.subarray.emit_json(node.node_id, slot, current_scope)
-                sub_nodes = subarray["nodes"]
-                sub_edges = subarray["edges"] + subarray["final_edges"]
-
-            return dict(
-                nodes=[json_node] + index_nodes["nodes"] + sub_nodes,
-                edges=index_nodes["edges"]
-                + [array_input_edge]
-                + index_nodes["final_edges"]
-                + sub_edges,
-                final_edges=final_edges,
-            )
+    # we create final edge aimed at scope node only when it's a terminal (the final dimension's) ArrayAccess-node
+    # i.e A[][][][*this one*]
+    if not node.subarray:
+        final_edges = [
+            make_json_edge(context, node.node_id, current_scope, 0, slot, True)
+        ]
+        array_input_edge = make_json_edge(
+            context,
+            parent_node,
+            node.node_id,
+            array_index_in_params,
+            0,
+            False,
+            parameter=True,
+        )
+    else:
+        final_edges = []
+        array_input_edge = make_json_edge(
+            context,
+            parent_node,
+            node.node_id,
+            array_index_in_params,
+            0,
+            False,
+            parameter=True,
+        )
 
-    # if we didn't find it, raise an exception:
-    raise Exception(
-        "Array %s not found in this scope!(%s)" % (node.name, node.location)
+    # generate the rest of ArrayAccess's and connect them with edges:
+    sub_nodes = []
+    sub_edges = []
+
+    if node.subarray:
+        subarray = node.subarray.emit_json(context, node.node_id, slot, current_scope)
+        sub_nodes = subarray["nodes"]
+        sub_edges = subarray["edges"] + subarray["final_edges"]
+
+    return dict(
+        nodes=[json_node] + index_nodes["nodes"] + sub_nodes,
+        edges=index_nodes["edges"]
+        + [array_input_edge]
+        + index_nodes["final_edges"]
+        + sub_edges,
+        final_edges=final_edges,
     )
 
 
-def pull_value_from_scope(name, current_scope, location):
-    params = json_nodes[current_scope]["params"]
-    for array_index_in_params, p in enumerate(params):
-        var_name, var_desc = p
-        if var_name == name.name:
-            return dict(
-                name=var_name, type=var_desc["type"], index=array_index_in_params
-            )
+def pull_value_from_scope(context, name, current_scope, location):
+    json_nodes = context.json_nodes
+
+    symbol = scope_symbols(context, current_scope).find(name.name)
+    if symbol is not None:
+        index, type_ = symbol
+        return dict(name=name.name, type=type_, index=index)
 
     raise Exception("Identifier %s not found in this scope!(%s)" % (name, location))
 
 
 # we find the appropriate in-port by the identifier and connect it to old_value's only input
-def export_oldvalue_to_json(node, parent_node, slot, current_scope):
+def export_oldvalue_to_json(context, node, parent_node, slot, current_scope):
 
-    param = pull_value_from_scope(node.name, current_scope, node.location)
+    json_nodes = context.json_nodes
+
+    param = pull_value_from_scope(context, node.name, current_scope, node.location)
 
     retval = dict(
         outPorts=[make_port(0, node.node_id, param["type"])],
         inPorts=[make_port(0, node.node_id, param["type"])],
         id=node.node_id,
         name="OldValue",
-        location=node.location,
+        **location_field(node.location),
     )
 
     json_nodes[node.node_id] = retval
@@ -991,7 +1035,7 @@ def export_oldvalue_to_json(node, parent_node, slot, current_scope):
         edges=[],
         final_edges=[
             make_json_edge(
-                current_scope, node.node_id, param["index"], 0, parameter=True
+                context, current_scope, node.node_id, param["index"], 0, parameter=True
             )
         ],
     )
@@ -1007,16 +1051,18 @@ def export_oldvalue_to_json(node, parent_node, slot, current_scope):
 
 
 # TODO register new variables in the scope
-def export_assignment_to_json(node, parent_node, slot, current_scope):
+def export_assignment_to_json(context, node, parent_node, slot, current_scope):
 
-    value_ast = node.value.emit_json(parent_node, slot, current_scope)
+    value_ast = node.value.emit_json(context, parent_node, slot, current_scope)
 
     # TODO get type from what you get in value:
 
     return value_ast
 
 
-def create_body_for_let(node, retval, parent_node, slot, current_scope):
+def create_body_for_let(context, node, retval, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     params = []
     # TODO put it in separate function for let and loop test
@@ -1043,17 +1089,19 @@ def create_body_for_let(node, retval, parent_node, slot, current_scope):
             make_port(i, node.body_id, output_types[i]) for i in range(num_outputs)
         ],
         name="Body",
-        location=node.location,
+        **location_field(node.location),
     )
 
     json_nodes[node.body_id] = retval["body"]
-    internals = node.body[0].emit_json(node.body_id, 0, node.body_id)
+    internals = node.body[0].emit_json(context, node.body_id, 0, node.body_id)
     # ~ print (internals["nodes"])
     retval["body"]["nodes"] = internals["nodes"]
     retval["body"]["edges"] = internals["edges"] + internals["final_edges"]
 
 
-def export_let_to_json(node, parent_node, slot, current_scope):
+def export_let_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     init = {}
     body = {}
@@ -1061,7 +1109,7 @@ def export_let_to_json(node, parent_node, slot, current_scope):
 
     ret_val = dict(
         name="Let",
-        location=node.location,
+        **location_field(node.location),
         init=init,
         body=body,
         nodes=[],
@@ -1076,23 +1124,23 @@ def export_let_to_json(node, parent_node, slot, current_scope):
 
     copy_ports_and_params(ret_val, json_nodes[parent_node])  # , out_ports=False)
 
-    create_init(node, ret_val, parent_node, slot, current_scope=node.node_id)
-    create_body_for_let(node, ret_val, parent_node, slot, current_scope=node.node_id)
+    create_init(context, node, ret_val, parent_node, slot, current_scope=node.node_id)
+    create_body_for_let(context, node, ret_val, parent_node, slot, current_scope=node.node_id)
 
-    final_edge = make_json_edge(node.node_id, current_scope, 0, 0, parent=True)
+    final_edge = make_json_edge(context, node.node_id, current_scope, 0, 0, parent=True)
 
     return dict(nodes=[ret_val], edges=[], final_edges=[final_edge])
 
 
 # ---------------------------------------------------------------------------------------------
 # used only for loops
-def create_parameter_definition(name, type_, node_id):
+def create_parameter_definition(context, name, type_, node_id):
+    json_nodes = context.json_nodes
+
     node = json_nodes[node_id]
     index = 0
-    for p in node["params"]:
-        p[1]["index"] += 1
-    node["params"].insert(
-        0, [name, emit_type_object(node_id, type_, index, "not applicable")]
+    prepend_params(
+        context, node, [[name, emit_type_object(node_id, type_, index, "not applicable")]]
     )
 
 
@@ -1199,7 +1247,9 @@ def create_parameter_definition(name, type_, node_id):
 # instead, they are placed in preCondition, body and reduction BEFORE function's arguments
 
 
-def create_init(node, retval, parent_node, slot, current_scope):
+def create_init(context, node, retval, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     nodes = []
     edges = []
@@ -1216,7 +1266,11 @@ def create_init(node, retval, parent_node, slot, current_scope):
     }
 
     add_ports_and_params(
-        json_nodes[node_id], json_nodes[current_scope], out_ports=False, params=True
+        context,
+        json_nodes[node_id],
+        json_nodes[current_scope],
+        out_ports=False,
+        params=True,
     )
 
     for n, i in enumerate(node.init):
@@ -1230,13 +1284,13 @@ def create_init(node, retval, parent_node, slot, current_scope):
             ],
         )
 
-        init_ast = i.emit_json(node_id, n, node_id)
+        init_ast = i.emit_json(context, node_id, n, node_id)
         nodes.extend(init_ast["nodes"])
         edges.extend(init_ast["edges"] + init_ast["final_edges"])
 
     json_nodes[node_id].update(
         dict(
-            location="not applicable",
+            **location_field("not applicable"),
             edges=edges,
             nodes=nodes,
             # ~ location = no
@@ -1247,7 +1301,9 @@ def create_init(node, retval, parent_node, slot, current_scope):
     retval["init"] = json_nodes[node_id]
 
 
-def export_reduction_to_json(node, parent_node, slot, current_scope):
+def export_reduction_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     if node.type == "array":
         # get the output array's element type:
@@ -1273,7 +1329,7 @@ def export_reduction_to_json(node, parent_node, slot, current_scope):
     retval = dict(
         name="Reduction",
         operator=node.type,
-        location=node.location,
+        **location_field(node.location),
         outPorts=out_ports,
         inPorts=in_ports,
         id=node.node_id,
@@ -1296,7 +1352,7 @@ def export_reduction_to_json(node, parent_node, slot, current_scope):
 
     json_nodes[node.node_id] = retval
 
-    of_what_ast = node.of_what[0].emit_json(node.node_id, 2, current_scope)
+    of_what_ast = node.of_what[0].emit_json(context, node.node_id, 2, current_scope)
     # get the type from the edge of the node that puts out the value of reduction expression
     # we then copy it to in_ports[1] so all the types match
     edge = of_what_ast["final_edges"][0]
@@ -1305,12 +1361,15 @@ def export_reduction_to_json(node, parent_node, slot, current_scope):
     retval["inPorts"][2]["type"] = type_
     retval["params"][2][1]["type"] = type_
 
-    when_ast = node.when.emit_json(node.node_id, 0, current_scope)
+    when_ast = node.when.emit_json(context, node.node_id, 0, current_scope)
 
-    one = ast_.node.Literal(value=1, type=IntegerType(), location="N/A")
-    one_ast = one.emit_json(node.node_id, 1, current_scope)
+    one = ast_.node.Literal(
+        node_id=node.one_id, no_id=True, value=1, type=IntegerType(), location="N/A"
+    )
+    context.nodes[one.node_id] = one
+    one_ast = one.emit_json(context, node.node_id, 1, current_scope)
 
-    final_edge = make_json_edge(node.node_id, parent_node, 0, slot, parent=True)
+    final_edge = make_json_edge(context, node.node_id, parent_node, 0, slot, parent=True)
 
     return dict(
         nodes=[retval] + of_what_ast["nodes"] + when_ast["nodes"] + one_ast["nodes"],
@@ -1325,24 +1384,31 @@ def export_reduction_to_json(node, parent_node, slot, current_scope):
 
 
 # will copy newly defined variables from node's results to dst's in_ports and params:
-def turn_results_into_in_ports_and_params(src, dst):
-    for i, res in enumerate(src["results"]):
-        dst["inPorts"].insert(i, make_port(i, dst["id"], res[1]["type"]))
-        for p in dst["params"]:
-            p[1]["type"]["index"] += 1
-        dst["params"].insert(
-            i, [res[0], {"type": res[1]["type"], "location": "N/A", "index": i}]
-        )
+def turn_results_into_in_ports_and_params(context, src, dst):
+    results = src["results"]
+    dst["inPorts"][0:0] = [
+        make_port(i, dst["id"], res[1]["type"]) for i, res in enumerate(results)
+    ]
+    prepend_params(
+        context,
+        dst,
+        [
+            [res[0], {"type": res[1]["type"], **location_field("N/A"), "index": i}]
+            for i, res in enumerate(results)
+        ],
+    )
 
 
 # this is different "returns"! (it's an IR-returns node
-def create_returns_for_loop(node, retval, parent_node, slot, current_scope):
+def create_returns_for_loop(context, node, retval, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     ret_id = node.returns_id
 
     ret = {
         "name": "Returns",
-        "location": node.location,
+        **location_field(node.location),
         # added later in reduction
         # ~ "outPorts": [make_port(0, ret_id, ArrayType(IntegerType()))],
         "inPorts": [],
@@ -1374,27 +1440,27 @@ def create_returns_for_loop(node, retval, parent_node, slot, current_scope):
     # register the "returns" node:
     json_nodes[ret_id] = ret
 
-    turn_results_into_in_ports_and_params(retval["range"], ret)
+    turn_results_into_in_ports_and_params(context, retval["range"], ret)
 
     # copy parameters and ports from the scope:
-    add_ports_and_params(ret, json_nodes[current_scope], out_ports=False)
+    add_ports_and_params(context, ret, json_nodes[current_scope], out_ports=False)
 
     # ~ "what", "of_what", "when"
-    reduction_ast = node.returns.emit_json(node.returns_id, 0, node.returns_id)
+    reduction_ast = node.returns.emit_json(context, node.returns_id, 0, node.returns_id)
     ret["nodes"].extend(reduction_ast["nodes"])
     ret["edges"].extend(reduction_ast["edges"] + reduction_ast["final_edges"])
 
     retval["reduction"] = ret
 
 
-def export_scatter_to_json(node, parent_node, slot, current_scope):
+def export_scatter_to_json(context, node, parent_node, slot, current_scope):
+    json_nodes = context.json_nodes
+
     var_name = node.what.name
     iterable_name = node.in_what.name  # TODO it's not always an identifier
     # find iterated variable among function's parameters
     try:
-        input_type = next(
-            filter(lambda x: x[0] == iterable_name, json_nodes[current_scope]["params"])
-        )[1]["type"]
+        index, input_type = scope_symbols(context, current_scope).find(iterable_name)
         type_ = input_type["element"]
     except Exception as a:
         raise Exception(
@@ -1422,9 +1488,9 @@ def export_scatter_to_json(node, parent_node, slot, current_scope):
 
     json_nodes[node.node_id] = retval
 
-    iterated_ast = node.in_what.emit_json(node.node_id, 0, current_scope)
+    iterated_ast = node.in_what.emit_json(context, node.node_id, 0, current_scope)
 
-    output_edge = make_json_edge(node.node_id, parent_node, 0, 0, parent=True)
+    output_edge = make_json_edge(context, node.node_id, parent_node, 0, 0, parent=True)
 
     return dict(
         nodes=[retval] + iterated_ast["nodes"],
@@ -1439,40 +1505,44 @@ def extend_graph(node, subgraph):
     node["edges"].extend(subgraph["final_edges"])
 
 
-def create_range_for_loop(node, retval, parent_node, slot, current_scope):
+def create_range_for_loop(context, node, retval, parent_node, slot, current_scope):
+    json_nodes = context.json_nodes
+
     retval["range"] = dict(name="RangeGen", id=node.range_id, nodes=[], edges=[])
     copy_ports_and_params(retval["range"], json_nodes[current_scope], out_ports=False)
 
     json_nodes[node.range_id] = retval["range"]
 
-    range_ast = node.range.emit_json(node.range_id, 0, node.range_id)
+    range_ast = node.range.emit_json(context, node.range_id, 0, node.range_id)
     extend_graph(retval["range"], range_ast)
 
 
-def export_loop_to_json(node, parent_node, slot, current_scope):
+def export_loop_to_json(context, node, parent_node, slot, current_scope):
+
+    json_nodes = context.json_nodes
 
     retval = dict(
         name="LoopExpression",
         id=node.node_id,
         nodes=[],  # \
         edges=[],  # / both empty
-        location=node.location,
+        **location_field(node.location),
     )
 
     copy_ports_and_params(retval, json_nodes[current_scope], out_ports=False)
     json_nodes[node.node_id] = retval
     if node.init:
-        create_init(node, retval, parent_node, slot, node.node_id)
+        create_init(context, node, retval, parent_node, slot, node.node_id)
     if node.range:
-        create_range_for_loop(node, retval, parent_node, slot, node.node_id)
+        create_range_for_loop(context, node, retval, parent_node, slot, node.node_id)
     # ~ create_test_for_loop(node, retval, parent_node, slot, current_scope)
     # ~ create_body_for_loop(node, retval, parent_node, slot, current_scope)
-    create_returns_for_loop(node, retval, parent_node, slot, node.node_id)
+    create_returns_for_loop(context, node, retval, parent_node, slot, node.node_id)
 
     in_edges = []
     # make edges that connect the scope to this node
     for n, param in enumerate(json_nodes[parent_node]["params"]):
-        in_edges.append(make_json_edge(parent_node, node.node_id, n, n, parameter=True))
+        in_edges.append(make_json_edge(context, parent_node, node.node_id, n, n, parameter=True))
 
     out_edges = []
 
@@ -1483,11 +1553,38 @@ def export_loop_to_json(node, parent_node, slot, current_scope):
 
     for n, output in enumerate(retval["outPorts"]):
         out_edges.append(
-            make_json_edge(node.node_id, parent_node, n, slot, parent=True)
+            make_json_edge(context, node.node_id, parent_node, n, slot, parent=True)
         )
 
     return dict(nodes=[retval], edges=in_edges, final_edges=out_edges)
 
 # implemented via Algebraic
-def export_equation_to_json(node, parent_node, slot, current_scope):
+def export_equation_to_json(context, node, parent_node, slot, current_scope):
     return dict(nodes=[], edges=[], final_edges=[])
+
+
+# yields the IR of the functions one by one, the exporter's state of a function
+# is dropped before the next one is exported (nodes of other functions are never
+# looked up), so if the caller doesn't keep the IRs only one of them is in memory
+def export_functions(context, functions):
+    for function in functions:
+        yield function.emit_json(context, None)
+        context.json_nodes.clear()
+        context.symbols.clear()
+
+
+# the module's fields written after the functions
+# (the functions' first lines are known once they are exported)
+def module_fields(context):
+    fields = dict(declarations = {})
+    if context.locations == RELATIVE:
+        fields["lines"] = dict(context.function_lines)
+    return fields
+
+
+# builds an IRStore (ir/store.py) of the module: functions are exported one
+# by one and added to the store, so the dicts of only one function exist at a time
+def export_module_to_store(context, functions):
+    from ir.store import IRStore
+
+    return IRStore.from_functions(export_functions(context, functions), lambda: module_fields(context))
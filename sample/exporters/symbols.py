@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  symbols.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Name lookup in the "params" of IR scope nodes.
+# A scope's params are ["name", {"type": ..., "index": ...}] pairs, the
+# position of a pair is the index of the scope's input it reads from.
+# SymbolTable maps names to those positions, so finding a variable doesn't
+# scan the params, and it's updated when params are added to the scope.
+# When a name is defined twice the first one wins (the innermost definition,
+# Let's and loops put their new variables in front of the outer ones).
+
+
+class SymbolTable:
+
+    def __init__(self, params):
+        self.params  = params
+        self.size    = len(params)
+
+        # name -> position - offset, putting k params in front of the others
+        # moves everything by k, that only changes the offset
+        self.offset  = 0
+        self.indices = {}
+
+        for index, (name, desc) in enumerate(params):
+            self.indices.setdefault(name, index)
+
+    # true if params weren't replaced or changed by someone else
+    def describes(self, params):
+        return params is self.params and len(params) == self.size
+
+    # returns (index, type) of the variable or None if it's not in the scope
+    def find(self, name):
+        index = self.indices.get(name)
+        if index is None:
+            return None
+        index += self.offset
+        return index, self.params[index][1]["type"]
+
+    # params were added after the existing ones
+    def appended(self, names):
+        for name in names:
+            self.indices.setdefault(name, self.size - self.offset)
+            self.size += 1
+
+    # params were put in front of the existing ones
+    def prepended(self, names):
+        self.offset += len(names)
+        self.size   += len(names)
+        for index in reversed(range(len(names))):
+            self.indices[names[index]] = index - self.offset
+
+
+# returns the SymbolTable of the scope node with id scope_id,
+# it is built on the first lookup and rebuilt if the scope's params were replaced
+def scope_symbols(context, scope_id):
+    params = context.json_nodes[scope_id]["params"] or []
+    table  = context.symbols.get(scope_id)
+
+    if table is None or not table.describes(params):
+        table = context.symbols[scope_id] = SymbolTable(params)
+
+    return table
+
+
+# inserts params in front of the scope's params (shifting their indices)
+def prepend_params(context, scope, new_params):
+    params = scope["params"]
+    table  = context.symbols.get(scope["id"])
+    keep   = table is not None and table.describes(params)
+
+    for p in params:
+        p[1]["index"] += len(new_params)
+    params[0:0] = new_params
+
+    if keep:
+        table.prepended([name for name, desc in new_params])
+
+
+# adds params after the scope's params
+def append_params(context, scope, new_params):
+    params = scope["params"]
+    table  = context.symbols.get(scope["id"])
+    keep   = table is not None and table.describes(params)
+
+    params.extend(new_params)
+
+    if keep:
+        table.appended([name for name, desc in new_params])
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  binary.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Binary IR format: an IRStore (ir/store.py) written out as it is kept in
+# memory, so reading it back doesn't parse anything.
+#
+#   header:   magic, version, number of sections, root node,
+#             then (offset, size) in bytes of every section
+#   sections: the store's arrays (int32, little-endian), the string, value
+#             and type tables (int64 offsets + a blob of UTF-8 text, values
+#             and types are JSON) and the layouts (JSON)
+#
+# Sections start at multiples of 8 bytes. load() maps the file into memory
+# and the store's arrays are views of the mapping (nothing is copied), the
+# tables' items are decoded when they are first used.
+#
+#   dump(store, open("module.sir", "wb"))
+#   store = load("module.sir")
+#   compile_to_cpp(store)
+
+import json
+import mmap
+import struct
+import sys
+
+from array import array
+
+from ir.store import IRStore
+
+
+MAGIC   = b"SISALIR\0"
+VERSION = 1
+
+ARRAYS = ["node_layout", "node_id", "field_start", "field_items",
+          "list_start", "list_items",
+          "port_layout", "port_index", "port_node", "port_type", "port_location",
+          "param_name", "param_port",
+          "edge_src", "edge_dst", "edge_src_node", "edge_dst_node",
+          "out_start", "out_edges", "in_start", "in_edges",
+          "string_node"]
+
+TABLES = ["strings", "values", "types"]
+
+# arrays, offsets and blobs of the tables, layouts
+NUM_SECTIONS = len(ARRAYS) + 2 * len(TABLES) + 1
+
+HEADER  = struct.Struct("<8sIIi")
+SECTION = struct.Struct("<QQ")
+
+# the arrays are stored little-endian, on big-endian machines they are swapped
+SWAP = sys.byteorder == "big"
+
+
+class TextTable:
+
+    # items are blob[offsets[n] : offsets[n + 1]] decoded with "decode",
+    # every item is decoded once (so types, for example, stay shared)
+    def __init__(self, offsets, blob, decode):
+        self.offsets = offsets
+        self.blob    = blob
+        self.decode  = decode
+        self.cache   = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, n):
+        try:
+            return self.cache[n]
+        except KeyError:
+            if not 0 <= n < len(self):
+                raise IndexError("table index out of range")
+            item = self.cache[n] = self.decode(str(self.blob[self.offsets[n] : self.offsets[n + 1]], "utf-8"))
+            return item
+
+    def __iter__(self):
+        return (self[n] for n in range(len(self)))
+
+
+def text(item):
+    return item
+
+
+def table_sections(items, encode):
+    offsets = array("q", [0])
+    blob    = bytearray()
+    for item in items:
+        blob.extend(encode(item).encode("utf-8"))
+        offsets.append(len(blob))
+    return [int_bytes(offsets), bytes(blob)]
+
+
+def int_bytes(values):
+    if SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+# the binary IR of the store as bytes
+def dumps(store):
+    sections = [int_bytes(array("i", getattr(store, name))) for name in ARRAYS]
+    sections += table_sections(store.strings, text)
+    sections += table_sections(store.values,  json.dumps)
+    sections += table_sections(store.types,   json.dumps)
+    sections.append(json.dumps(store.layouts).encode("utf-8"))
+
+    header_size = HEADER.size + SECTION.size * len(sections)
+    offset      = aligned(header_size)
+    table       = []
+    for section in sections:
+        table.append(SECTION.pack(offset, len(section)))
+        offset = aligned(offset + len(section))
+
+    result = bytearray(HEADER.pack(MAGIC, VERSION, len(sections), store.root))
+    for entry in table:
+        result.extend(entry)
+    for section in sections:
+        result.extend(bytes(aligned(len(result)) - len(result)))
+        result.extend(section)
+
+    return bytes(result)
+
+
+def dump(store, file):
+    file.write(dumps(store))
+
+
+def aligned(offset):
+    return (offset + 7) & ~7
+
+
+# a read-only IRStore over the binary IR in "buffer" (bytes, a mmap...),
+# it's arrays are views of the buffer
+def loads(buffer):
+    buffer = memoryview(buffer)
+
+    magic, version, num_sections, root = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise Exception("not a binary Sisal IR")
+    if version != VERSION or num_sections != NUM_SECTIONS:
+        raise Exception("unsupported binary IR version %d" % version)
+
+    sections = []
+    for n in range(num_sections):
+        offset, size = SECTION.unpack_from(buffer, HEADER.size + n * SECTION.size)
+        sections.append(buffer[offset : offset + size])
+
+    store = IRStore()
+    store.root = root
+
+    for name, section in zip(ARRAYS, sections):
+        setattr(store, name, int_view(section, "i"))
+
+    tables = sections[len(ARRAYS) : -1]
+    store.strings = TextTable(int_view(tables[0], "q"), tables[1], text)
+    store.values  = TextTable(int_view(tables[2], "q"), tables[3], json.loads)
+    store.types   = TextTable(int_view(tables[4], "q"), tables[5], json.loads)
+    store.layouts = [tuple(keys) for keys in json.loads(str(sections[-1], "utf-8"))]
+
+    # built when they are needed (see IRStore.find_node)
+    store.string_ids = None
+
+    return store
+
+
+def int_view(section, typecode):
+    if SWAP:
+        values = array(typecode)
+        values.frombytes(section)
+        values.byteswap()
+        return values
+    return section.cast(typecode)
+
+
+# maps the file into memory and reads the store from it
+def load(path):
+    with open(path, "rb") as file:
+        return loads(mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ))
+
+
+# true if the file starts like a binary IR
+def is_binary_ir(path):
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  compact.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# The compact dialect of the JSON IR. It holds the same graph with less
+# repetition:
+#
+#   - types are written once, in the "types" table of the first function
+#     using them, ports and edges refer to them by their position in the
+#     tables of all the functions so far (the table is added to by every
+#     function, so a function can be expanded as soon as it's read)
+#   - a port whose "index" is it's position in the list and whose "nodeId"
+#     is the id of the node it's in is just it's type's id, other ports are
+#     dicts with "type" replaced by the type's id
+#   - edge ends are [nodeId, index, type id]
+#   - nodes' locations are kept in their function's "locations" table
+#     (node id -> location) instead of the nodes
+#
+#   {"dialect": "compact", "version": 2,
+#    "functions": [{"types": [...], "locations": {...}, <the function>}, ...],
+#    "declarations": {}}
+#
+# (version 1 had the module's "types" and "locations" after the functions,
+# it's still read, but only once the whole module is)
+# from_compact gives back the ordinary IR (ports' keys can come back in
+# another order).
+
+import json
+
+from ast_.location import location_to_json
+from ir.store      import PORT_LISTS, PARAM_LISTS, EDGE_LISTS, NODE_LISTS, SUB_NODES
+
+DIALECT = "compact"
+VERSION = 2
+
+
+def is_compact(module):
+    return module.get("dialect") == DIALECT
+
+
+class Compactor:
+
+    def __init__(self):
+        self.types     = []
+        self.type_ids  = {}  # type's JSON text -> position in types
+        self.locations = {}
+
+        # the exporter shares type dicts (see sisal_type.py), so most types are found by id()
+        self.known_types = {}  # id(type dict) -> (type dict, position in types)
+
+    def type_id(self, type_):
+        known = self.known_types.get(id(type_))
+        if known is not None and known[0] is type_:
+            return known[1]
+
+        key   = json.dumps(type_, default = location_to_json)
+        index = self.type_ids.get(key)
+        if index is None:
+            index = self.type_ids[key] = len(self.types)
+            self.types.append(type_)
+        self.known_types[id(type_)] = (type_, index)
+        return index
+
+    def port(self, port, position, node_id):
+        if len(port) == 3 and port.get("index") == position and port.get("nodeId") == node_id and "type" in port:
+            return self.type_id(port["type"])
+        return {key: self.type_id(value) if key == "type" else value for key, value in port.items()}
+
+    def edge_end(self, port):
+        if len(port) == 3 and "index" in port and "nodeId" in port and "type" in port:
+            return [port["nodeId"], port["index"], self.type_id(port["type"])]
+        return {key: self.type_id(value) if key == "type" else value for key, value in port.items()}
+
+    def node(self, node):
+        node_id = node.get("id")
+        result  = {}
+
+        for key, value in node.items():
+            if key == "location" and node_id is not None:
+                self.locations[node_id] = value
+            elif value is None:
+                result[key] = value
+            elif key in PORT_LISTS:
+                result[key] = [self.port(port, n, node_id) for n, port in enumerate(value)]
+            elif key in PARAM_LISTS:
+                result[key] = [[name, self.port(port, n, node_id)] for n, (name, port) in enumerate(value)]
+            elif key in EDGE_LISTS:
+                result[key] = [[self.edge_end(src), self.edge_end(dst)] for src, dst in value]
+            elif key in NODE_LISTS:
+                result[key] = [self.node(item) for item in value]
+            elif key in SUB_NODES:
+                result[key] = self.node(value)
+            else:
+                result[key] = value
+
+        return result
+
+    # a function with the types it uses first and it's locations
+    def function(self, function):
+        start          = len(self.types)
+        self.locations = {}
+        compact        = self.node(function)
+
+        return dict(types = self.types[start:], locations = self.locations, **compact)
+
+
+def to_compact(module):
+    compactor = Compactor()
+    functions = [compactor.function(function) for function in module["functions"]]
+
+    return dict(dialect      = DIALECT,
+                version      = VERSION,
+                functions    = functions,
+                declarations = module.get("declarations", {}))
+
+
+class Expander:
+
+    # module's fields written before the functions are enough for version 2,
+    # version 1 needs the tables written after them
+    def __init__(self, module):
+        self.version = module.get("version")
+        if not self.version in (1, VERSION):
+            raise Exception("unsupported compact IR version: %s" % self.version)
+
+        self.types     = list(module.get("types", []))
+        self.locations = module.get("locations", {})
+
+    def port(self, port, position, node_id):
+        if type(port) == int:
+            return dict(index = position, nodeId = node_id, type = self.types[port])
+        return {key: self.types[value] if key == "type" else value for key, value in port.items()}
+
+    def edge_end(self, port):
+        if type(port) == list:
+            node_id, index, type_ = port
+            return dict(index = index, nodeId = node_id, type = self.types[type_])
+        return {key: self.types[value] if key == "type" else value for key, value in port.items()}
+
+    def node(self, node):
+        node_id = node.get("id")
+        result  = {}
+
+        for key, value in node.items():
+            if value is None:
+                result[key] = value
+            elif key in PORT_LISTS:
+                result[key] = [self.port(port, n, node_id) for n, port in enumerate(value)]
+            elif key in PARAM_LISTS:
+                result[key] = [[name, self.port(port, n, node_id)] for n, (name, port) in enumerate(value)]
+            elif key in EDGE_LISTS:
+                result[key] = [[self.edge_end(src), self.edge_end(dst)] for src, dst in value]
+            elif key in NODE_LISTS:
+                result[key] = [self.node(item) for item in value]
+            elif key in SUB_NODES:
+                result[key] = self.node(value)
+            else:
+                result[key] = value
+
+        if node_id in self.locations:
+            result["location"] = self.locations[node_id]
+
+        return result
+
+    # expands a function, the types it brings are added to the table
+    def function(self, function):
+        if self.version == 1:
+            return self.node(function)
+
+        self.types.extend(function["types"])
+        self.locations = function["locations"]
+        return self.node({key: value for key, value in function.items() if key != "types" and key != "locations"})
+
+    # the functions one by one
+    def functions(self, module):
+        for function in module["functions"]:
+            yield self.function(function)
+
+
+def from_compact(module):
+    expander = Expander(module)
+    return dict(functions    = list(expander.functions(module)),
+                declarations = module.get("declarations", {}))
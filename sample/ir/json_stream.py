@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  json_stream.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Reads the JSON IR of a module ({"functions": [...], ...}) from a file a
+# piece at a time: the functions are decoded and handed out one by one as
+# they are read, so only the function being decoded (and not the whole
+# file's text and all the dicts made from it) is kept in memory.
+# The module's other fields are collected into StreamedIR.fields as they
+# are met, the ones written after "functions" (like the compact dialect's
+# tables, see ir/compact.py) are there once functions() is exhausted.
+
+import json
+
+
+WHITESPACE = " \t\n\r"
+
+
+class StreamedIR:
+
+    def __init__(self, file, chunk_size = 1 << 16):
+        self.file       = file
+        self.chunk_size = chunk_size
+        self.decoder    = json.JSONDecoder()
+        self.buffer     = ""
+        self.pos        = 0
+        self.eof        = False
+        self.fields     = {}
+        self.started    = False
+
+    # reads more of the file, returns False at the end of it
+    def read(self, size = None):
+        if self.eof:
+            return False
+
+        text = self.file.read(size or self.chunk_size)
+        if not text:
+            self.eof = True
+            return False
+
+        # the text that was already decoded is dropped
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos    = 0
+        return True
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.read():
+                return
+
+    def next_char(self):
+        self.skip_whitespace()
+        if self.pos == len(self.buffer):
+            raise Exception("unexpected end of the IR")
+        return self.buffer[self.pos]
+
+    def expect(self, chars):
+        char = self.next_char()
+        if not char in chars:
+            raise Exception("malformed IR: expected one of %s, got %s" % (repr(chars), repr(char)))
+        self.pos += 1
+        return char
+
+    # decodes the JSON value at the current position, the file is read
+    # further while the value is incomplete, every retry reads twice as much
+    # as the previous one so a big function isn't rescanned too many times
+    def value(self):
+        self.skip_whitespace()
+        size = self.chunk_size
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number at the end of the buffer may continue in the file
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read(size)
+            size *= 2
+
+    # yields the module's functions as dicts, in the order they are written
+    def functions(self):
+        if self.started:
+            raise Exception("the IR can only be streamed once")
+        self.started = True
+
+        self.expect("{")
+        if self.next_char() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            key = self.value()
+            self.expect(":")
+
+            if key == "functions":
+                self.expect("[")
+                if self.next_char() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield self.value()
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                self.fields[key] = self.value()
+
+            if self.expect(",}") == "}":
+                return
+
+
+
+# the functions of a streamed module in the ordinary dialect, compact
+# functions are expanded as they are read (the dialect's fields are written
+# before the functions). The version 1 compact dialect had it's tables after
+# the functions, so it's (small) functions are collected and expanded once
+# the tables are read
+def expanded_functions(streamed):
+    from ir.compact import is_compact, Expander
+
+    functions = streamed.functions()
+    expander  = None
+
+    for function in functions:
+        if is_compact(streamed.fields):
+            if streamed.fields.get("version") == 1:
+                compact = [function] + list(functions)
+                yield from Expander(streamed.fields).functions(dict(functions = compact))
+                return
+
+            expander = expander or Expander(streamed.fields)
+            function = expander.function(function)
+        yield function
@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  store.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# In-memory IR store: keeps the nodes, ports, params and edges of the JSON IR
+# in typed arrays (struct of arrays) instead of nested dicts and lists.
+#
+# Everything that repeats in the JSON IR is interned: strings (node ids,
+# names), scalar values (locations, operators, literal values...), types
+# and the "layouts" of dicts (their keys in order, so the JSON comes back
+# out with the keys in the same order). The arrays only keep indices
+# into these tables, nodes are referred to by integer indices.
+#
+# A node is a layout and one int per key, what the int means depends on
+# the key (see field kinds below). Lists (of ports, params, edges and
+# nodes) are stored CSR-style: list_start[n] : list_start[n + 1] is the
+# n-th list's slice of list_items. Edges are indexed by their source and
+# destination nodes the same way (edges_from, edges_to).
+#
+#   store = IRStore.from_json(ir)   # ir as written by sisal_parse.py
+#   ir    = store.to_json()
+
+import json
+
+from array           import array
+from collections.abc import Mapping
+
+from ast_.location import location_to_json
+
+
+# how the values of keys are stored:
+PORT_LISTS  = {"inPorts", "outPorts"}                                 # lists of ports
+PARAM_LISTS = {"params", "results"}                                   # lists of [name, port]
+EDGE_LISTS  = {"edges"}                                               # lists of [port, port]
+NODE_LISTS  = {"functions", "nodes", "branches"}                      # lists of nodes
+SUB_NODES   = {"condition", "init", "range", "reduction", "body", "preCondition"}
+CONTAINERS  = PORT_LISTS | PARAM_LISTS | EDGE_LISTS | NODE_LISTS | SUB_NODES
+# "id" is a string, everything else is a scalar value (a location, a name, an operator...)
+
+# the keys ports can have (their order is kept in the port's layout)
+PORT_KEYS = {"index", "nodeId", "type", "location"}
+
+# stands for None in place of a list or a node
+NONE = -1
+
+
+class IRStore:
+
+    def __init__(self):
+        # interning tables, key -> index and the list of interned things
+        self.string_ids = {}
+        self.strings    = []
+        self.value_ids  = {}
+        self.values     = []
+        self.type_ids   = {}
+        self.types      = []
+        self.layout_ids = {}
+        self.layouts    = []
+
+        # nodes: layout, id (a string, or NONE) and one field per key of the layout
+        self.node_layout = array("i")
+        self.node_id     = array("i")
+        self.field_start = array("i", [0])
+        self.field_items = array("i")
+
+        # lists of ports, params, edges and nodes
+        self.list_start = array("i", [0])
+        self.list_items = array("i")
+
+        # ports, "nodeId" is a string, "location" a value, absent keys are NONE
+        self.port_layout   = array("i")
+        self.port_index    = array("i")
+        self.port_node     = array("i")
+        self.port_type     = array("i")
+        self.port_location = array("i")
+
+        # params: name (a string) and a port
+        self.param_name = array("i")
+        self.param_port = array("i")
+
+        # edges: source and destination ports, and the nodes they belong to
+        self.edge_src      = array("i")
+        self.edge_dst      = array("i")
+        self.edge_src_node = array("i")
+        self.edge_dst_node = array("i")
+
+        # CSR adjacency (see index_edges)
+        self.out_start = array("i")
+        self.out_edges = array("i")
+        self.in_start  = array("i")
+        self.in_edges  = array("i")
+
+        # node index of every string that is a node's id (or NONE)
+        self.string_node = array("i")
+
+        # the module dict ({"functions": [...], "declarations": {}}) is stored as a node too
+        self.root = NONE
+
+        # layout -> {key: position} (see layout_positions)
+        self.positions = {}
+
+    #----------------------------------------------------
+    # interning
+    #----------------------------------------------------
+
+    def string(self, text):
+        index = self.string_ids.get(text)
+        if index is None:
+            index = self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    # values are anything JSON can hold (Location objects are turned into strings)
+    def value(self, value):
+        if not type(value) in (str, int, float, bool) and value is not None:
+            value = json.loads(json.dumps(value, default = location_to_json))
+
+        # strings are their own keys, other values are told apart by their type ("1" vs 1 vs True),
+        # lists and dicts by their JSON text, tagged so that "[1, 2]" and [1, 2] are different values
+        if type(value) == str:
+            key = value
+        elif type(value) in (list, dict):
+            key = ("json", json.dumps(value))
+        else:
+            key = (type(value), value)
+
+        index = self.value_ids.get(key)
+        if index is None:
+            index = self.value_ids[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def type(self, type_):
+        key   = json.dumps(type_, default = location_to_json)
+        index = self.type_ids.get(key)
+        if index is None:
+            index = self.type_ids[key] = len(self.types)
+            self.types.append(json.loads(key))
+        return index
+
+    def layout(self, keys):
+        keys  = tuple(keys)
+        index = self.layout_ids.get(keys)
+        if index is None:
+            index = self.layout_ids[keys] = len(self.layouts)
+            self.layouts.append(keys)
+        return index
+
+    #----------------------------------------------------
+    # JSON -> store
+    #----------------------------------------------------
+
+    @staticmethod
+    def from_json(module):
+        store = IRStore()
+        store.root = store.add_node(module)
+        store.index_edges()
+        return store
+
+    # makes the store out of function dicts (an iterable, so functions can be
+    # exported and added one by one, see export_module_to_store in exporters/json.py),
+    # fields() gives the module's other fields, it's called after the functions are added
+    @staticmethod
+    def from_functions(functions, fields = lambda: dict(declarations = {})):
+        store  = IRStore()
+        nodes  = [store.add_node(function) for function in functions]
+        fields = fields()
+        store.root = store.add_fields(["functions"] + list(fields),
+                                      [store.add_list(nodes)] + [store.value(value) for value in fields.values()])
+        store.index_edges()
+        return store
+
+    def add_list(self, items):
+        self.list_items.extend(items)
+        self.list_start.append(len(self.list_items))
+        return len(self.list_start) - 2
+
+    def add_port(self, port):
+        if not PORT_KEYS.issuperset(port):
+            raise Exception("unexpected port fields: %s" % list(port))
+
+        self.port_layout.append(self.layout(port))
+        self.port_index.append(port.get("index", NONE))
+        self.port_node.append(self.string(port["nodeId"]) if "nodeId" in port else NONE)
+        self.port_type.append(self.type(port["type"]) if "type" in port else NONE)
+        self.port_location.append(self.value(port["location"]) if "location" in port else NONE)
+        return len(self.port_layout) - 1
+
+    def add_param(self, param):
+        name, port = param
+        self.param_name.append(self.string(name))
+        self.param_port.append(self.add_port(port))
+        return len(self.param_name) - 1
+
+    def add_edge(self, edge):
+        src, dst = edge
+        self.edge_src.append(self.add_port(src))
+        self.edge_dst.append(self.add_port(dst))
+        return len(self.edge_src) - 1
+
+    def add_field(self, key, value):
+        if key == "id":
+            return self.string(value)
+        if key in CONTAINERS and value is None:
+            return NONE
+        if key in PORT_LISTS:
+            return self.add_list([self.add_port(port) for port in value])
+        if key in PARAM_LISTS:
+            return self.add_list([self.add_param(param) for param in value])
+        if key in EDGE_LISTS:
+            return self.add_list([self.add_edge(edge) for edge in value])
+        if key in NODE_LISTS:
+            return self.add_list([self.add_node(node) for node in value])
+        if key in SUB_NODES:
+            return self.add_node(value)
+        return self.value(value)
+
+    # sub-nodes are added before the node itself (it needs their indices)
+    def add_node(self, node):
+        fields = [self.add_field(key, value) for key, value in node.items()]
+        return self.add_fields(node, fields, node.get("id"))
+
+    def add_fields(self, keys, fields, node_id = None):
+        self.node_layout.append(self.layout(keys))
+        self.node_id.append(self.string(node_id) if node_id is not None else NONE)
+        self.field_items.extend(fields)
+        self.field_start.append(len(self.field_items))
+        return len(self.node_layout) - 1
+
+    # builds string_node and the CSR indices of edges by their source and destination nodes
+    def index_edges(self):
+        self.string_node = array("i", [NONE]) * len(self.strings)
+        for node, string in enumerate(self.node_id):
+            if string != NONE:
+                self.string_node[string] = node
+
+        self.edge_src_node = array("i", (self.port_node_index(port) for port in self.edge_src))
+        self.edge_dst_node = array("i", (self.port_node_index(port) for port in self.edge_dst))
+
+        self.out_start, self.out_edges = csr(self.edge_src_node, len(self.node_layout))
+        self.in_start,  self.in_edges  = csr(self.edge_dst_node, len(self.node_layout))
+
+    def port_node_index(self, port):
+        string = self.port_node[port]
+        return self.string_node[string] if string != NONE else NONE
+
+    #----------------------------------------------------
+    # store -> JSON
+    #----------------------------------------------------
+
+    # types are shared between the ports they are used in, they must not be changed
+    def to_json(self):
+        return self.node_json(self.root)
+
+    # the functions one by one (all of them don't have to be in memory as dicts at once)
+    def functions(self):
+        for node in self.node_list(self.root, "functions"):
+            yield self.node_json(node)
+
+    # the functions as NodeViews
+    def function_views(self):
+        return [NodeView(self, node) for node in self.node_list(self.root, "functions")]
+
+    # positions of the keys in the layout: {key: position}
+    def layout_positions(self, layout):
+        positions = self.positions.get(layout)
+        if positions is None:
+            positions = self.positions[layout] = {key: n for n, key in enumerate(self.layouts[layout])}
+        return positions
+
+    def list_slice(self, list_):
+        return self.list_items[self.list_start[list_] : self.list_start[list_ + 1]]
+
+    def fields(self, node):
+        layout = self.layouts[self.node_layout[node]]
+        start  = self.field_start[node]
+        return zip(layout, self.field_items[start : start + len(layout)])
+
+    def node_list(self, node, key):
+        for field, item in self.fields(node):
+            if field == key:
+                return self.list_slice(item) if item != NONE else []
+        return []
+
+    def port_json(self, port):
+        result = {}
+        for key in self.layouts[self.port_layout[port]]:
+            if key == "index":
+                result[key] = self.port_index[port]
+            elif key == "nodeId":
+                result[key] = self.strings[self.port_node[port]]
+            elif key == "type":
+                result[key] = self.types[self.port_type[port]]
+            else:
+                result[key] = self.values[self.port_location[port]]
+        return result
+
+    def param_json(self, param):
+        return [self.strings[self.param_name[param]], self.port_json(self.param_port[param])]
+
+    def edge_json(self, edge):
+        return [self.port_json(self.edge_src[edge]), self.port_json(self.edge_dst[edge])]
+
+    def field_json(self, key, item):
+        if key == "id":
+            return self.strings[item]
+        if key in CONTAINERS and item == NONE:
+            return None
+        if key in PORT_LISTS:
+            return [self.port_json(port) for port in self.list_slice(item)]
+        if key in PARAM_LISTS:
+            return [self.param_json(param) for param in self.list_slice(item)]
+        if key in EDGE_LISTS:
+            return [self.edge_json(edge) for edge in self.list_slice(item)]
+        if key in NODE_LISTS:
+            return [self.node_json(node) for node in self.list_slice(item)]
+        if key in SUB_NODES:
+            return self.node_json(item)
+        return self.values[item]
+
+    def node_json(self, node):
+        return {key: self.field_json(key, item) for key, item in self.fields(node)}
+
+    #----------------------------------------------------
+    # queries
+    #----------------------------------------------------
+
+    def num_nodes(self):
+        return len(self.node_layout)
+
+    # node index by the node's id ("main:node3"), or None
+    def find_node(self, node_id):
+        # (stores read from the binary IR don't have string_ids until this is needed)
+        if self.string_ids is None:
+            self.string_ids = {text: n for n, text in enumerate(self.strings)}
+
+        string = self.string_ids.get(node_id)
+        if string is None or self.string_node[string] == NONE:
+            return None
+        return self.string_node[string]
+
+    def edges_from(self, node):
+        return self.out_edges[self.out_start[node] : self.out_start[node + 1]]
+
+    def edges_to(self, node):
+        return self.in_edges[self.in_start[node] : self.in_start[node + 1]]
+
+    # bytes taken by the arrays (the interning tables are not counted)
+    def array_bytes(self):
+        return sum(value.itemsize * len(value) for value in self.__dict__.values()
+                                                if type(value) == array)
+
+
+# CSR index of rows by their keys: rows of key k are items[start[k] : start[k + 1]]
+# (rows with key NONE are left out)
+def csr(keys, num_keys):
+    start = array("i", [0]) * (num_keys + 1)
+    for key in keys:
+        if key != NONE:
+            start[key + 1] += 1
+
+    for key in range(num_keys):
+        start[key + 1] += start[key]
+
+    position = array("i", start[:-1])
+    items    = array("i", [0]) * start[-1]
+    for row, key in enumerate(keys):
+        if key != NONE:
+            items[position[key]] = row
+            position[key] += 1
+
+    return start, items
+
+
+# A node of the store that reads like the node's dict (node["name"],
+# "params" in node...), fields are read from the store when they are asked for
+# and sub-nodes are NodeViews too, so a node is never turned into dicts as a whole.
+class NodeView(Mapping):
+
+    __slots__ = ("store", "node", "positions")
+
+    def __init__(self, store, node):
+        self.store     = store
+        self.node      = node
+        self.positions = store.layout_positions(store.node_layout[node])
+
+    def __getitem__(self, key):
+        store = self.store
+        item  = store.field_items[store.field_start[self.node] + self.positions[key]]
+
+        if key in CONTAINERS and item == NONE:
+            return None
+        if key in NODE_LISTS:
+            return [NodeView(store, node) for node in store.list_slice(item)]
+        if key in SUB_NODES:
+            return NodeView(store, item)
+        return store.field_json(key, item)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return "NodeView(%s)" % self.store.node_json(self.node)
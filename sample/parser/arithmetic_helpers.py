@@ -23,32 +23,51 @@
 #
 
 
-def set_priorities(expression, callback):
-    
-    high = ["*", "/"]
-    low  = ["+", "-"]
-
-    def split (expression):
-        
-        if len(expression) == 1:
-            return expression[0]
-            
-        # gets a low priority binary operation (like "+") closest  to
-        # the beginning of input, or input length if there are none left
-        index = min ([expression.index(o) if o in expression 
-                      else len(expression) 
-                      for o in low])
-        
-        if (index >= len(expression)):            
-            return callback(expression)
-
-        op = expression[index]
-        
-        if not op in expression: return expression
-        
-        left  = split(expression[:index])
-        right = split(expression[index+1:])
-        
-        return callback([left,op, right])
-    
-    return split(expression)
+# binding strength of the binary operators (see bin_op in function_grammar.ini),
+# operators of the same strength are grouped from left to right, except "^"
+precedence = {
+                "|"  : 1,
+                "="  : 2, "<"  : 2, "<=" : 2, ">" : 2, ">=" : 2,
+                "||" : 3,
+                "+"  : 4, "-"  : 4,
+                "*"  : 5, "/"  : 5,
+                "^"  : 6,
+             }
+
+right_associative = ["^"]
+
+
+# builds the tree of a flat [operand, Bin, operand, Bin, operand ...] list
+# with precedence climbing. Every operation becomes a [left, Bin, right]
+# list, operands are left as they are. Each element is looked at once.
+def build_tree(expression):
+
+    position = 1
+
+    def climb(left, min_precedence):
+        nonlocal position
+
+        while position < len(expression):
+            operator = expression[position]
+            strength = precedence[operator.operator]
+            if strength < min_precedence:
+                break
+
+            right     = expression[position + 1]
+            position += 2
+
+            # operations binding stronger than this one (or as strong, if
+            # it's right associative) go into it's right operand
+            while position < len(expression):
+                next_strength = precedence[expression[position].operator]
+                if next_strength > strength or \
+                   (next_strength == strength and operator.operator in right_associative):
+                    right = climb(right, next_strength)
+                else:
+                    break
+
+            left = [left, operator, right]
+
+        return left
+
+    return climb(expression[0], 0)
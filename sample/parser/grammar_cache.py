@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  grammar_cache.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# On-disk cache of the compiled parsimonious grammar.
+#
+# Building the Grammar object from function_grammar.ini is done by every
+# sisal_parse.py run, so the compiled grammar is pickled into a cache
+# directory and loaded from there next time. The file name contains a hash
+# of the grammar text (and the versions it was pickled with), so editing
+# the grammar simply makes a new cache file.
+#
+# The cache directory is $CPPS_CACHE_DIR, or "cpps" in $XDG_CACHE_HOME
+# (~/.cache by default). Any problem with the cache is ignored and the
+# grammar is built from the text as usual.
+
+import hashlib
+import os
+import pickle
+import sys
+
+import parsimonious.expressions
+from parsimonious.grammar import Grammar
+
+
+def cache_dir():
+    if "CPPS_CACHE_DIR" in os.environ:
+        return os.environ["CPPS_CACHE_DIR"]
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cpps")
+
+
+def cache_path(grammar_text):
+    key = hashlib.sha1()
+    key.update(grammar_text.encode())
+    # parsimonious has no version attribute, so the time it was installed is used
+    installed = os.path.getmtime(parsimonious.expressions.__file__)
+    key.update(("%s %s" % (sys.version, installed)).encode())
+    return os.path.join(cache_dir(), "grammar-%s.pickle" % key.hexdigest())
+
+
+def load_grammar(grammar_file_name):
+    grammar_text = open(grammar_file_name, "r").read()
+    path         = cache_path(grammar_text)
+
+    try:
+        with open(path, "rb") as cache_file:
+            return pickle.load(cache_file)
+    except Exception:
+        pass
+
+    grammar = Grammar(grammar_text)
+
+    # write to a temporary file first, so other processes never see half of it
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        temp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(grammar, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except Exception:
+        pass
+
+    return grammar
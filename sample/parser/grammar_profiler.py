@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  grammar_profiler.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# Per-rule profile of the parsimonious grammar (function_grammar.ini).
+#
+# GrammarProfile.instrument makes a copy of the grammar in which every
+# named rule records how many times it was tried, how many times it failed
+# (that's a backtrack in the rule that tried it), how many results came
+# from the packrat memo, and the time spent in it. The grammar used for
+# normal parsing is never touched.
+#
+# usage:
+#     profile = GrammarProfile()
+#     parse_file(text, profile = profile)
+#     print(profile.report())
+
+import copy
+import time
+
+from parsimonious.expressions import Expression
+
+
+class RuleStats:
+
+    def __init__(self, name):
+        self.name       = name
+        self.calls      = 0
+        self.failures   = 0
+        self.memo_hits  = 0
+        # time of the outermost calls (recursive calls are not added twice)
+        self.cumulative = 0.0
+        # time not spent in other named rules
+        self.own        = 0.0
+        self.depth      = 0
+
+
+class GrammarProfile:
+
+    sort_keys = dict(cumulative = lambda r: r.cumulative,
+                     own        = lambda r: r.own,
+                     calls      = lambda r: r.calls,
+                     failures   = lambda r: r.failures,
+                     memo_hits  = lambda r: r.memo_hits)
+
+    def __init__(self):
+        self.rules   = {}
+        # [start time, time spent in named subrules] of running rules
+        self.stack   = []
+        self.grammar = None
+        self.source  = None
+
+    def stats(self, name):
+        if not name in self.rules:
+            self.rules[name] = RuleStats(name)
+        return self.rules[name]
+
+    # returns a copy of "grammar" with the named rules recording into this
+    # profile, the copy is made once and reused for the same grammar
+    def instrument(self, grammar):
+        if self.source is grammar:
+            return self.grammar
+
+        profiled = copy.deepcopy(grammar)
+        classes  = {}
+
+        for name, expression in profiled.items():
+            if not isinstance(expression, Expression) or not expression.name:
+                continue
+            base = type(expression)
+            if not base in classes:
+                classes[base] = self.profiled_class(base)
+            expression.__class__ = classes[base]
+
+        self.grammar = profiled
+        self.source  = grammar
+        return profiled
+
+    # subclass of an expression class with match_core that records stats,
+    # it has no fields of it's own, so it can replace the class of a rule
+    def profiled_class(self, base):
+        profile = self
+
+        def match_core(self, text, pos, cache, error):
+            stats = profile.stats(self.name)
+            stats.calls += 1
+            if (id(self), pos) in cache:
+                stats.memo_hits += 1
+
+            stats.depth += 1
+            frame = [time.perf_counter(), 0.0]
+            profile.stack.append(frame)
+            try:
+                node = base.match_core(self, text, pos, cache, error)
+            finally:
+                elapsed = time.perf_counter() - frame[0]
+                profile.stack.pop()
+                stats.depth -= 1
+                stats.own += elapsed - frame[1]
+                if stats.depth == 0:
+                    stats.cumulative += elapsed
+                if profile.stack:
+                    profile.stack[-1][1] += elapsed
+
+            if node is None:
+                stats.failures += 1
+            return node
+
+        return type("Profiled" + base.__name__, (base,),
+                    dict(__slots__ = (), match_core = match_core))
+
+    def reset(self):
+        self.rules = {}
+
+    # rules sorted by "sort_by" (see sort_keys), biggest first
+    def sorted_rules(self, sort_by = "cumulative"):
+        return sorted(self.rules.values(), key = self.sort_keys[sort_by], reverse = True)
+
+    def report(self, sort_by = "cumulative"):
+        rules = self.sorted_rules(sort_by)
+        calls = sum(r.calls for r in rules)
+        total = sum(r.own for r in rules)
+
+        lines = ["grammar profile: %d rule calls, %.3f s (sorted by %s)" % (calls, total, sort_by),
+                 "%-24s %10s %10s %10s %12s %10s" % ("rule", "calls", "failed", "memo hits", "cumul, ms", "own, ms")]
+        for r in rules:
+            lines.append("%-24s %10d %10d %10d %12.2f %10.2f" % (r.name, r.calls, r.failures, r.memo_hits,
+                                                                 r.cumulative * 1000, r.own * 1000))
+        return "\n".join(lines)
+
+    def write(self, file_name, sort_by = "cumulative"):
+        with open(file_name, "w") as report_file:
+            report_file.write(self.report(sort_by) + "\n")
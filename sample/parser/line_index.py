@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  line_index.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Translates character offsets into "row:column" source locations.
+# The table of line starts is built once per parsed text, so every lookup
+# is a binary search instead of rescanning the text up to the offset.
+
+from bisect import bisect_right
+
+
+class LineIndex:
+
+    # line_offset and column_offset describe where "text" starts in the
+    # original module (used when a piece of the module is parsed on it's own)
+    def __init__(self, text, line_offset = 0, column_offset = 0):
+        self.text          = text
+        self.line_offset   = line_offset
+        self.column_offset = column_offset
+
+        self.line_starts = [0]
+        pos = text.find("\n")
+        while pos != -1:
+            self.line_starts.append(pos + 1)
+            pos = text.find("\n", pos + 1)
+
+    # returns (row, column) for a character offset,
+    # rows start from "1" and columns from "0"
+    def row_column(self, pos):
+        line   = bisect_right(self.line_starts, pos) - 1
+        column = pos - self.line_starts[line]
+
+        # only the first line of the text is shifted horizontally
+        if line == 0:
+            column += self.column_offset
+
+        return line + 1 + self.line_offset, column
+
+    def location(self, start, end):
+        start_row, start_column = self.row_column(start)
+        end_row,   end_column   = self.row_column(end)
+
+        return "{}:{}-{}:{}".format(start_row,
+                                    start_column,
+                                    end_row,
+                                    end_column)
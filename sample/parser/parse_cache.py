@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  parse_cache.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Cache of parsed functions for per-function (incremental) parsing.
+#
+# Parse trees are stored by a hash of the function's text, so when
+# a module is parsed again only the functions that were edited are
+# re-parsed, the rest come from the cache. Parse trees don't depend
+# on where the function is in the module, node ids and locations are
+# assigned when the tree is visited.
+# The server shares one cache between requests, so the trees and the
+# counters are only touched with the lock held (but parsing is done
+# without it, so functions of different requests are parsed in parallel).
+
+import hashlib
+import threading
+
+
+class ParseCache:
+
+    def __init__(self, max_entries = 10000):
+        self.max_entries = max_entries
+        self.trees       = {}
+        self.hits        = 0
+        self.misses      = 0
+        self.lock        = threading.Lock()
+
+    def parse(self, grammar, text):
+        key = hashlib.sha1(text.encode()).hexdigest()
+
+        with self.lock:
+            # moved to the end, so least recently used trees are removed first
+            tree = self.trees.pop(key, None)
+            if tree is not None:
+                self.hits += 1
+                self.trees[key] = tree
+                return tree
+            self.misses += 1
+
+        tree = grammar.parse(text)
+
+        with self.lock:
+            # (another thread may have added it in the meantime)
+            self.trees.pop(key, None)
+            if self.trees and len(self.trees) >= self.max_entries:
+                del self.trees[next(iter(self.trees))]
+            self.trees[key] = tree
+
+        return tree
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        return "parse cache: %d hits, %d misses (%.1f%% hit rate)" % (
+                                                        self.hits,
+                                                        self.misses,
+                                                        self.hit_rate() * 100)
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits   = 0
+            self.misses = 0
@@ -25,21 +25,22 @@
 # TODO: Expresssion groups (e.g. return values)
 
 import re
-import pprint
 
-pp = pprint.PrettyPrinter(indent = 4, depth = 6)
-
-from parsimonious.grammar    import Grammar
 from parsimonious.nodes      import NodeVisitor
 from parsimonious.exceptions import ParseError
 
 # "ast_" is used instead of "ast" to avoid conflicts
 from ast_.node import *
 from ast_.edge import *
+from ast_.compilation import Compilation
 
 from sisal_type.sisal_type import *
 
-from parser.arithmetic_helpers import set_priorities
+from parser.line_index         import LineIndex
+from parser.grammar_cache      import load_grammar as load_cached_grammar
+from parser.rd_parser          import RDParser
+
+from ast_.location import Location
 
 # connect recursive objects like
 #       args_groups_list = arg_def_group (_ ";" _ arg_def_group)*
@@ -62,20 +63,22 @@ def unpack_rec_list(node):
 
 class TreeVisitor(NodeVisitor):
 
+    # context is the Compilation (ast_/compilation.py) the nodes are created in
+    def __init__(self, context, locations = True):
+        self.context    = context
+        self.locations  = locations
+        self.line_index = LineIndex("")
 
+    # only offsets are stored here, see ast_/location.py
     def get_location(self, node):
-        text = node.full_text
-
-        start_row    = text[:node.start].count("\n") + 1 # line numbers have to start from "1"
-        start_column = len (  (text[:node.start].split("\n"))[-1]  )
+        if not self.locations:
+            return None
 
-        end_row      = text[:node.end].count("\n") + 1
-        end_column   = len (  (text[:node.end].split("\n"))[-1]  )
+        # the table of line starts is built once per parsed text (see parse)
+        if node.full_text is not self.line_index.text:
+            self.line_index = LineIndex(node.full_text)
 
-        return "{}:{}-{}:{}".format(start_row, #+ self.line_offset,
-                                    start_column,
-                                    end_row, # + self.line_offset,
-                                    end_column)
+        return Location(self.line_index, node.start, node.end)
 
     # rule: type          = ("array" _ "of" _ type ) / std_type
     def visit_type(self, node, visited_children):
@@ -154,41 +157,84 @@ class TreeVisitor(NodeVisitor):
 
     # just return the operation's string
     def visit_bin_op(self, node, visited_children):
-        return Bin(location  = self.get_location(node),
+        return Bin(context   = self.context,
+                    location = self.get_location(node),
                     operator = node.text)
 
-    # rule: algebraic          = (operand) (_ bin_op _ operand)*
+    # rule: algebraic          = operand algebraic_tail
     def visit_algebraic(self, node, visited_children):
 
-        expression = [visited_children[0]]
-        if len(visited_children):
-            for n,v in enumerate(visited_children[1]):
-                expression += [v[1]] + [v[3]]
+        expression = [visited_children[0]] + visited_children[1]
 
         return Algebraic(expression = expression, location = self.get_location(node))
 
+    # rule: algebraic_tail     = (_ bin_op _ operand)+
+    def visit_algebraic_tail(self, node, visited_children):
+
+        tail = []
+        for n,v in enumerate(visited_children):
+            tail += [v[1]] + [v[3]]
+
+        return tail
+
+    # rule: equation_tail      = _ "=" _ operand
+    def visit_equation_tail(self, node, visited_children):
+        return [Bin(context = self.context, location="N/A", operator="="), visited_children[3]]
+
+    # rule: expression         = operand expression_tail?
+    def visit_expression(self, node, visited_children):
+        operand = visited_children[0]
+        tail    = self.optional_node(visited_children[1])
+
+        if tail is None:
+            return operand
+
+        # equation
+        if tail[0].operator == "=":
+            return Algebraic(location = self.get_location(node),
+                             expression = [operand] + tail)
+            # ~ return Equation(left = visited_children[0], right = visited_children[4])
+
+        return Algebraic(expression = [operand] + tail, location = self.get_location(node))
+
+    def visit_expression_tail(self, node, visited_children):
+        return visited_children[0]
+
+    # rule: old_call           = &~"old(?i:[a-z_])" call
+    def visit_old_call(self, node, visited_children):
+        return visited_children[1]
+
     # exp (_ "," _ exp)*
     def visit_args_list(self, node, visited_children):
         return unpack_rec_list(visited_children)
 
-    # !("function" _) identifier _ lpar _ args_list _ rpar
+    # callee _ lpar _ args_list _ rpar
     def visit_call(self, node, visited_children):
 
-        args = visited_children[5]
-        function_name = visited_children[1]
-        ret_val = Call(function_name = function_name,
-                              args = args,
-                              location = self.get_location(node)
-                          )
+        args = visited_children[4]
+        function_name = visited_children[0]
+
+        if function_name.name in Function.built_ins:
+            return BuiltInCall(context = self.context, function_name = function_name.name, args = args, location = self.get_location(node))
+
+        ret_val = Call(context       = self.context,
+                       function_name = function_name,
+                       args          = args,
+                       location      = self.get_location(node)
+                      )
         return ret_val
 
     # rule: number_literal_int             = ~"[0-9]+"
     def visit_number_literal_int(self, node, visited_children):
-        return Literal(value = node.text, location = self.get_location(node), type = IntegerType())
+        return Literal(context = self.context, value = node.text, location = self.get_location(node), type = IntegerType())
 
     def visit_identifier(self, node, visited_children):
         return Identifier(name = node.text, location = self.get_location(node))
 
+    # rule: callee             = ~"(?!(?-i:function))[a-z_][a-z0-9_]*"i
+    def visit_callee(self, node, visited_children):
+        return self.visit_identifier(node, visited_children)
+
     #----------------------------------------------------
     #
     #----------------------------------------------------
@@ -220,7 +266,7 @@ class TreeVisitor(NodeVisitor):
                         ret_types     = ret_types if ret_types else [VoidType()]
                       )
         # ~ print (visited_children[7] if visited_children[7] else [],)
-        function = Function(**params)
+        function = Function(context = self.context, **params)
 
         return function
 
@@ -242,7 +288,8 @@ class TreeVisitor(NodeVisitor):
                            "vars" : [identifier]
                           })
 
-        return FunctionImport(**dict(
+        return FunctionImport(context = self.context,
+                              **dict(
                                         name = "Import",
                                         function_name = name,
                                         params        = params,
@@ -276,6 +323,7 @@ class TreeVisitor(NodeVisitor):
             elseifs.append(e[6])
 
         return If(
+                        context      = self.context,
                         conditions   = condition_nodes,
                         then_nodes   = then_nodes,
                         elseif_nodes = elseifs,
@@ -288,6 +336,7 @@ class TreeVisitor(NodeVisitor):
         init = visited_children [2]
         body = visited_children [6]
         return Let(
+                    context    = self.context,
                     init = init,
                     body = body,
                     location   = self.get_location(node)
@@ -296,11 +345,14 @@ class TreeVisitor(NodeVisitor):
     #----------------------------------------------------
     #
     #----------------------------------------------------
-    # rule: array_access       = identifier  (_ "[" _ array_index  _"]")+
-    def visit_array_access(self, node, visited_children):
-        array_name  = visited_children[0].name
+    # rule: name               = identifier array_indices?
+    def visit_name(self, node, visited_children):
+        indices = self.optional_node(visited_children[1])
+
+        if indices is None:
+            return visited_children[0]
 
-        indices = [index_group[3] for index_group in visited_children[1]]
+        array_name  = visited_children[0].name
         #indices.reverse()
 
         # creates a "nested doll" of Array objects
@@ -308,6 +360,7 @@ class TreeVisitor(NodeVisitor):
         def make_array(index = 0, array_index = 0):
             if index < len(indices):
                 return ArrayAccess(
+                                context  = self.context,
                                 name     = array_name,
                                 location = self.get_location(node),
                                 index    = indices[index],
@@ -319,6 +372,10 @@ class TreeVisitor(NodeVisitor):
         array.inline_indices = indices #save it for LLVM
         return array
 
+    # rule: array_indices      = (_ "[" _ array_index _ "]")+
+    def visit_array_indices(self, node, visited_children):
+        return [index_group[3] for index_group in visited_children]
+
     #----------------------------------------------------
     #
     #----------------------------------------------------
@@ -326,7 +383,8 @@ class TreeVisitor(NodeVisitor):
     # old = "old" _ identifier
     def visit_old(self, node, visited_children):
 
-        return OldValue( name     = visited_children[2],
+        return OldValue( context  = self.context,
+                         name     = visited_children[2],
                          location = self.get_location(node))
 
     # "for" _ "initial" _ statements _ while _  "end" _ "for"
@@ -366,7 +424,7 @@ class TreeVisitor(NodeVisitor):
         while_  = self.optional_node( visited_children[6] )
         returns = self.optional_node( visited_children[8] )
         # ~ print (returns)
-        return Loop(range = range_, init = init, while_ = while_, returns = returns, location = self.get_location(node))
+        return Loop(context = self.context, range = range_, init = init, while_ = while_, returns = returns, location = self.get_location(node))
 
     def visit_returns(self, node, visited_children):
         reduction = visited_children[2]
@@ -376,13 +434,11 @@ class TreeVisitor(NodeVisitor):
         
         return None
     
+    # range = identifier _ "in" _ exp_singular
     def visit_range(self, node, visited_children):
-        return visited_children[0]
-    
-    def visit_range_scatter(self, node, visited_children):
         what    = visited_children[0]
         in_what = visited_children[4]
-        return Scatter(what = what, in_what = in_what)
+        return Scatter(context = self.context, what = what, in_what = in_what)
     
     def visit_statements(self, node, visited_children):
 
@@ -398,20 +454,6 @@ class TreeVisitor(NodeVisitor):
         return Assignment(identifier = identifier, value = value)
 
 
-    def visit_equation(self, node, visited_children):
-        return Algebraic(location = self.get_location(node),
-                         expression = [visited_children[0],
-                                       Bin(location="N/A", operator="="),
-                                       visited_children[4]])
-        # ~ return Equation(left = visited_children[0], right = visited_children[4])
-
-
-    def visit_builtin_call(self, node, visited_children):
-        name = visited_children[1].text
-        # ~ for n,i in enumerate(visited_children):
-            # ~ print (n, ": ", visited_children[n])
-        # ~ print (node)
-        return BuiltInCall(function_name = name, args = visited_children[5], location = self.get_location(node))
     # ~ reduction_sum      = "sum" _ "of" _ exp
     # ~ def visit_reduction_sum(self, node, visited_children):
 
@@ -455,8 +497,14 @@ class TreeVisitor(NodeVisitor):
     def visit_number_literal(self, node, visited_children):
         return visited_children[0]
 
+    # rule: array_index        = operand algebraic_tail?
     def visit_array_index(self, node, visited_children):
-        return visited_children[0]
+        tail = self.optional_node(visited_children[1])
+
+        if tail is None:
+            return visited_children[0]
+
+        return Algebraic(expression = [visited_children[0]] + tail, location = self.get_location(node))
 
     # ~ reduction          = reduction_type _ "of" _ exp_singular (_ "when" _ exp_singular)?
     def visit_reduction(self, node, visited_children):
@@ -464,7 +512,7 @@ class TreeVisitor(NodeVisitor):
         of_what  = visited_children[4]
         optional = self.optional_node(visited_children[5])
         when     = optional[3] if optional else None
-        return Reduction(type = what, of_what = of_what, when = when, location = self.get_location(node))
+        return Reduction(context = self.context, type = what, of_what = of_what, when = when, location = self.get_location(node))
     
     # ~ reduction_type     = "array" / "value" / "sum"
     def visit_reduction_type(self, node, visited_children):
@@ -478,9 +526,10 @@ class TreeVisitor(NodeVisitor):
 
         return visited_children or node
 
-    def parse(self, parsed_data, line_offset, column_offset):
+    def parse(self, parsed_data, line_offset = 0, column_offset = 0):
         self.line_offset   = line_offset
         self.column_offset = column_offset
+        self.line_index    = LineIndex(parsed_data.full_text, line_offset, column_offset)
         IR = super().visit(parsed_data)
 
         return IR
@@ -491,83 +540,193 @@ class TreeVisitor(NodeVisitor):
 
 # avoids reloading when used as service
 grammar = None
-function_tree_visitor = None
 
-def parse_file(input_text):
-    Node.nodes = {}
-    Node.node_counter = 0
+# process pool used for parsing with jobs > 1 (kept between calls)
+executor      = None
+executor_jobs = 0
+
+# "function" keywords that start functions (not the ones in "end function")
+function_keyword = re.compile(r"(?<![A-Za-z0-9_])(end\s*)?function(?![A-Za-z0-9_])")
+
+
+def load_grammar():
     # get the absolute path of the main program script
     # (so we can get correct path of files we need to load)
     import os
     path = os.path.dirname(os.path.realpath(__file__))
 
     # avoids reloading when used as service
-    global grammar, function_tree_visitor
+    global grammar
 
     if grammar == None:
-        grammar = Grammar(open(path+ "/function_grammar.ini", "r").read())
-        function_tree_visitor = TreeVisitor()
+        grammar = load_cached_grammar(path + "/function_grammar.ini")
 
-    function_matches = re.finditer("function.*?end function", input_text, re.DOTALL)
 
-    # parse functions separately:
+# splits the module into texts of separate functions, returns a list of
+# (text, line offset, column offset) or None if the module can't be split
+def split_functions(input_text):
+    starts = [m.start() for m in function_keyword.finditer(input_text)
+                        if not m.group(1)]
+
+    if not starts or input_text[:starts[0]].strip():
+        return None
 
-    parsed_functions = []
+    module_index = LineIndex(input_text)
+    ends         = starts[1:] + [len(input_text)]
+    pieces       = []
 
-    return function_tree_visitor.visit( grammar.parse(input_text) )
+    for start, end in zip(starts, ends):
+        row, column = module_index.row_column(start)
+        pieces.append((input_text[start:end], row - 1, column))
 
-    for function_text in function_matches:
+    return pieces
 
-        text  = function_text.group(0)
-        # ~ print (text)
-        start = function_text.start()
-        end   = function_text.end()
 
-        function_line_offset = input_text[:start].count("\n")
-        function_column_offset = len (  (input_text[:start].split("\n"))[-1]  )
+# parses every function on it's own, functions which are already in the cache
+# are not parsed again. Returns None if the module can't be parsed this way
+# (the whole module is parsed then, which also gives proper syntax errors)
+def parse_functions(pieces, cache, grammar):
+    functions = []
 
+    for text, line_offset, column_offset in pieces:
         try:
-            parsed_functions.append ( {"text" : grammar.parse(text) , "line_offset" : function_line_offset, "column_offset" : function_column_offset} )
-        except Exception as e:
+            tree = cache.parse(grammar, text)
+        except ParseError:
+            return None
+
+        # each piece must contain exactly one function
+        if len(tree.children) != 1:
+            return None
+
+        functions.append((tree, line_offset, column_offset))
+
+    return functions
+
+
+# runs in a worker process: parses and visits a group of functions,
+# node ids are counted per function, so they are the same as in the whole module
+def parse_function_group(pieces, locations):
+    load_grammar()
+    context = Compilation(locations)
+    visitor = TreeVisitor(context, locations)
+
+    IRs = []
+    for text, line_offset, column_offset in pieces:
+        try:
+            tree = grammar.parse(text)
+        except ParseError:
+            return None
+
+        if len(tree.children) != 1:
+            return None
+
+        IRs.extend( visitor.parse(tree, line_offset, column_offset) )
+
+    # the nodes are sent back together with the functions, so they stay the same objects
+    return IRs, context.nodes, context.node_counter
+
+
+# splits the pieces into "num_groups" groups of about the same text size
+def make_groups(pieces, num_groups):
+    total  = sum(len(piece[0]) for piece in pieces)
+    groups = [[]]
+    size   = 0
 
-            if type(e) == ParseError:
-                # since we separated the source code into function texts, we need to
-                # calculate the offset number of lines where errors occured:
+    for piece in pieces:
+        if size >= total / num_groups * len(groups):
+            groups.append([])
+        groups[-1].append(piece)
+        size += len(piece[0])
 
-                line_offset   = input_text[:start].count("\n")
-                #   we get the length of text between current symbol and
-                #   the closest newline ("\n") preceding the current function block:
-                column_offset = 0
+    return groups
 
-                # get the hopefully informative piece of text near the problematic place:
-                piece = e.text[e.pos : min (len (e.text), e.pos + 10)]
 
-                # put out our error message
-                print ("Syntax error, unexpected symbol at line: "\
-                                "%s, column: %s, \n %s" % (
-                                                               line_offset + e.line(),
-                                                               e.column() + column_offset,
-                                                               piece))
+# parses groups of functions in a process pool, returns None if
+# some function can't be parsed on it's own
+def parse_in_parallel(context, pieces, locations, jobs):
+    global executor, executor_jobs
 
-                break
+    if executor == None or executor_jobs != jobs:
+        if executor: executor.shutdown()
+        from concurrent.futures import ProcessPoolExecutor
+        executor      = ProcessPoolExecutor(max_workers = jobs)
+        executor_jobs = jobs
 
-            else:
-                raise e
+    # a few groups per worker evens out functions of different size
+    groups  = make_groups(pieces, jobs * 4)
+    # any failure in the workers makes parse_file parse the module in this process,
+    # so errors are reported the same way with or without jobs
+    try:
+        results = list(executor.map(parse_function_group, groups, [locations] * len(groups)))
+    except Exception:
+        return None
 
-    # translate functions separately:
+    if None in results:
+        return None
 
     IRs = []
+    for functions, nodes, node_count in results:
+        context.nodes.update(nodes)
+        context.node_counter  += node_count
+        context.function_start = context.node_counter
+
+        for function in functions:
+            context.functions[function.function_name] = function
+
+        IRs.extend(functions)
+
+    return IRs
+
+
+# The nodes are created in "context" (a Compilation, see ast_/compilation.py,
+# a new one is made if it's not given), the same context has to be passed
+# to emit_json then. Modules can be parsed in several threads at once
+# as long as each of them has it's own context.
+# locations = False leaves source locations out of the AST and the IR,
+# with a ParseCache given the module is parsed function by function
+# and only functions that changed since the last call are re-parsed,
+# jobs > 1 parses functions in that many processes (without a cache).
+# engine = "rd" uses the hand-written parser (parser/rd_parser.py)
+# instead of parsimonious, cache and jobs are not used with it.
+# With a GrammarProfile (parser/grammar_profiler.py) given, the module is
+# parsed with a copy of the grammar that records per-rule stats into it
+# (in this process, so jobs is not used)
+def parse_file(input_text, locations = True, cache = None, jobs = 1, engine = "peg", profile = None, context = None):
+    if context is None:
+        context = Compilation()
+    context.locations = locations
+
+    if engine == "rd":
+        return RDParser(input_text, context, locations).parse_module()
+    elif engine != "peg":
+        raise Exception("unknown parser engine: %s" % engine)
 
-    for parsed_function in parsed_functions:
-        parsed = function_tree_visitor.parse(
-                                            parsed_function["text"] ,
-                                            parsed_function["line_offset"],
-                                            parsed_function["column_offset"]
-                                            )
-        # ~ IRs.append( parsed.emit_json(None) )
-        IRs.append( parsed )
+    load_grammar()
+
+    parser_grammar = profile.instrument(grammar) if profile else grammar
+    if profile:
+        jobs = 1
+
+    pieces = split_functions(input_text) if cache or jobs > 1 else None
+
+    if pieces and not cache and jobs > 1:
+        IRs = parse_in_parallel(context, pieces, locations, jobs)
+        if IRs is not None:
+            return IRs
+
+    parsed_functions = parse_functions(pieces, cache, parser_grammar) if pieces and cache else None
+
+    visitor = TreeVisitor(context, locations)
+
+    if parsed_functions is None:
+        return visitor.parse( parser_grammar.parse(input_text) )
+
+    # functions are visited in the same order as in the whole module,
+    # so they get the same node ids and locations
+    IRs = []
 
-    # ~ return {"functions":IRs}
+    for tree, line_offset, column_offset in parsed_functions:
+        IRs.extend( visitor.parse(tree, line_offset, column_offset) )
 
     return IRs
 
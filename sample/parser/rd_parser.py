@@ -0,0 +1,624 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  rd_parser.py
+#
+#  Copyright 2021 alexm
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Tokenizer and recursive descent parser for the grammar in
+# function_grammar.ini (parse_file(..., engine = "rd")).
+#
+# It builds exactly the same ast_.node objects as TreeVisitor does
+# with the parsimonious grammar: the same fields in the same order,
+# the same locations and the nodes are created in the same order (so
+# they get the same ids). The methods below follow the grammar's
+# rules, the rule is quoted above each of them.
+#
+# Differences from the PEG: keywords are whole words here (the PEG would
+# read "whenx" as "when x", only "old" is handled like that), real number
+# literals are not accepted (the PEG has no visitor for them) and syntax
+# errors point at the token the parser stopped at.
+
+import re
+
+from ast_.node             import *
+from ast_.location         import Location
+from sisal_type.sisal_type import *
+from parser.line_index     import LineIndex
+
+
+# whitespace, then an identifier, a number, a symbol or a character the grammar doesn't have
+token_re = re.compile(r"\s*(?:([A-Za-z_][A-Za-z0-9_]*)|([0-9]+)|(:=|<=|>=|\|\||[-+*/^|<>=()\[\],;:])|(\S))")
+
+bin_ops = {"+", "-", "<=", ">=", "<", ">", "*", "/", "^", "||", "|"}
+
+# token kinds (the numbers of the groups in token_re)
+IDENTIFIER = 1
+NUMBER     = 2
+SYMBOL     = 3
+OTHER      = 4
+END        = 5
+
+
+class ParseFailure(Exception):
+    pass
+
+
+# returns a list of tokens: (kind, text, start, end), the last one is an END token
+# placed at the end of the text (or at the first character that can't be a token)
+def tokenize(text):
+    tokens = []
+    pos    = 0
+    match  = token_re.match
+
+    while True:
+        m = match(text, pos)
+        if m is None:
+            pos = len(text)
+            break
+
+        kind = m.lastindex
+        start, end = m.span(kind)
+
+        if kind == OTHER:
+            pos = start
+            break
+
+        tokens.append((kind, m.group(kind), start, end))
+        pos = end
+
+    tokens.append((END, "", pos, pos))
+    return tokens
+
+
+class RDParser:
+
+    # context: the Compilation (ast_/compilation.py) the nodes are created in,
+    # line_offset and column_offset: where "text" starts in the module (see LineIndex)
+    def __init__(self, text, context, locations = True, line_offset = 0, column_offset = 0):
+        self.text       = text
+        self.context    = context
+        self.locations  = locations
+        self.line_index = LineIndex(text, line_offset, column_offset)
+
+        self.tokens   = tokenize(text)
+        self.pos      = 0
+        # end of the last token taken
+        self.last_end = 0
+
+    #----------------------------------------------------
+    # helpers
+    #----------------------------------------------------
+
+    # the error is at the next token if "pos" is not given
+    def error(self, pos = None):
+        if pos is None:
+            pos = self.tokens[self.pos][2]
+        row, column = self.line_index.row_column(pos)
+        # get the hopefully informative piece of text near the problematic place:
+        piece = self.text[pos : pos + 10]
+        return ParseFailure("Syntax error, unexpected symbol at line: "\
+                            "%s, column: %s, \n %s" % (row, column, piece))
+
+    def get_location(self, start, end):
+        if not self.locations:
+            return None
+        return Location(self.line_index, start, end)
+
+    def peek(self, ahead = 0):
+        index = self.pos + ahead
+        return self.tokens[index] if index < len(self.tokens) else self.tokens[-1]
+
+    def text_at(self, ahead = 0):
+        return self.peek(ahead)[1]
+
+    def take(self):
+        token = self.tokens[self.pos]
+        if token[0] == END:
+            raise self.error()
+        self.pos     += 1
+        self.last_end = token[3]
+        return token
+
+    def expect(self, text):
+        token = self.tokens[self.pos]
+        if token[1] != text or token[0] == END:
+            raise self.error()
+        return self.take()
+
+    def expect_identifier(self):
+        if self.tokens[self.pos][0] != IDENTIFIER:
+            raise self.error()
+        return self.take()
+
+    # start of the next token (the end of a rule that ends with "_")
+    def next_start(self):
+        return self.tokens[self.pos][2]
+
+    #----------------------------------------------------
+    # module and functions
+    #----------------------------------------------------
+
+    # module = ( (_ function_import _) / (_ function _) )*
+    def parse_module(self):
+        functions = []
+
+        while self.tokens[self.pos][0] != END:
+            functions.append(self.function())
+
+        # a character that isn't part of any token
+        if self.tokens[self.pos][2] != len(self.text):
+            raise self.error()
+
+        # whitespace is only taken together with a function, so a module
+        # of nothing but whitespace doesn't match (as in the PEG)
+        if not functions and self.text:
+            raise self.error(0)
+
+        return functions
+
+    # function        = _ "function" _ identifier _ lpar _ function_arguments _
+    #                         function_retvals _ rpar _ exp _ "end" _ "function" _
+    # function_import = _ "function" _ identifier _  "[" _ type_list _ function_retvals _ "]" _
+    def function(self):
+        start = self.expect("function")[2]
+        name  = self.identifier().name
+
+        if self.text_at() == "[":
+            return self.function_import(start, name)
+
+        self.expect("(")
+        arguments = self.function_arguments()
+        ret_types = self.function_retvals()
+        self.expect(")")
+
+        function_body = self.exp()
+
+        self.expect("end")
+        self.expect("function")
+
+        params = dict(
+                        name          = "Lambda",
+                        function_name = name,
+                        nodes         = function_body,
+                        location      = self.get_location(start, self.next_start()),
+                        params        = arguments if arguments else [],
+                        ret_types     = ret_types if ret_types else [VoidType()]
+                      )
+
+        return Function(context = self.context, **params)
+
+    def function_import(self, start, name):
+        self.expect("[")
+        params_types = self.type_list()
+        ret_types    = self.function_retvals()
+        self.expect("]")
+
+        params = []
+
+        for index, type_ in enumerate(params_types):
+            identifier = Identifier(name = "arg" + str(index), location = "parameters - not available")
+            params.append({
+                           "type" : type_,
+                           "vars" : [identifier]
+                          })
+
+        return FunctionImport(context = self.context, **dict(
+                                        name = "Import",
+                                        function_name = name,
+                                        params        = params,
+                                        ret_types     = ret_types,
+                                        location      = self.get_location(start, self.next_start()),
+                                        nodes         = [],
+                                        edges         = []
+                                    )
+                             )
+
+    # function_arguments = args_groups_list / _
+    # args_groups_list   = arg_def_group (_ ";" _ arg_def_group)*
+    def function_arguments(self):
+        # argument groups don't create numbered nodes,
+        # so it's safe to go back if a group doesn't match
+        saved = self.pos
+        try:
+            groups = [self.arg_def_group()]
+        except ParseFailure:
+            self.pos = saved
+            return None
+
+        while self.text_at() == ";":
+            saved = self.pos
+            self.take()
+            try:
+                groups.append(self.arg_def_group())
+            except ParseFailure:
+                self.pos = saved
+                break
+
+        return groups
+
+    # arg_def_group = arg_def_list _ ":" _ type
+    # arg_def_list  = identifier (_ "," _ identifier)*
+    def arg_def_group(self):
+        var_names = [self.identifier()]
+
+        while self.text_at() == "," and self.peek(1)[0] == IDENTIFIER:
+            self.take()
+            var_names.append(self.identifier())
+
+        self.expect(":")
+        type_ = self.type()
+
+        return dict(type = type_, vars = var_names)
+
+    # function_retvals = ("returns" _ type_list) / _
+    def function_retvals(self):
+        if self.text_at() != "returns":
+            return None
+        self.take()
+        return self.type_list()
+
+    # type_list = type (_ "," _ type)*
+    def type_list(self):
+        types = [self.type()]
+        while self.text_at() == ",":
+            self.take()
+            types.append(self.type())
+        return types
+
+    # type     = array / std_type
+    # array    = "array" _ "of" _ type
+    # std_type = "integer" / "real" / "boolean"
+    def type(self):
+        kind, text, start, end = self.peek()
+
+        if text == "array" and self.text_at(1) == "of":
+            self.take()
+            self.take()
+            element_type = self.type()
+            return ArrayType(element_type, self.get_location(start, self.last_end))
+
+        if text == "integer":
+            self.take()
+            return IntegerType(self.get_location(start, end))
+        elif text == "real":
+            self.take()
+            return RealType(self.get_location(start, end))
+        elif text == "boolean":
+            # TreeVisitor has no type object for "boolean" either
+            self.take()
+            return None
+
+        raise self.error()
+
+    #----------------------------------------------------
+    # expressions
+    #----------------------------------------------------
+
+    # exp = exp_singular (_ "," _ exp_singular)*
+    def exp(self):
+        expressions = [self.exp_singular()]
+        while self.text_at() == ",":
+            self.take()
+            expressions.append(self.exp_singular())
+        return expressions
+
+    # exp_singular = loop / if / let / old_call / expression
+    # expression   = operand expression_tail?
+    def exp_singular(self):
+        text = self.text_at()
+
+        if text == "for":
+            return self.loop()
+        if text == "if":
+            return self.if_()
+        if text == "let":
+            return self.let()
+
+        # old_call = &~"old(?i:[a-z_])" call
+        if (text.startswith("old") and len(text) > 3 and not text[3].isdigit()
+                                   and self.text_at(1) == "("):
+            return self.call()
+
+        start   = self.peek()[2]
+        operand = self.operand()
+        text    = self.text_at()
+
+        # equation_tail = _ "=" _ operand
+        if text == "=":
+            self.take()
+            right = self.operand()
+            return Algebraic(location = self.get_location(start, self.last_end),
+                             expression = [operand,
+                                           Bin(context = self.context, location="N/A", operator="="),
+                                           right])
+
+        if text in bin_ops:
+            return self.algebraic(operand, start)
+
+        return operand
+
+    # algebraic = operand algebraic_tail
+    def algebraic(self, operand = None, start = None):
+        if operand is None:
+            start   = self.peek()[2]
+            operand = self.operand()
+
+        expression = [operand]
+
+        if not self.text_at() in bin_ops:
+            raise self.error()
+
+        while self.text_at() in bin_ops:
+            kind, text, op_start, op_end = self.take()
+            operator = Bin(context  = self.context,
+                           location = self.get_location(op_start, op_end),
+                           operator = text)
+            expression += [operator] + [self.operand()]
+
+        return Algebraic(expression = expression, location = self.get_location(start, self.last_end))
+
+    # operand = brackets_algebraic / old / call / name / number_literal
+    def operand(self):
+        kind, text, start, end = self.peek()
+
+        # brackets_algebraic = lpar _ algebraic _ rpar
+        if text == "(" and kind == SYMBOL:
+            self.take()
+            algebraic = self.algebraic()
+            self.expect(")")
+            return algebraic
+
+        if kind == IDENTIFIER:
+            next_text = self.text_at(1)
+
+            # old = "old" _ identifier
+            if text == "old" and self.peek(1)[0] == IDENTIFIER:
+                self.take()
+                return OldValue( context  = self.context,
+                                 name     = self.identifier(),
+                                 location = self.get_location(start, self.last_end))
+
+            # the PEG reads "old_v" as "old _v" too
+            if text.startswith("old") and len(text) > 3 and not text[3].isdigit():
+                self.take()
+                name = Identifier(name = text[3:], location = self.get_location(start + 3, end))
+                return OldValue( context  = self.context,
+                                 name     = name,
+                                 location = self.get_location(start, end))
+
+            if next_text == "[":
+                return self.array_access()
+
+            # callee = ~"(?!(?-i:function))[a-z_][a-z0-9_]*"i
+            if next_text == "(" and not text.startswith("function"):
+                if text == "size":
+                    return self.builtin_call()
+                return self.call()
+
+            return self.identifier()
+
+        # number_literal_int = ~"[0-9]+"
+        if kind == NUMBER:
+            self.take()
+            return Literal(context = self.context, value = text, location = self.get_location(start, end), type = IntegerType())
+
+        raise self.error()
+
+    # identifier = ~"[a-z_][a-z0-9_]*"i
+    def identifier(self):
+        kind, text, start, end = self.expect_identifier()
+        return Identifier(name = text, location = self.get_location(start, end))
+
+    # args_list = exp_singular (_ "," _ exp_singular)*
+    def args_list(self):
+        args = [self.exp_singular()]
+        while self.text_at() == ",":
+            self.take()
+            args.append(self.exp_singular())
+        return args
+
+    # call = callee _ lpar _ args_list _ rpar
+    def call(self):
+        start         = self.peek()[2]
+        function_name = self.identifier()
+        self.expect("(")
+        args = self.args_list()
+        self.expect(")")
+
+        return Call(context       = self.context,
+                    function_name = function_name,
+                    args          = args,
+                    location      = self.get_location(start, self.last_end))
+
+    # calls of "size" (the grammar has them in call too)
+    def builtin_call(self):
+        kind, name, start, end = self.take()
+        self.expect("(")
+        args = self.args_list()
+        self.expect(")")
+
+        return BuiltInCall(context = self.context, function_name = name, args = args, location = self.get_location(start, self.last_end))
+
+    # name          = identifier array_indices?
+    # array_indices = (_ "[" _ array_index _ "]")+
+    # array_index   = operand algebraic_tail?
+    def array_access(self):
+        start      = self.peek()[2]
+        array_name = self.identifier().name
+
+        indices = []
+        while self.text_at() == "[":
+            self.take()
+            index_start = self.peek()[2]
+            index       = self.operand()
+            if self.text_at() in bin_ops:
+                index = self.algebraic(index, index_start)
+            indices.append(index)
+            self.expect("]")
+
+        location = self.get_location(start, self.last_end)
+
+        # the same "nested doll" as TreeVisitor.visit_name makes
+        def make_array(index = 0, array_index = 0):
+            if index < len(indices):
+                return ArrayAccess(
+                                context  = self.context,
+                                name     = array_name,
+                                location = location,
+                                index    = indices[index],
+                                subarray = make_array(index + 1, array_index + 1),
+                                array_index = array_index
+                            )
+
+        array = make_array()
+        array.inline_indices = indices #save it for LLVM
+        return array
+
+    #----------------------------------------------------
+    # if, let and loops
+    #----------------------------------------------------
+
+    # if = "if" _ exp _ "then" _ exp _ ("elseif" _ exp _ "then" _ exp _)*  (_ "else" _ exp )? _ "end" _ "if"
+    def if_(self):
+        start = self.take()[2]
+
+        condition_nodes = self.exp()
+        self.expect("then")
+        then_nodes = self.exp()
+
+        elseifs = []
+        while self.text_at() == "elseif":
+            self.take()
+            # as in TreeVisitor, only the first expression of the condition is used
+            condition_nodes.append(self.exp()[0])
+            self.expect("then")
+            elseifs.append(self.exp())
+
+        else_nodes = []
+        if self.text_at() == "else":
+            self.take()
+            else_nodes = self.exp()
+
+        self.expect("end")
+        self.expect("if")
+
+        return If(
+                        context      = self.context,
+                        conditions   = condition_nodes,
+                        then_nodes   = then_nodes,
+                        elseif_nodes = elseifs,
+                        else_nodes   = else_nodes,
+                        location     = self.get_location(start, self.last_end),
+                    )
+
+    # let = "let" _ statements _ "in" _ exp _ "end" _ "let"
+    def let(self):
+        start = self.take()[2]
+        init  = self.statements()
+        self.expect("in")
+        body  = self.exp()
+        self.expect("end")
+        self.expect("let")
+
+        return Let(
+                    context    = self.context,
+                    init = init,
+                    body = body,
+                    location   = self.get_location(start, self.last_end)
+                  )
+
+    # statements = (statement _ )*
+    # statement  = assignment / dummy
+    # assignment = identifier _ ":=" _ exp_singular _ (";" / _)
+    def statements(self):
+        statements = []
+
+        while self.peek()[0] == IDENTIFIER:
+            if self.text_at(1) == ":=":
+                identifier = self.identifier()
+                self.take()
+                value = self.exp_singular()
+                if self.text_at() == ";":
+                    self.take()
+                statements.append(Assignment(identifier = identifier, value = value))
+            elif self.text_at() == "dummy":
+                # TreeVisitor leaves it as the matched text too
+                statements.append(self.take()[1])
+            else:
+                break
+
+        return statements
+
+    # loop = "for" _ range? _ initial? _ while? _ returns? _ "end" _ "for"
+    def loop(self):
+        start = self.take()[2]
+
+        # range = identifier _ "in" _ exp_singular
+        range_ = None
+        if self.peek()[0] == IDENTIFIER and self.text_at(1) == "in":
+            what = self.identifier()
+            self.take()
+            in_what = self.exp_singular()
+            range_ = Scatter(context = self.context, what = what, in_what = in_what)
+
+        # initial = "let" _ statements
+        # (TreeVisitor keeps all of the rule's parts here)
+        init = None
+        if self.text_at() == "let":
+            init = [self.take()[1], None, self.statements()]
+
+        # while_do = "while" _ exp_singular _ "do" _ statements
+        # do_while = "do" _ exp_singular _ "while" _ statements
+        # (parsed, but not used in the AST yet)
+        if self.text_at() in ("while", "do"):
+            closing = "do" if self.take()[1] == "while" else "while"
+            self.exp_singular()
+            self.expect(closing)
+            self.statements()
+
+        # returns = "returns" _ reduction
+        returns = None
+        if self.text_at() == "returns":
+            self.take()
+            returns = self.reduction()
+
+        self.expect("end")
+        self.expect("for")
+
+        return Loop(context = self.context, range = range_, init = init, while_ = None, returns = returns, location = self.get_location(start, self.last_end))
+
+    # reduction      = reduction_type _ "of" _ exp (_ "when" _ exp_singular)?
+    # reduction_type = "array" / "value" / "sum"
+    def reduction(self):
+        kind, what, start, end = self.peek()
+        if not what in ("array", "value", "sum"):
+            raise self.error()
+        self.take()
+
+        self.expect("of")
+        of_what = self.exp()
+
+        when = None
+        if self.text_at() == "when":
+            self.take()
+            when = self.exp_singular()
+
+        return Reduction(context = self.context, type = what, of_what = of_what, when = when, location = self.get_location(start, self.last_end))
@@ -24,12 +24,13 @@
 
 import os, json, re
 from compiler.json_parser import *
+from ir.binary import is_binary_ir, load as load_binary_ir
 
 
 def main(args):
 
     if ( len( args ) < 2 ):
-        print ( "usage: python sisal_compile_ir.py ir.json / ir.gml" )
+        print ( "usage: python sisal_compile_ir.py ir.json / ir.gml / ir.sir" )
     else:
         if "--debug" in args:
             from IPython.core import ultratb
@@ -37,7 +38,12 @@ def main(args):
             sys.excepthook = ultratb.ColorTB()
         input_file_name = args[1]
         try:
-            file_contents = open(input_file_name, "r").read()
+            # binary IR (see ir/binary.py) is mapped into memory instead of being read,
+            # JSON IR is read and compiled a function at a time (see ir/json_stream.py)
+            if is_binary_ir(input_file_name):
+                ir_file = None
+            else:
+                ir_file = open(input_file_name, "r")
         except:
             # TODO make sure to isolate I/O error from malformed commandline parameters
             print ("error reading %s" % input_file_name)
@@ -48,11 +54,19 @@ def main(args):
             module_name = input_file_name.split("/")[-1]
             module_name = re.sub("\..*", ".ll", module_name)
 
-            ir_data = json.loads(file_contents)
-
-            module_name = re.search("([a-zA-Z_0-9.]*)\.json",input_file_name).group(1)
-
-            print (compile_to_cpp(ir_data, module_name))
+            if ir_file is None:
+                ir_data     = load_binary_ir(input_file_name)
+                module_name = re.search("([a-zA-Z_0-9.]*)\.sir",input_file_name).group(1)
+                print (compile_to_cpp(ir_data, module_name))
+            else:
+                module_name = re.search("([a-zA-Z_0-9.]*)\.json",input_file_name).group(1)
+                # the C++ code of every function is written as soon as it's compiled,
+                # if the compilation fails the error goes after the code written so far
+                with ir_file:
+                    try:
+                        stream_to_cpp(ir_file, module_name, out = sys.stdout)
+                    finally:
+                        print ()
 
         except Exception as e:
             if "--debug" in args:
@@ -27,17 +27,20 @@ import json
 import sys
 
 
-from parser.parse_file import parse_file
+from parser.parse_file   import parse_file
+from ast_.compilation    import Compilation
+from ast_.location       import RELATIVE
+from exporters.ir_writer import write_ir, ir_chunks
 
 
-def parse(input_text):
-    return parse_file(input_text)
+def parse(input_text, locations = True, jobs = 1, engine = "peg", profile = None, context = None):
+    return parse_file(input_text, locations, jobs = jobs, engine = engine, profile = profile, context = context)
 
 
 def main(args):
 
     if (len(args) < 2):
-        print("usage: python sisal_parse.py source_code.sis")
+        print("usage: python sisal_parse.py source_code.sis [--graph] [--color] [--no-locations] [--relative-locations] [--compact] [--dialect compact] [--binary ir.sir] [--jobs N] [--engine peg|rd] [--profile-grammar [report.txt]] [--check-types] [--debug]")
     else:
 
         input_file_name = args[1]
@@ -62,11 +65,41 @@ def main(args):
                 styles = list(get_all_styles())
                 color_style = styles[14] if len(styles) > 15 else styles[0]
 
-            output = parse(file_contents)
+            # --no-locations leaves source locations out of the IR (makes it smaller)
+            # --relative-locations counts the rows of locations from the function's first line
+            #   (the functions' first lines are in the module's "lines"), so the IR of
+            #   a function doesn't change when the code before it does
+            # --compact writes the IR without indentation
+            # --dialect compact writes the compact dialect of the IR (ir/compact.py)
+            # --binary ir.sir writes the binary IR (ir/binary.py) to a file instead
+            # --jobs N parses functions in N processes
+            # --engine rd uses the hand-written recursive descent parser
+            jobs   = int(args[args.index("--jobs") + 1]) if "--jobs" in args else 1
+            engine = args[args.index("--engine") + 1] if "--engine" in args else "peg"
+
+            # --profile-grammar writes per-rule parsing stats to stderr (or a file)
+            profile = None
+            if "--profile-grammar" in args:
+                from parser.grammar_profiler import GrammarProfile
+                profile = GrammarProfile()
+
+            # --check-types writes a warning to stderr for every edge connecting
+            # ports of different types (see check_type_matching in exporters/json.py)
+            locations = False if "--no-locations" in args else RELATIVE if "--relative-locations" in args else True
+
+            context = Compilation(check_types = "--check-types" in args)
+            output  = parse(file_contents, locations, jobs, engine, profile, context)
+
+            if profile:
+                report_index = args.index("--profile-grammar") + 1
+                if report_index < len(args) and not args[report_index].startswith("--"):
+                    profile.write(args[report_index])
+                else:
+                    print(profile.report(), file = sys.stderr)
 
             if "--graph" in args:
                 from exporters.graphml import make_document
-                graphs = "\n".join([o.emit_graphml(None) for o in output])
+                graphs = "\n".join([o.emit_graphml(context, None) for o in output])
                 graphml_text = make_document(graphs)
 
                 if "--color" in args:
@@ -74,19 +107,27 @@ def main(args):
                     print(colored_graphml)
                 else:
                     print (graphml_text)
+            elif "--binary" in args:
+                from exporters.json import export_module_to_store
+                from ir             import binary
+
+                with open(args[args.index("--binary") + 1], "wb") as ir_file:
+                    binary.dump(export_module_to_store(context, output), ir_file)
             else:
+                indent  = None if "--compact" in args else 2
+                dialect = args[args.index("--dialect") + 1] if "--dialect" in args else None
 
-                formatted = json.dumps(
-                                        dict(
-                                             functions = [o.emit_json(None) for o in output],
-                                             declarations = {}
-                                            ),
-                                       indent = 2)
                 if "--color" in args:
+                    formatted    = "".join(ir_chunks(context, output, indent, dialect = dialect))
                     colored_json = highlight(formatted, lexers.JsonLexer(), formatters.Terminal256Formatter(style=color_style))
                     print(colored_json)
                 else:
-                    print( formatted )
+                    # functions are written as soon as they are exported
+                    write_ir(context, output, sys.stdout, indent, dialect)
+                    print()
+
+            for mismatch in context.type_mismatches:
+                print("warning: " + mismatch, file = sys.stderr)
 
         except Exception as e:
             if "--debug" in args:
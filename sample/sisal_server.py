@@ -26,34 +26,91 @@
 
 from wsgiref.simple_server import make_server
 import json
+import itertools
 
 import time
 
-from parser.parse_file import parse_file
-from compiler.json_parser import compile_to_cpp
+from parser.parse_file  import parse_file
+from parser.parse_cache import ParseCache
+from ast_.compilation   import Compilation
+from exporters.ir_writer import ir_chunks
+from compiler.json_parser import compile_ir
+from compiler.backends    import get_backend
 
 
-def parse(input_text):
-    return parse_file(input_text)
+def parse(input_text, locations = True):
+    return parse_file(input_text, locations)
 
 
-def parse_sisal(code):
-    t = time.time()
-    parsed = parse_file(code)
-    formatted = json.dumps(
-                            dict(functions=[o.emit_json(None) for o in parsed],
-                                 declarations={}),
-                            indent=1
-                          )
-    print("finished in ", round((time.time() - t), 3))
-    return formatted
+# functions that didn't change between requests are not parsed again
+parse_cache = ParseCache()
 
 
-def compile_sisal(ir_data):
+# parses the module and returns a generator of the IR's text, the functions
+# are exported while the text is being sent (compact = True: without indentation,
+# dialect = "compact": the compact dialect, see ir/compact.py)
+def parse_sisal(code, locations = True, compact = False, dialect = None):
     t = time.time()
-    cpp_code = str(compile_to_cpp(json.loads(ir_data), "module"))
+    # every request gets it's own compilation
+    context = Compilation()
+    parsed = parse_file(code, locations, parse_cache, context = context)
+    print(parse_cache.report())
+
+    def export():
+        yield from ir_chunks(context, parsed, None if compact else 1, dialect = dialect)
+        print("finished in ", round((time.time() - t), 3))
+
+    return export()
+
+
+# the IR of the modules is exported before the response is started (up to
+# prefetch_size characters in all), errors found while exporting (like a value
+# that's not in the scope) get "400 ERROR" the same way syntax errors do.
+# Only the IR after the first prefetch_size characters is exported while it's
+# being sent, so the memory used stays bounded for large modules
+prefetch_size = 1 << 24
+
+
+# exports the beginning of every module's IR, returns the generators of the
+# whole IR text (the exported chunks followed by the rest)
+def prefetch(modules, size = None):
+    size   = prefetch_size if size is None else size
+    result = []
+
+    for chunks in modules:
+        exported = []
+        for chunk in chunks:
+            exported.append(chunk)
+            size -= len(chunk)
+            if size <= 0:
+                break
+        result.append(itertools.chain(exported, chunks))
+
+    return result
+
+
+# the response for "parse": a JSON list with the IR of every module as a string
+# (what json.dumps(list of IR texts) gives), sent while the IR is being exported
+def stream_parsed(modules):
+    yield b"["
+    for n, chunks in enumerate(modules):
+        yield b'"' if n == 0 else b', "'
+        for chunk in chunks:
+            # escapes the chunk the way json.dumps escapes the whole string
+            yield json.dumps(chunk)[1:-1].encode()
+        yield b'"'
+    yield b"]"
+    print("done")
+
+
+# backend is the name of the code generator (see compiler/backends.py),
+# the backends stay loaded between requests. scheduling_policy is the name of
+# a policy in compiler/scheduler.py's POLICIES (None is depth_first)
+def compile_sisal(ir_data, backend = "C++", scheduling_policy = None):
+    t = time.time()
+    code = str(compile_ir(json.loads(ir_data), "module", backend, scheduling_policy))
     print("finished in ", round((time.time() - t), 3))
-    return cpp_code
+    return code
 
 
 def service(environment, responce):
@@ -76,6 +133,17 @@ def service(environment, responce):
             else:
                 inputCode = data["code"]
             operation = data["operation"]
+            # optional, "false" leaves source locations out of the IR,
+            # "relative" counts their rows from the function's first line
+            locations = data.get("locations", True)
+            # optional, "true" writes the IR without indentation
+            compact   = data.get("compact", False)
+            # optional, "compact" gives the compact dialect of the IR
+            dialect   = data.get("dialect", None)
+            # optional, the code generator used by "compile"
+            backend   = data.get("backend", "C++")
+            # optional, the order "compile" emits the code in (see compiler/scheduler.py)
+            policy    = data.get("scheduling_policy", None)
 
     except ValueError:
         return resp("400 ERROR", "error in request")
@@ -85,10 +153,14 @@ def service(environment, responce):
 
         print(str(len(inputCode)) + " modules received, compiling...")
 
+        if operation == "parse":
+            # modules are parsed and exported before responding (see prefetch)
+            modules = prefetch([parse_sisal(c, locations, compact, dialect) for c in inputCode])
+            responce("200 OK", [("Content-type", "application/json; charset=utf-8")])
+            return stream_parsed(modules)
+
         for c in inputCode:
-            output_codes.append(
-                parse_sisal(c) if operation == "parse" else compile_sisal(c)
-            )
+            output_codes.append(compile_sisal(c, backend, policy))
 
         print("done")
         return resp("200 OK", json.dumps(output_codes))
@@ -99,6 +171,8 @@ def service(environment, responce):
 
 
 def main(args):
+    # the C++ code generator is loaded before the first request
+    get_backend("C++")
     server = make_server("", 12345, service)
     print("serving...")
     server.serve_forever()
@@ -22,7 +22,9 @@
 #
 #
 
-from llvmlite import ir, binding
+import threading
+
+from ast_.location import location_field, settings
 
 built_in_types = ["integer", "real"]
 
@@ -50,66 +52,202 @@ built_in_types = ["integer", "real"]
           # ~ }
 
 #-------------------------------------------------------------------------------------------
+
+# Types are hash-consed: every distinct Sisal type ("integer", "array of real"...)
+# is one canonical object with a small integer id (type_id), so comparing types
+# is comparing canonical objects with "is".
+# A type written in the program also has a location, it's a separate object
+# that points to it's canonical type and is equal to it.
+# Types are never changed after creation, their JSON is made once and shared
+# (don't modify dicts returned by emit_json).
+
+NOT_APPLICABLE = "not applicable"
+
+
 class BaseType:
-    pass
+
+    __slots__ = ("canonical", "type_id", "location", "element_type", "json")
+
+    canonical_types = {}  # (class, canonical element type) -> canonical type
+    by_id           = []  # type_id -> canonical type
+    lock            = threading.Lock()
+
+    @staticmethod
+    def make(cls, element_type, location):
+        element = element_type.canonical if element_type is not None else None
+        key     = (cls, element)
+
+        canonical = BaseType.canonical_types.get(key)
+        if canonical is None:
+            with BaseType.lock:
+                canonical = BaseType.canonical_types.get(key)
+                if canonical is None:
+                    canonical = BaseType.new(cls, None, len(BaseType.by_id), NOT_APPLICABLE, element)
+                    BaseType.by_id.append(canonical)
+                    BaseType.canonical_types[key] = canonical
+
+        # (an array of a located type has a location inside)
+        if location == NOT_APPLICABLE and element_type is element:
+            return canonical
+
+        return BaseType.new(cls, canonical, canonical.type_id, location, element_type)
+
+    @staticmethod
+    def new(cls, canonical, type_id, location, element_type):
+        type_ = object.__new__(cls)
+        object.__setattr__(type_, "canonical",    canonical or type_)
+        object.__setattr__(type_, "type_id",      type_id)
+        object.__setattr__(type_, "location",     location)
+        object.__setattr__(type_, "element_type", element_type)
+        object.__setattr__(type_, "json",         {})
+        return type_
+
+    def __setattr__(self, name, value):
+        raise AttributeError("types can't be changed")
+
+    def __eq__(self, other):
+        return isinstance(other, BaseType) and self.canonical is other.canonical
+
+    def __hash__(self):
+        return self.type_id
+
+    # copies (and unpickled types in another process) are interned again
+    def __reduce__(self):
+        return type(self), (self.location,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, self.location)
+
+    def __str__(self):
+        return self.name
+
+    # the JSON is cached for every value of settings.emit_locations (and of
+    # settings.line_base for the relative locations, canonical types have none)
+    def emit_json(self):
+        line_base = None if self.canonical is self else getattr(settings, "line_base", None)
+        key       = (getattr(settings, "emit_locations", True), line_base)
+        json = self.json.get(key)
+        if json is None:
+            json = self.json[key] = self.make_json()
+        return json
+
 
 class NumberType(BaseType):
-    pass
+    __slots__ = ()
 
 class IntegerType(NumberType):
 
-    def __init__(self, location = "not applicable"):
-        self.location = location
+    __slots__ = ()
+    name      = "integer"
 
-    def emit_json(self):
-        return dict(location = self.location , name = "integer")
+    def __new__(cls, location = NOT_APPLICABLE):
+        return BaseType.make(cls, None, location)
+
+    def make_json(self):
+        return dict(**location_field(self.location), name = "integer")
 
     def emit_llvm(self):
+        # llvmlite is only needed by the LLVM code generator
+        from llvmlite import ir
         return ir.IntType(32)
 
 class VoidType(BaseType):
 
-    def __init__(self, location = "not applicable"):
-        self.location = location
+    __slots__ = ()
+    name      = "void"
 
-    def emit_json(self):
-        return dict(location = self.location , name = "void")
+    def __new__(cls, location = NOT_APPLICABLE):
+        return BaseType.make(cls, None, location)
+
+    def make_json(self):
+        return dict(**location_field(self.location), name = "void")
 
     def emit_llvm(self):
+        from llvmlite import ir
         return ir.VoidType()
 
 class RealType(NumberType):
 
-    def __init__(self, location = "not applicable"):
-        self.location = location
+    __slots__ = ()
+    name      = "real"
 
-    def emit_json(self):
-        return dict(location = self.location , name = "real")
+    def __new__(cls, location = NOT_APPLICABLE):
+        return BaseType.make(cls, None, location)
+
+    def make_json(self):
+        return dict(**location_field(self.location), name = "real")
 
 class BooleanType(NumberType):
 
-    def __init__(self, location = "not applicable"):
-        self.location = location
+    __slots__ = ()
+    name      = "boolean"
 
-    def emit_json(self):
-        return dict(location = self.location , name = "boolean")
+    def __new__(cls, location = NOT_APPLICABLE):
+        return BaseType.make(cls, None, location)
+
+    def make_json(self):
+        return dict(**location_field(self.location), name = "boolean")
 
 class ArrayType(BaseType):
 
-    def __init__(self, element_type, location = "not applicable"):
-        self.element_type = element_type
-        self.location = location
+    __slots__ = ()
 
-    def emit_json(self):
-        return dict(location = self.location , element = self.element_type if type(self.element_type) == dict else self.element_type.emit_json())
+    @property
+    def name(self):
+        return "array of %s" % self.element_type
 
-class CustomType:
+    # element_type can also be a type's JSON
+    def __new__(cls, element_type, location = NOT_APPLICABLE):
+        if type(element_type) == dict:
+            element_type = type_from_json(element_type)
+        return BaseType.make(cls, element_type, location)
 
-    def __init__(self, location):
-        self.location = location
+    def __reduce__(self):
+        return ArrayType, (self.element_type, self.location)
 
-    def emit_json(self):
-        return dict(location = self.location)
+    def make_json(self):
+        return dict(**location_field(self.location), element = self.element_type.emit_json())
+
+class CustomType(BaseType):
+
+    __slots__ = ()
+    name      = "custom type"
+
+    def __new__(cls, location):
+        return BaseType.make(cls, None, location)
+
+    def make_json(self):
+        return location_field(self.location)
+
+#-------------------------------------------------------------------------------------------
+
+type_names = dict(integer = IntegerType, real = RealType, boolean = BooleanType, void = VoidType)
+
+
+# builds the type object from it's JSON (as emitted by emit_json)
+def type_from_json(json):
+    location = json.get("location", NOT_APPLICABLE)
+
+    if "element" in json:
+        return ArrayType(type_from_json(json["element"]), location)
+    if "name" in json:
+        return type_names[json["name"]](location)
+    return CustomType(location)
+
+
+# the canonical type described by the JSON (without making objects for the locations)
+def canonical_type(json):
+    if "element" in json:
+        return ArrayType(canonical_type(json["element"]))
+    if "name" in json:
+        return type_names[json["name"]]()
+    return CustomType(NOT_APPLICABLE)
 
 #-------------------------------------------------------------------------------------------
 
@@ -117,7 +255,8 @@ def emit_type_object(node_id, type_description, index, location = None):
 
     type_   = type_description.emit_json()
 
-    if location: type_["location"] = location
+    # (emit_json's dict is shared, so it's copied)
+    if location: type_ = {**type_, **location_field(location)}
 
     return dict(
                     nodeId = str(node_id),
@@ -3,5 +3,7 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# modules inside "sample" import each other relative to it
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'sample')))
 
 import sample
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from parser.parse_file import parse_file
+from ast_.compilation  import Compilation
+from ast_.node         import Node, Function, Literal, Loop
+
+
+program = """function main(A : array of integer; M : integer returns array of integer)
+  for a in A
+    returns array of a + M when a < M
+  end for
+end function
+"""
+
+
+class ASTSlotsTest(unittest.TestCase):
+    """AST nodes keep their fields in __slots__."""
+
+    def test_no_dict(self):
+        for engine in ["peg", "rd"]:
+            context = Compilation()
+            parse_file(program, engine = engine, context = context)
+            for node in context.nodes.values():
+                self.assertFalse(hasattr(node, "__dict__"), type(node).__name__)
+
+    def test_fields(self):
+        context  = Compilation()
+        function = parse_file(program, context = context)[0]
+
+        self.assertIsInstance(function, Function)
+        self.assertEqual([field for field, value in function.fields()],
+                         ["node_id", "name", "function_name", "nodes", "location", "params", "ret_types"])
+
+        loop = function.nodes[0]
+        self.assertIsInstance(loop, Loop)
+        self.assertTrue(loop.range_id.startswith("main:node"))
+        self.assertNotIn("while_id", dict(loop.fields()))
+
+    def test_unknown_field(self):
+        with self.assertRaises(AttributeError):
+            Literal(context = Compilation(), value = 1, colour = "red")
+
+    def test_repr(self):
+        literal = Literal(context = Compilation(), value = "1", location = None)
+        self.assertEqual(repr(literal), str({"node_id": "node1", "value": "1", "location": None}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import io
+import json
+import types
+import unittest
+
+from compiler.json_parser import compile_ir, compile_to_cpp
+from compiler.backends    import backends, get_backend, register_backend
+import compiler.nodes
+
+import sisal_server
+
+from .test_ir_store import read_programs
+
+
+# the export_<node class>_to_<suffix> functions of a code generator module
+def exporters(module, suffix):
+    return {name: getattr(module, name) for name in dir(module)
+            if name.startswith("export_") and name.endswith("_to_" + suffix)}
+
+
+# a backend that makes a list of the functions' names out of the IR
+def register_names_backend():
+    function_name = lambda node, scope: node.function_name
+    table  = {compiler.nodes.Function       : function_name,
+              compiler.nodes.FunctionImport : function_name}
+    create = lambda functions, name, scheduling_policy: [f.emit(backends["names"], None) for f in functions]
+    return register_backend("names", types.ModuleType("names"), table, create)
+
+
+class BackendsTest(unittest.TestCase):
+    """Backends dispatch on the node class and are chosen per compile call."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def tearDown(self):
+        backends.pop("names", None)
+
+    def check_table(self, backend, suffix):
+        functions = exporters(backend.module, suffix)
+        self.assertEqual(sorted(functions.values(), key = lambda f: f.__name__),
+                         sorted(backend.table.values(), key = lambda f: f.__name__))
+        for node_class, function in backend.table.items():
+            self.assertIs(getattr(compiler.nodes, node_class.__name__), node_class)
+            self.assertEqual(function.__name__, "export_%s_to_%s" % (node_class.__name__.lower(), suffix))
+
+    def test_cpp_table(self):
+        self.check_table(get_backend("C++"), "cpp")
+
+    def test_llvm_table(self):
+        self.check_table(get_backend("LLVM"), "llvm")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(Exception):
+            get_backend("Fortran")
+        with self.assertRaises(Exception):
+            compile_ir(self.programs["fibs.sis"], backend = "Fortran")
+
+    def test_side_by_side(self):
+        register_names_backend()
+        for name, ir in self.programs.items():
+            expected = [function["functionName"] for function in ir["functions"]]
+            cpp_code = str(compile_to_cpp(ir))
+            self.assertEqual(compile_ir(ir, backend = "names"), expected, name)
+            self.assertEqual(str(compile_ir(ir, backend = "C++")), cpp_code, name)
+
+    def test_not_implemented(self):
+        register_names_backend()
+        backends["names"].create_module = lambda functions, name, scheduling_policy: \
+            [f.nodes[0].emit(backends["names"], None) for f in functions]
+        with self.assertRaisesRegex(Exception, "to names not implemented"):
+            compile_ir(self.programs["fibs.sis"], backend = "names")
+
+    def test_server(self):
+        ir   = json.dumps(self.programs["fibs.sis"])
+        body = json.dumps(dict(code = [ir, ir], operation = "compile", backend = "C++")).encode()
+        environment = {"CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+        statuses    = []
+
+        response = b"".join(sisal_server.service(environment, lambda status, headers: statuses.append(status)))
+
+        self.assertEqual(statuses, ["200 OK"])
+        self.assertEqual(json.loads(response), [str(compile_to_cpp(self.programs["fibs.sis"]))] * 2)
+
+        for policy, status in [("fewest_live", "200 OK"), ("random", "400 ERROR")]:
+            body = json.dumps(dict(code = [ir], operation = "compile", scheduling_policy = policy)).encode()
+            environment = {"CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+            statuses    = []
+
+            response = b"".join(sisal_server.service(environment, lambda status, headers: statuses.append(status)))
+
+            self.assertEqual(statuses, [status])
+            if status == "200 OK":
+                self.assertEqual(json.loads(response), [str(compile_ir(self.programs["fibs.sis"], scheduling_policy = policy))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from compiler.json_parser import compile_to_cpp
+
+
+INTEGER = dict(name = "integer")
+
+
+def port(node_id, index):
+    return dict(index = index, nodeId = node_id, type = INTEGER)
+
+
+def edge(src, src_index, dst, dst_index):
+    return [port(src, src_index), port(dst, dst_index)]
+
+
+# main(M) computes X1 := M + M, X2 := X1 + X1 ... and returns X<depth>,
+# every node's value goes to both inputs of the next one, so emitting a node
+# each time it's used doubles the code with every node
+def fan_out_ir(depth):
+    function = "main:node0"
+    nodes    = []
+    edges    = []
+
+    for n in range(1, depth + 1):
+        node_id = "main:node%d" % n
+        nodes.append(dict(id = node_id, name = "Binary", operator = "+",
+                          inPorts = [port(node_id, 0), port(node_id, 1)],
+                          outPorts = [port(node_id, 0)]))
+        src = "main:node%d" % (n - 1)
+        edges += [edge(src, 0, node_id, 0), edge(src, 0, node_id, 1)]
+
+    edges.append(edge("main:node%d" % depth, 0, function, 0))
+
+    return dict(functions = [dict(id = function, name = "Lambda", functionName = "main",
+                                  nodes = nodes, edges = edges,
+                                  params = [["M", port(function, 0)]],
+                                  inPorts = [port(function, 0)],
+                                  outPorts = [port(function, 0)])],
+                declarations = {})
+
+
+def code_lines(depth):
+    return len(str(compile_to_cpp(fan_out_ir(depth))).splitlines())
+
+
+class CppFanOutTest(unittest.TestCase):
+    """A node feeding several nodes is emitted once."""
+
+    def test_linear_growth(self):
+        sizes = [code_lines(depth) for depth in range(1, 41)]
+        steps = set(b - a for a, b in zip(sizes, sizes[1:]))
+
+        # every node adds the same number of lines
+        self.assertEqual(len(steps), 1)
+        self.assertGreater(steps.pop(), 0)
+
+    def test_shared_value(self):
+        text = str(compile_to_cpp(fan_out_ir(2)))
+        # X1 is computed once and used twice by X2
+        self.assertEqual(text.count("M + M"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from parser import grammar_cache
+
+
+grammar_file = os.path.join(os.path.dirname(__file__), "..", "sample", "parser", "function_grammar.ini")
+
+
+class GrammarCacheTest(unittest.TestCase):
+    """The compiled grammar is stored on disk and loaded from there."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        # the developer's own CPPS_CACHE_DIR is put back after the test
+        environment = mock.patch.dict(os.environ, CPPS_CACHE_DIR = self.cache_dir)
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cached_grammar_parses_the_same(self):
+        text  = "function f(a : integer returns integer)\n  a + 1\nend function\n"
+        built = grammar_cache.load_grammar(grammar_file)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        loaded = grammar_cache.load_grammar(grammar_file)
+        self.assertIsNot(loaded, built)
+        self.assertEqual(str(loaded.parse(text)), str(built.parse(text)))
+
+    def test_broken_cache_is_ignored(self):
+        grammar_text = open(grammar_file).read()
+        with open(grammar_cache.cache_path(grammar_text), "wb") as cache_file:
+            cache_file.write(b"not a pickle")
+
+        grammar = grammar_cache.load_grammar(grammar_file)
+        self.assertTrue(grammar.parse("function f(returns integer) 1 end function"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import unittest
+
+import parser.parse_file
+from parser.parse_file       import parse_file
+from parser.grammar_profiler import GrammarProfile
+from ast_.compilation        import Compilation
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+def emit_ir(text, profile = None):
+    context   = Compilation()
+    functions = parse_file(text, locations = False, profile = profile, context = context)
+    return json.dumps([f.emit_json(context, None) for f in functions])
+
+
+class GrammarProfilerTest(unittest.TestCase):
+    """Profiling the grammar records per-rule stats and doesn't change the IR."""
+
+    def setUp(self):
+        self.text = open(os.path.join(programs_dir, "qsort.sis")).read()
+
+    def test_same_ir(self):
+        self.assertEqual(emit_ir(self.text, GrammarProfile()), emit_ir(self.text))
+
+    def test_stats(self):
+        profile = GrammarProfile()
+        parse_file(self.text, profile = profile)
+
+        self.assertEqual(profile.rules["module"].calls, 1)
+        self.assertEqual(profile.rules["module"].failures, 0)
+        # "if" is tried for every expression that is not a loop
+        self.assertGreater(profile.rules["if"].failures, 0)
+        # whitespace is tried again where alternatives start
+        self.assertGreater(profile.rules["_"].memo_hits, 0)
+
+        cumulative = [r.cumulative for r in profile.sorted_rules()]
+        self.assertEqual(cumulative, sorted(cumulative, reverse = True))
+        self.assertEqual(profile.sorted_rules("calls")[0].name, "_")
+
+    def test_grammar_not_changed(self):
+        profile = GrammarProfile()
+        parse_file(self.text, profile = profile)
+        grammar = parser.parse_file.grammar
+
+        self.assertIsNot(profile.grammar, grammar)
+        self.assertFalse(type(grammar["module"]).__name__.startswith("Profiled"))
+
+        calls = profile.rules["module"].calls
+        parse_file(self.text)
+        self.assertEqual(profile.rules["module"].calls, calls)
+
+    def test_report(self):
+        profile = GrammarProfile()
+        parse_file(self.text, profile = profile)
+        lines = profile.report("failures").splitlines()
+        self.assertIn("sorted by failures", lines[0])
+        self.assertEqual(len(lines), len(profile.rules) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from compiler.json_parser import parse_node, reset_graph
+from compiler.nodes       import Node, Edge
+
+from .test_ir_store import read_programs
+
+
+# the queries the way they were answered before the indexes: by going
+# through the parent's nodes and all the edges coming into a node
+def scanned_parent(node1, node2):
+    return any(n.id == node1 for n in getattr(Node.nodes_[node2], "nodes", []))
+
+
+def scanned_results(node):
+    return [edge for edge in Edge.edges_to.get(node.id, []) if scanned_parent(edge.from_, node.id)]
+
+
+def scanned_parameters(node):
+    return [edge for edge in Edge.edges_to.get(node.id, []) if scanned_parent(node.id, edge.from_)]
+
+
+class GraphIndexTest(unittest.TestCase):
+    """The parent map and the edge indexes answer like scanning the graph does."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def tearDown(self):
+        reset_graph()
+
+    def test_indexes(self):
+        for name, ir in self.programs.items():
+            reset_graph()
+            for function in ir["functions"]:
+                parse_node(function)
+
+            for node in Node.nodes_.values():
+                self.assertEqual([edge for _, edge in node.get_result_nodes()], scanned_results(node), name)
+                self.assertEqual([edge for _, edge in node.get_parameter_nodes()], scanned_parameters(node), name)
+
+            for edge in Edge.edges:
+                to_node = Node.nodes_[edge.to]
+                self.assertEqual(to_node.is_node_parent(edge.from_), scanned_parent(edge.to, edge.from_), name)
+                self.assertEqual(Node.is_parent(edge.from_, edge.to), scanned_parent(edge.from_, edge.to), name)
+
+    def test_functions_indexed_separately(self):
+        ir = self.programs["calls.sis"]
+        reset_graph()
+
+        parse_node(ir["functions"][0])
+        indexed = Edge.indexed
+        self.assertEqual(indexed, len(Edge.edges))
+
+        parse_node(ir["functions"][1])
+        self.assertGreater(Edge.indexed, indexed)
+        self.assertEqual(Edge.indexed, len(Edge.edges))
+
+
+if __name__ == '__main__':
+    unittest.main()
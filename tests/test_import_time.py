@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import os
+import subprocess
+import sys
+import unittest
+
+
+sample_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sample")
+
+
+# runs "code" with -X importtime in a new interpreter,
+# returns {module name: cumulative import time in us}
+def import_times(code):
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd = sample_dir, capture_output = True, text = True, check = True)
+    times = {}
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def imported(times, package):
+    return [name for name in times if name == package or name.startswith(package + ".")]
+
+
+class ImportTimeTest(unittest.TestCase):
+    """Entry points import only what they use."""
+
+    def test_parse(self):
+        times = import_times("import sisal_parse")
+        self.assertIn("sisal_parse", times)
+        for package in ["llvmlite", "pygments", "IPython", "exporters.graphml", "compiler"]:
+            self.assertEqual(imported(times, package), [], package)
+
+    def test_compile_ir(self):
+        times = import_times("import sisal_compile_ir")
+        for package in ["llvmlite", "parsimonious", "compiler.llvm", "compiler.cpp"]:
+            self.assertEqual(imported(times, package), [], package)
+
+    def test_compile_to_cpp(self):
+        code = "import json, sys\n"\
+               "from parser.parse_file import parse_file\n"\
+               "from compiler.json_parser import compile_to_cpp\n"\
+               "from ast_.location import location_to_json\n"\
+               "from ast_.compilation import Compilation\n"\
+               "context = Compilation()\n"\
+               "functions = parse_file(open('sample_sisal_programs/fibs.sis').read(), context = context)\n"\
+               "ir = json.loads(json.dumps(dict(functions = [f.emit_json(context, None) for f in functions]), default = location_to_json))\n"\
+               "str(compile_to_cpp(ir))\n"\
+               "import llvmlite"
+        times = import_times(code)
+        self.assertIn("compiler.cpp", times)
+        # llvmlite is imported by the last line only, after compiling
+        self.assertEqual(list(times)[-1], "llvmlite")
+        self.assertNotIn("compiler.llvm", times)
+
+
+if __name__ == '__main__':
+    unittest.main()
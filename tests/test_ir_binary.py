@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from compiler.json_parser import compile_to_cpp
+from ir.store             import IRStore, NodeView
+from ir                   import binary
+
+from .test_ir_store import read_programs
+
+
+# a NodeView (and the views in it) as plain dicts
+def view_to_json(value):
+    if isinstance(value, NodeView):
+        return {key: view_to_json(value[key]) for key in value}
+    if type(value) == list:
+        return [view_to_json(item) for item in value]
+    return value
+
+
+class IRBinaryTest(unittest.TestCase):
+    """The binary IR reads back as the JSON IR it was made from."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def test_round_trip(self):
+        for name, ir in self.programs.items():
+            store = binary.loads(binary.dumps(IRStore.from_json(ir)))
+            self.assertEqual(json.dumps(store.to_json()), json.dumps(ir), name)
+
+    def test_mapped_file(self):
+        ir = self.programs["qsort.sis"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "qsort.sir")
+            with open(path, "wb") as ir_file:
+                binary.dump(IRStore.from_json(ir), ir_file)
+
+            self.assertTrue(binary.is_binary_ir(path))
+            store = binary.load(path)
+            self.assertEqual(store.to_json(), ir)
+
+            # queries work on the mapped arrays
+            for edge in range(len(store.edge_src)):
+                src, dst = store.edge_json(edge)
+                node = store.find_node(dst["nodeId"])
+                if node is not None:
+                    self.assertIn(edge, store.edges_to(node))
+
+            self.assertEqual(str(compile_to_cpp(store)), str(compile_to_cpp(ir)))
+            del store
+
+    def test_node_views(self):
+        ir    = self.programs["fibs.sis"]
+        store = binary.loads(binary.dumps(IRStore.from_json(ir)))
+        views = store.function_views()
+
+        self.assertEqual([view_to_json(view) for view in views], ir["functions"])
+        self.assertIn("params", views[0])
+        self.assertNotIn("no such key", views[0])
+        self.assertEqual(views[0].get("name"), ir["functions"][0]["name"])
+
+    def test_not_binary(self):
+        with self.assertRaises(Exception):
+            binary.loads(b"{" * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import unittest
+
+from parser.parse_file    import parse_file
+from ast_.compilation     import Compilation
+from exporters.ir_writer  import ir_chunks
+from compiler.json_parser import compile_to_cpp
+from ir.compact           import to_compact, from_compact, is_compact
+
+from .test_ir_store import read_programs, programs_dir
+
+
+class IRCompactTest(unittest.TestCase):
+    """The compact dialect holds the same IR as the ordinary one."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def test_round_trip(self):
+        for name, ir in self.programs.items():
+            compact = json.loads(json.dumps(to_compact(ir)))
+
+            self.assertTrue(is_compact(compact))
+            self.assertEqual(from_compact(compact), ir, name)
+            self.assertLess(len(json.dumps(compact)), len(json.dumps(ir)), name)
+
+    def test_writer(self):
+        for name in ["qsort.sis", "fibs.sis"]:
+            text = open(os.path.join(programs_dir, name)).read()
+            for indent, kwargs in [(2, dict(indent = 2)), (None, dict(separators = (",", ":")))]:
+                context = Compilation()
+                written = "".join(ir_chunks(context, parse_file(text, context = context), indent,
+                                            dialect = "compact"))
+                self.assertEqual(written, json.dumps(to_compact(self.programs[name]), **kwargs), name)
+
+    def test_compile(self):
+        ir = self.programs["qsort.sis"]
+        self.assertEqual(str(compile_to_cpp(to_compact(ir))), str(compile_to_cpp(ir)))
+
+    def test_version(self):
+        compact = to_compact(self.programs["fibs.sis"])
+        compact["version"] = 1000
+        with self.assertRaises(Exception):
+            from_compact(compact)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from sisal_type.sisal_type import canonical_type
+from compiler.json_parser  import parse_node, reset_graph
+from compiler.nodes        import Node, Edge, Port, get_type, sisal_type_to_type, replace_operators, field_plans
+
+from .test_ir_store import read_programs
+
+
+SCALARS   = dict(name = "name", location = "location", id = "id", functionName = "function_name",
+                 callee = "callee", value = "value")
+SUB_NODES = dict(condition = "condition", range = "range", init = "init", preCondition = "pre_condition",
+                 body = "body", reduction = "reduction")
+
+
+# the IR's node dicts: the node and all the nodes inside it
+def node_dicts(node):
+    yield node
+    for key in SUB_NODES:
+        if key in node:
+            yield from node_dicts(node[key])
+    for key in ["branches", "nodes"]:
+        for child in node.get(key, []):
+            yield from node_dicts(child)
+
+
+# the edges in the order the loader makes them: a node's own edges
+# before the edges of the nodes inside it
+def edge_dicts(node):
+    yield from node.get("edges", [])
+    for key in ["condition", "branches", "nodes", "range", "init", "preCondition", "body", "reduction"]:
+        children = node.get(key, [])
+        for child in children if type(children) == list else [children]:
+            yield from edge_dicts(child)
+
+
+class IRLoaderTest(unittest.TestCase):
+    """The loader's field plans put every field of an IR node into it's backend node."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def tearDown(self):
+        reset_graph()
+
+    def load(self, ir):
+        reset_graph()
+        return [parse_node(function) for function in ir["functions"]]
+
+    def test_fields(self):
+        for name, ir in self.programs.items():
+            self.load(ir)
+
+            for function in ir["functions"]:
+                for node in node_dicts(function):
+                    loaded = Node.nodes_[node["id"]]
+
+                    for key, attribute in SCALARS.items():
+                        if key in node:
+                            self.assertEqual(getattr(loaded, attribute), node[key], name)
+                    for key, attribute in SUB_NODES.items():
+                        if key in node:
+                            self.assertIs(getattr(loaded, attribute), Node.nodes_[node[key]["id"]], name)
+                    if "operator" in node:
+                        self.assertEqual(loaded.operator, replace_operators(node["operator"]), name)
+
+                    for key, attribute in [("inPorts", "in_ports"), ("outPorts", "out_ports")]:
+                        ports = [(port.node_id, port.type, port.index) for port in getattr(loaded, attribute, [])]
+                        self.assertEqual(ports, [(port["nodeId"], sisal_type_to_type(canonical_type(port["type"])),
+                                                  port["index"]) for port in node.get(key, [])], name)
+
+                    for key in ["params", "results"]:
+                        if key in node:
+                            self.assertEqual(list(getattr(loaded, key)), [param for param, _ in node[key]], name)
+
+    def test_edge_order(self):
+        for name, ir in self.programs.items():
+            self.load(ir)
+            made     = [(edge.from_, edge.from_index, edge.to, edge.to_index) for edge in Edge.edges]
+            expected = [(src["nodeId"], src["index"], dst["nodeId"], dst["index"])
+                        for function in ir["functions"] for src, dst in edge_dicts(function)]
+            self.assertEqual(made, expected, name)
+
+    def test_interned(self):
+        self.load(self.programs["qsort.sis"])
+        ports = [port for node in Node.nodes_.values()
+                      for port in getattr(node, "in_ports", []) + getattr(node, "out_ports", [])]
+
+        self.assertEqual(len(set(map(id, ports))), len(Port.ports))
+        self.assertLess(len(Port.ports), len(ports))
+        self.assertTrue(field_plans)
+
+    def test_types(self):
+        types = [dict(name = "integer"),
+                 dict(name = "integer", location = "1:2-1:3"),
+                 dict(name = "array", element = dict(name = "real", location = "1:2-1:3")),
+                 dict(name = "array", element = dict(name = "array", element = dict(name = "boolean")))]
+
+        for type_ in types:
+            self.assertIs(get_type(type_), sisal_type_to_type(canonical_type(type_)))
+        self.assertIs(get_type(types[0]), get_type(types[1]))
+        self.assertIsNot(get_type(types[2]), get_type(types[3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
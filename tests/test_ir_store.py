@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import unittest
+
+from parser.parse_file    import parse_file
+from ast_.compilation     import Compilation
+from ast_.location        import location_to_json
+from exporters.json       import export_module_to_store
+from compiler.json_parser import compile_to_cpp
+from ir.store             import IRStore
+from ir                   import binary
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+# the JSON IR as sisal_parse.py writes it (and as json.load reads it back)
+def emit_ir(text):
+    context   = Compilation()
+    functions = parse_file(text, context = context)
+    return json.loads(json.dumps(dict(functions = [f.emit_json(context, None) for f in functions],
+                                      declarations = {}),
+                                 default = location_to_json))
+
+
+def read_programs():
+    programs = {}
+    for name in sorted(os.listdir(programs_dir)):
+        if name.endswith(".sis"):
+            try:
+                programs[name] = emit_ir(open(os.path.join(programs_dir, name)).read())
+            except Exception:
+                pass
+    return programs
+
+
+class IRStoreTest(unittest.TestCase):
+    """The array-backed IR store converts to and from the JSON IR without changes."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def test_round_trip(self):
+        for name, ir in self.programs.items():
+            store = IRStore.from_json(ir)
+            self.assertEqual(json.dumps(store.to_json()), json.dumps(ir), name)
+            self.assertEqual(list(store.functions()), ir["functions"], name)
+
+    def test_value_kinds(self):
+        # strings that look like JSON, lists and dicts, numbers and booleans stay what they were
+        values = ["{}", {}, "[1, 2]", [1, 2], "1", 1, 1.0, True, None, "null", {"a": [1]}, '{"a": [1]}']
+        ir     = dict(functions = [dict({"name": "X", "id": "a"}, **{"v%d" % n: value for n, value in enumerate(values)})],
+                      declarations = "{}")
+        module = IRStore.from_json(ir).to_json()
+
+        self.assertEqual(json.dumps(module), json.dumps(ir))
+        for n, value in enumerate(values):
+            self.assertIs(type(module["functions"][0]["v%d" % n]), type(value))
+        self.assertEqual(binary.loads(binary.dumps(IRStore.from_json(ir))).to_json(), module)
+
+    def test_adjacency(self):
+        for name, ir in self.programs.items():
+            store = IRStore.from_json(ir)
+
+            # every edge is found from both of it's ends
+            for edge in range(len(store.edge_src)):
+                src, dst = store.edge_json(edge)
+                if store.find_node(src["nodeId"]) is not None:
+                    self.assertIn(edge, store.edges_from(store.find_node(src["nodeId"])), name)
+                if store.find_node(dst["nodeId"]) is not None:
+                    self.assertIn(edge, store.edges_to(store.find_node(dst["nodeId"])), name)
+
+            self.assertEqual(sum(len(store.edges_to(node)) for node in range(store.num_nodes())),
+                             len([edge for edge in store.edge_dst_node if edge != -1]))
+
+    def test_types_interned(self):
+        store = IRStore.from_json(self.programs["qsort.sis"])
+        self.assertLess(len(store.types), len(store.port_type))
+
+    def test_export_to_store(self):
+        text    = open(os.path.join(programs_dir, "qsort.sis")).read()
+        context = Compilation()
+        store   = export_module_to_store(context, parse_file(text, context = context))
+
+        self.assertEqual(json.loads(json.dumps(store.to_json(), default = location_to_json)),
+                         self.programs["qsort.sis"])
+
+    def test_compile_from_store(self):
+        ir = self.programs["qsort.sis"]
+        self.assertEqual(str(compile_to_cpp(IRStore.from_json(ir))), str(compile_to_cpp(ir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import io
+import json
+import os
+import socket
+import threading
+import unittest
+
+from parser.parse_file   import parse_file
+from ast_.compilation    import Compilation
+from ast_.location       import location_to_json
+from exporters.ir_writer import write_ir, ir_chunks
+
+import sisal_server
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+def parsed(text):
+    context = Compilation()
+    return context, parse_file(text, context = context)
+
+
+def dumps(text, **kwargs):
+    context, functions = parsed(text)
+    return json.dumps(dict(functions = [f.emit_json(context, None) for f in functions],
+                           declarations = {}),
+                      default = location_to_json, **kwargs)
+
+
+class IRWriterTest(unittest.TestCase):
+    """The streaming IR writer writes what json.dumps gives for the whole module."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = {}
+        for name in ["qsort.sis", "fibs.sis", "calls.sis", "rets.sis"]:
+            cls.programs[name] = open(os.path.join(programs_dir, name)).read()
+
+    def test_same_as_dumps(self):
+        for name, text in self.programs.items():
+            for indent in [2, 1]:
+                out = io.StringIO()
+                write_ir(*parsed(text), out, indent)
+                self.assertEqual(out.getvalue(), dumps(text, indent = indent), name)
+
+            out = io.StringIO()
+            write_ir(*parsed(text), out, indent = None)
+            self.assertEqual(out.getvalue(), dumps(text, separators = (",", ":")), name)
+
+    def test_no_functions(self):
+        context = Compilation()
+        self.assertEqual("".join(ir_chunks(context, [])), json.dumps(dict(functions = [], declarations = {}), indent = 2))
+        self.assertEqual("".join(ir_chunks(context, [], None)), '{"functions":[],"declarations":{}}')
+
+    def test_chunks(self):
+        text   = self.programs["qsort.sis"]
+        chunks = list(ir_chunks(*parsed(text), chunk_size = 1000))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), dumps(text, indent = 2))
+
+    def test_socket(self):
+        text = self.programs["fibs.sis"]
+        sender, receiver = socket.socketpair()
+        received = []
+
+        def receive():
+            while True:
+                data = receiver.recv(4096)
+                if not data:
+                    break
+                received.append(data)
+
+        thread = threading.Thread(target = receive)
+        thread.start()
+        write_ir(*parsed(text), sender)
+        sender.close()
+        thread.join()
+        receiver.close()
+
+        self.assertEqual(b"".join(received).decode(), dumps(text, indent = 2))
+
+    def test_server(self):
+        codes = [self.programs["fibs.sis"], self.programs["rets.sis"]]
+        body  = json.dumps(dict(code = codes, operation = "parse")).encode()
+        environment = {"CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+        statuses    = []
+
+        response = b"".join(sisal_server.service(environment, lambda status, headers: statuses.append(status)))
+
+        self.assertEqual(statuses, ["200 OK"])
+        self.assertEqual(json.loads(response), [dumps(code, indent = 1) for code in codes])
+        self.assertEqual(response.decode(), json.dumps([dumps(code, indent = 1) for code in codes]))
+
+    def request(self, **data):
+        body = json.dumps(data).encode()
+        environment = {"CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+        statuses    = []
+
+        response = b"".join(sisal_server.service(environment, lambda status, headers: statuses.append(status)))
+        return statuses, response
+
+    def test_server_export_error(self):
+        # "Q" is only found missing while the IR is exported
+        code = "function main(M : integer returns integer) Q + 1 end function"
+        for codes in [[code], [self.programs["fibs.sis"], code]]:
+            statuses, response = self.request(code = codes, operation = "parse")
+            self.assertEqual(statuses, ["400 ERROR"])
+            self.assertEqual(json.loads(response), ["error compiling"])
+
+    def test_server_prefetch(self):
+        codes    = [self.programs["fibs.sis"], self.programs["rets.sis"]]
+        expected = json.dumps([dumps(code, indent = 1) for code in codes])
+        for size in [0, 1, 1 << 24]:
+            modules = sisal_server.prefetch([sisal_server.parse_sisal(code) for code in codes], size)
+            self.assertEqual(b"".join(sisal_server.stream_parsed(modules)).decode(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import io
+import json
+import unittest
+
+from compiler.json_parser import compile_to_cpp, stream_to_cpp
+from ir.compact           import to_compact
+from ir.json_stream       import StreamedIR, expanded_functions
+
+from .test_ir_store import read_programs
+
+
+# a file that gives out text in small pieces and fails after the first size characters
+class FailingFile:
+
+    def __init__(self, text, size):
+        self.text     = text
+        self.size     = size
+        self.position = 0
+
+    def read(self, size):
+        if self.position >= self.size:
+            raise IOError("the file broke at %d" % self.position)
+        piece          = self.text[self.position : min(self.position + min(size, 3), self.size)]
+        self.position += len(piece)
+        return piece
+
+
+# the position right after the first function in the JSON IR text
+def first_function_end(text):
+    start = text.index("[", text.index('"functions"')) + 1
+    return json.JSONDecoder().raw_decode(text, start)[1]
+
+
+# version 1 of the compact dialect: the tables of all the functions after them
+def to_compact_v1(ir):
+    module    = to_compact(ir)
+    types     = []
+    locations = {}
+    functions = []
+    for function in module["functions"]:
+        types.extend(function["types"])
+        locations.update(function["locations"])
+        functions.append({key: value for key, value in function.items() if key != "types" and key != "locations"})
+    return dict(dialect = "compact", version = 1, functions = functions,
+                declarations = module["declarations"], types = types, locations = locations)
+
+
+class JSONStreamTest(unittest.TestCase):
+    """The streaming loader reads the same IR json.loads does, a function at a time."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.programs = read_programs()
+
+    def test_functions(self):
+        for name, ir in self.programs.items():
+            for kwargs in [dict(indent = 2), dict(separators = (",", ":"))]:
+                for chunk_size in [5, 1 << 16]:
+                    streamed = StreamedIR(io.StringIO(json.dumps(ir, **kwargs)), chunk_size)
+                    self.assertEqual(list(streamed.functions()), ir["functions"], name)
+                    self.assertEqual(streamed.fields, dict(declarations = ir["declarations"]), name)
+
+    def test_fields(self):
+        text = '{"version": 12345, "functions": [], "n": 6789, "s": "a\\"b"}'
+        for chunk_size in range(1, 8):
+            streamed = StreamedIR(io.StringIO(text), chunk_size)
+            self.assertEqual(list(streamed.functions()), [])
+            self.assertEqual(streamed.fields, dict(version = 12345, n = 6789, s = 'a"b'))
+
+        self.assertEqual(list(StreamedIR(io.StringIO(" { } ")).functions()), [])
+
+    def test_malformed(self):
+        for text in ['', '[]', '{"functions": [{"a": 1}', '{"functions": [{"a": 1}] "n": 2}']:
+            with self.assertRaises(Exception):
+                list(StreamedIR(io.StringIO(text), 4).functions())
+
+    def test_compact(self):
+        for name in ["qsort.sis", "fibs.sis"]:
+            ir       = self.programs[name]
+            streamed = StreamedIR(io.StringIO(json.dumps(to_compact(ir))), 16)
+            self.assertEqual(list(expanded_functions(streamed)), ir["functions"], name)
+
+            streamed = StreamedIR(io.StringIO(json.dumps(to_compact_v1(ir))), 16)
+            self.assertEqual(list(expanded_functions(streamed)), ir["functions"], name)
+
+    def test_compile(self):
+        for name in ["qsort.sis", "fibs.sis", "calls.sis", "rets.sis"]:
+            ir       = self.programs[name]
+            expected = str(compile_to_cpp(ir, "module"))
+            self.assertEqual(stream_to_cpp(io.StringIO(json.dumps(ir)), "module", 100), expected, name)
+            self.assertEqual(stream_to_cpp(io.StringIO(json.dumps(to_compact(ir))), "module"), expected, name)
+
+            out = io.StringIO()
+            self.assertIsNone(stream_to_cpp(io.StringIO(json.dumps(ir)), "module", 100, out = out))
+            self.assertEqual(out.getvalue(), expected, name)
+
+    # the first function's code is written before the rest of the file is read
+    def test_early_output(self):
+        ir       = self.programs["calls.sis"]
+        expected = str(compile_to_cpp(ir, "module"))
+        first    = ir["functions"][0]["functionName"]
+
+        for text in [json.dumps(ir), json.dumps(to_compact(ir))]:
+            out = io.StringIO()
+            with self.assertRaises(IOError):
+                stream_to_cpp(FailingFile(text, first_function_end(text) + 1), "module", 7, out = out)
+            self.assertIn(first, out.getvalue())
+            self.assertTrue(expected.startswith(out.getvalue()))
+            self.assertLess(len(out.getvalue()), len(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
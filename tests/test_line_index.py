@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from parser.line_index import LineIndex
+
+
+def sliced_location(text, start, end):
+    # how locations used to be computed: by rescanning the text every time
+    start_row    = text[:start].count("\n") + 1
+    start_column = start - text[:start].rfind("\n") - 1
+    end_row      = text[:end].count("\n") + 1
+    end_column   = end - text[:end].rfind("\n") - 1
+    return "{}:{}-{}:{}".format(start_row, start_column, end_row, end_column)
+
+
+class LineIndexTest(unittest.TestCase):
+    """LineIndex gives the same locations as rescanning the text."""
+
+    text = "function f(a : integer\n returns integer)\n\n  a + 1\nend function\n"
+
+    def test_matches_slicing(self):
+        index = LineIndex(self.text)
+        for start in range(len(self.text) + 1):
+            for end in range(start, len(self.text) + 1):
+                self.assertEqual(index.location(start, end),
+                                 sliced_location(self.text, start, end))
+
+    def test_offsets(self):
+        index = LineIndex("a\nbc", line_offset = 10, column_offset = 4)
+        self.assertEqual(index.row_column(0), (11, 4))
+        self.assertEqual(index.row_column(3), (12, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
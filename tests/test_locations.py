@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import unittest
+
+from parser.parse_file import parse_file
+from ast_.location     import Location, location_to_json
+from ast_.compilation  import Compilation
+
+
+program = """function main(a, b : integer returns integer)
+  if a > b then
+    a - b
+  else
+    b
+  end if
+end function
+"""
+
+
+def emit_ir(locations):
+    context   = Compilation()
+    functions = parse_file(program, locations, context = context)
+    return json.loads(json.dumps(dict(functions = [f.emit_json(context, None) for f in functions]),
+                                 default = location_to_json))
+
+
+def find_locations(ir):
+    if type(ir) == dict:
+        return [v for k, v in ir.items() if k == "location"] + \
+               [l for v in ir.values() for l in find_locations(v)]
+    if type(ir) == list:
+        return [l for v in ir for l in find_locations(v)]
+    return []
+
+
+class LocationsTest(unittest.TestCase):
+    """Source locations are kept as offsets and written out as text."""
+
+    def test_offsets_in_ast(self):
+        function = parse_file(program)[0]
+        self.assertIsInstance(function.location, Location)
+        self.assertEqual(str(function.location), "1:0-8:0")
+        self.assertEqual(str(function.nodes[0].location), "2:2-6:8")
+
+    def test_written_as_text(self):
+        ir = emit_ir(True)
+        self.assertEqual(ir["functions"][0]["location"], "1:0-8:0")
+        self.assertTrue(all(type(l) == str for l in find_locations(ir)))
+
+    def test_opt_out(self):
+        self.assertEqual(find_locations(emit_ir(False)), [])
+        self.assertIsNone(parse_file(program, locations = False)[0].location)
+
+
+if __name__ == '__main__':
+    unittest.main()
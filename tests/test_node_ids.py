@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import unittest
+
+from parser.parse_file   import parse_file
+from ast_.compilation    import Compilation
+from ast_.location       import RELATIVE, location_to_json
+from exporters.ir_writer import ir_chunks
+from exporters.json      import export_module_to_store
+
+
+module = """function f(a : integer returns integer)
+  %s
+end function
+
+function g(a, b : integer returns integer)
+  if a > b then a - b else b end if
+end function
+"""
+
+
+# returns {function name: it's IR as text}
+def emit_functions(text, engine = "peg", locations = False):
+    context   = Compilation()
+    functions = parse_file(text, locations = locations, engine = engine, context = context)
+    return {f.function_name: json.dumps(f.emit_json(context, None), default = location_to_json) for f in functions}
+
+
+# the IR with the "location" fields removed
+def without_locations(ir):
+    if isinstance(ir, dict):
+        return {key: without_locations(value) for key, value in ir.items() if key != "location"}
+    if isinstance(ir, list):
+        return [without_locations(value) for value in ir]
+    return ir
+
+
+class NodeIdsTest(unittest.TestCase):
+    """Node ids are counted per function and prefixed with the function's name."""
+
+    def test_prefixed(self):
+        context = Compilation()
+        parse_file(module % "a + 1", context = context)
+
+        self.assertTrue(context.nodes)
+        for node_id, node in context.nodes.items():
+            self.assertRegex(node_id, r"^[fg]:node[0-9]+$")
+            self.assertEqual(node.node_id, node_id)
+
+        # the function itself is created after the nodes inside it
+        self.assertEqual(context.functions["f"].node_id, "f:node3")
+
+    def test_unchanged_function(self):
+        for engine in ["peg", "rd"]:
+            for locations in [False, RELATIVE]:
+                small = emit_functions(module % "a + 1", engine, locations)
+                large = emit_functions(module % "(a + 1) * (a - 2) + size(a)", engine, locations)
+                # f takes one more line, g starts one line later
+                longer = emit_functions(module % "(a + 1)\n  * 2", engine, locations)
+
+                self.assertNotEqual(small["f"], large["f"])
+                self.assertEqual(small["g"], large["g"], (engine, locations))
+                self.assertEqual(small["g"], longer["g"], (engine, locations))
+
+    def test_absolute_locations(self):
+        # the locations are the only difference
+        small  = emit_functions(module % "a + 1", locations = True)
+        longer = emit_functions(module % "(a + 1)\n  * 2", locations = True)
+
+        self.assertNotEqual(small["g"], longer["g"])
+        self.assertEqual(without_locations(json.loads(small["g"])), without_locations(json.loads(longer["g"])))
+
+    def test_relative_locations(self):
+        text    = module % "(a + 1)\n  * 2"
+        context = Compilation()
+        ir      = json.loads("".join(ir_chunks(context, parse_file(text, RELATIVE, context = context))))
+        g       = ir["functions"][1]
+
+        self.assertEqual(ir["lines"], {"f": 1, "g": 6})
+        self.assertTrue(g["location"].startswith("1:0-"))
+
+        # the absolute row is the function's line + the relative row - 1
+        absolute = emit_functions(text, locations = True)
+        branch   = json.loads(absolute["g"])["nodes"][0]["branches"][0]["location"]
+        row      = int(g["nodes"][0]["branches"][0]["location"].split(":")[0])
+        self.assertEqual(branch.split(":")[0], str(ir["lines"]["g"] + row - 1))
+
+        # the binary IR's store keeps the lines too
+        context = Compilation()
+        store   = export_module_to_store(context, parse_file(text, RELATIVE, context = context))
+        self.assertEqual(store.to_json(), ir)
+
+    def test_same_as_alone(self):
+        g_alone = module[module.index("function g"):]
+        self.assertEqual(emit_functions(g_alone)["g"], emit_functions(module % "a")["g"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import unittest
+
+from parser.parse_file import parse_file
+from ast_.compilation  import Compilation
+from ast_.location     import location_to_json
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+def emit_ir(text, jobs = 1):
+    context   = Compilation()
+    functions = parse_file(text, jobs = jobs, context = context)
+    return json.dumps([f.emit_json(context, None) for f in functions], default = location_to_json)
+
+
+class ParallelParseTest(unittest.TestCase):
+    """Parsing in a process pool gives the same node ids and locations."""
+
+    def test_same_ir(self):
+        for name in ["qsort.sis", "calls.sis", "rets.sis", "array_concat.sis"]:
+            text = open(os.path.join(programs_dir, name)).read()
+            self.assertEqual(emit_ir(text, jobs = 2), emit_ir(text), name)
+
+    def test_nodes_registered(self):
+        text = open(os.path.join(programs_dir, "calls.sis")).read()
+        sequential = Compilation()
+        parse_file(text, context = sequential)
+        parallel = Compilation()
+        parse_file(text, jobs = 2, context = parallel)
+        self.assertEqual((sorted(parallel.nodes), parallel.node_counter),
+                         (sorted(sequential.nodes), sequential.node_counter))
+        self.assertEqual(sorted(parallel.functions), sorted(sequential.functions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import threading
+import unittest
+
+from parsimonious.exceptions import ParseError
+
+from parser.parse_file  import parse_file
+from parser.parse_cache import ParseCache
+from ast_.location      import location_to_json
+from ast_.compilation   import Compilation
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+def emit_ir(text, cache = None):
+    return json.dumps(emit_functions(text, cache), default = location_to_json)
+
+
+# {function name: it's IR}
+def emit_functions(text, cache = None):
+    context   = Compilation()
+    functions = parse_file(text, cache = cache, context = context)
+    return {f.function_name: f.emit_json(context, None) for f in functions}
+
+
+def read_program(name):
+    return open(os.path.join(programs_dir, name)).read()
+
+
+class ParseCacheTest(unittest.TestCase):
+    """Per-function parsing gives the same IR and reuses unchanged functions."""
+
+    def test_same_ir(self):
+        for name in ["qsort.sis", "calls.sis", "fibs.sis", "rets.sis"]:
+            text = read_program(name)
+            self.assertEqual(emit_ir(text, ParseCache()), emit_ir(text), name)
+
+    def test_only_edited_function_is_parsed(self):
+        text  = read_program("calls.sis")
+        cache = ParseCache()
+        emit_ir(text, cache)
+        self.assertEqual(cache.hits, 0)
+
+        # the body of max is changed, the lines stay where they were
+        cache.reset_stats()
+        body   = text.index("  N\n", text.index("function max"))
+        edited = text[:body] + "  M\n" + text[body + 4:]
+        emit_ir(edited, cache)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, text.count("end function") - 1)
+
+        before = emit_functions(text)
+        after  = emit_functions(edited, cache)
+        self.assertNotEqual(json.dumps(before["max"], default = location_to_json),
+                            json.dumps(after["max"], default = location_to_json))
+        for name in ["min", "Main"]:
+            self.assertEqual(json.dumps(before[name], default = location_to_json),
+                             json.dumps(after[name], default = location_to_json), name)
+
+    def test_threads(self):
+        texts = [read_program(name) for name in ["qsort.sis", "calls.sis", "fibs.sis", "rets.sis"]]
+        cache = ParseCache(max_entries = 4)
+        grammar_parses = sum(len(parse_file(text, cache = cache)) for text in texts)
+        cache.reset_stats()
+        errors = []
+
+        def parse_all():
+            try:
+                for n in range(5):
+                    for text in texts:
+                        parse_file(text, cache = cache)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target = parse_all) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.hits + cache.misses, 8 * 5 * grammar_parses)
+        self.assertLessEqual(len(cache.trees), 4)
+
+    def test_syntax_error_location(self):
+        text = read_program("calls.sis") + "\nfunction broken(returns integer)\n  1 +\nend function\n"
+        with self.assertRaises(ParseError) as whole:
+            parse_file(text)
+        with self.assertRaises(ParseError) as cached:
+            parse_file(text, cache = ParseCache())
+        self.assertEqual(str(whole.exception), str(cached.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from parser.parse_file import parse_file
+from ast_.node         import Identifier, Literal
+
+
+# parses "expression" as the body of a function and returns it's tree
+# written out with brackets
+def grouping(expression, engine = "peg"):
+    text = "function main(M, N : integer returns integer)\n  %s\nend function\n" % expression
+    body = parse_file(text, engine = engine)[0].nodes[0]
+    return written(body.tree)
+
+
+def written(tree):
+    if type(tree) == list:
+        left, operator, right = tree
+        return "(%s %s %s)" % (written(left), operator.operator, written(right))
+    if type(tree) == Identifier:
+        return tree.name
+    if type(tree) == Literal:
+        return tree.value
+    return written(tree.tree)
+
+
+class PrecedenceTest(unittest.TestCase):
+    """Algebraic expressions are grouped by operator precedence."""
+
+    def test_left_to_right(self):
+        self.assertEqual(grouping("M - N - 1"), "((M - N) - 1)")
+        self.assertEqual(grouping("M / N * 2"), "((M / N) * 2)")
+
+    def test_precedence(self):
+        self.assertEqual(grouping("M + N * 2 - 1"), "((M + (N * 2)) - 1)")
+        self.assertEqual(grouping("M < N + 1"), "(M < (N + 1))")
+        self.assertEqual(grouping("M | N < 1 || M + N * 2 ^ 3"),
+                         "(M | (N < (1 || (M + (N * (2 ^ 3))))))")
+
+    def test_power(self):
+        self.assertEqual(grouping("M ^ N ^ 2"), "(M ^ (N ^ 2))")
+        self.assertEqual(grouping("M * N ^ 2 * 3"), "((M * (N ^ 2)) * 3)")
+
+    def test_brackets(self):
+        self.assertEqual(grouping("(M - N) * (1 - 2)"), "((M - N) * (1 - 2))")
+
+    def test_rd_engine(self):
+        self.assertEqual(grouping("M - N * 2 - 1", "rd"), grouping("M - N * 2 - 1"))
+
+    def test_long_chain(self):
+        chain = " * ".join(["M"] * 5000)
+        text  = "function main(M : integer returns integer)\n  %s\nend function\n" % chain
+        tree  = parse_file(text, engine = "rd")[0].nodes[0].tree
+        depth = 0
+        while type(tree) == list:
+            self.assertEqual(tree[1].operator, "*")
+            tree   = tree[0]
+            depth += 1
+        self.assertEqual(depth, 4999)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import unittest
+
+from parser.parse_file import parse_file
+from ast_.compilation  import Compilation
+from ast_.location     import location_to_json
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+# returns the IR and the registered node ids, or None if the program is rejected
+def emit_ir(text, engine):
+    try:
+        context   = Compilation()
+        functions = parse_file(text, engine = engine, context = context)
+        ir = json.dumps([f.emit_json(context, None) for f in functions], default = location_to_json)
+    except Exception:
+        return None
+    return ir, sorted(context.nodes), context.node_counter
+
+
+class RDParserTest(unittest.TestCase):
+    """The recursive descent engine builds the same IR as the PEG grammar."""
+
+    def test_sample_programs(self):
+        for name in sorted(os.listdir(programs_dir)):
+            if not name.endswith(".sis"):
+                continue
+            text = open(os.path.join(programs_dir, name)).read()
+            peg  = emit_ir(text, "peg")
+            if peg is None:
+                continue
+            self.assertEqual(emit_ir(text, "rd"), peg, name)
+
+    def test_expressions(self):
+        template = ("function oldf(M : integer returns integer)\n  M\nend function\n"
+                    "function g(A : array of array of integer; M : integer returns integer)\n  %s\nend function\n")
+
+        for expression in ["oldf(1)", "old M + 1", "size (A) + 1", "A[1] = A[2]", "A[M + 1][M]", "(M + 1) * M"]:
+            peg = emit_ir(template % expression, "peg")
+            self.assertIsNotNone(peg, expression)
+            self.assertEqual(emit_ir(template % expression, "rd"), peg, expression)
+
+    def test_no_locations(self):
+        text = open(os.path.join(programs_dir, "qsort.sis")).read()
+        peg_context = Compilation()
+        rd_context  = Compilation()
+        peg = json.dumps([f.emit_json(peg_context, None) for f in parse_file(text, locations = False, context = peg_context)])
+        rd  = json.dumps([f.emit_json(rd_context, None) for f in parse_file(text, locations = False, engine = "rd", context = rd_context)])
+        self.assertEqual(rd, peg)
+
+    def test_syntax_error(self):
+        text = "function f(a : integer returns integer)\n  a +\nend function"
+        with self.assertRaises(Exception) as error:
+            parse_file(text, engine = "rd")
+        self.assertIn("line: 3", str(error.exception))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(Exception):
+            parse_file("", engine = "lalr")
+
+
+if __name__ == '__main__':
+    unittest.main()
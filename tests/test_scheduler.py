@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import io
+import json
+import re
+import sys
+import unittest
+
+from compiler.json_parser import compile_to_cpp, compile_ir, stream_to_cpp, parse_node, reset_graph
+from compiler.nodes       import Node
+from compiler.scheduler   import schedule, depth_first, by_level, fewest_live, POLICIES
+import compiler.cpp
+
+from .test_cpp_fanout import port, edge
+from .test_ir_store   import read_programs
+
+
+# main(M) made of binary nodes, nodes is a list of (operator, left, right),
+# an operand is "M" or the number of a node (from 1), the last node is the result
+def function_ir(nodes):
+    function = "main:node0"
+    node_id  = lambda n: function if n == "M" else "main:node%d" % n
+    ir_nodes = []
+    edges    = []
+
+    for n, (operator, left, right) in enumerate(nodes, 1):
+        ir_nodes.append(dict(id = node_id(n), name = "Binary", operator = operator,
+                             inPorts = [port(node_id(n), 0), port(node_id(n), 1)],
+                             outPorts = [port(node_id(n), 0)]))
+        edges += [edge(node_id(left), 0, node_id(n), 0), edge(node_id(right), 0, node_id(n), 1)]
+
+    edges.append(edge(node_id(len(nodes)), 0, function, 0))
+
+    return dict(functions = [dict(id = function, name = "Lambda", functionName = "main",
+                                  nodes = ir_nodes, edges = edges,
+                                  params = [["M", port(function, 0)]],
+                                  inPorts = [port(function, 0)],
+                                  outPorts = [port(function, 0)])],
+                declarations = {})
+
+
+# X1 := M + M, X2 := X1 + M ...
+def chain_ir(depth):
+    return function_ir([("+", "M", "M")] + [("+", n, "M") for n in range(1, depth)])
+
+
+# (M - M) + ((M + M) * (M * M))
+TREE = [("+", "M", "M"), ("*", "M", "M"), ("*", 1, 2), ("-", "M", "M"), ("+", 4, 3)]
+
+
+# checks that every temporary is defined before it's used
+def defined_before_use(text):
+    defined = set()
+    for line in text.splitlines():
+        match = re.match(r"\s*[\w<> ]+ (id\d+)(?: = (.*))?;", line)
+        used  = re.findall(r"\bid\d+\b", (match.group(2) or "") if match else line)
+        if not defined.issuperset(used):
+            return False
+        if match:
+            defined.add(match.group(1))
+    return True
+
+
+def scheduled(nodes, policy):
+    reset_graph()
+    parse_node(function_ir(nodes)["functions"][0])
+    order = schedule(Node.nodes_["main:node%d" % len(nodes)], lambda node: False, policy)
+    return [int(node.id.split("node")[1]) for node in order]
+
+
+class SchedulerTest(unittest.TestCase):
+    """Nodes are emitted iteratively in the order the scheduling policy gives."""
+
+    def tearDown(self):
+        reset_graph()
+
+    def test_policies(self):
+        # the order the values used to be pulled in
+        self.assertEqual(scheduled(TREE, depth_first), [4, 1, 2, 3, 5])
+        # the subtree needing two temporaries first
+        self.assertEqual(scheduled(TREE, fewest_live), [1, 2, 3, 4, 5])
+        # the independent nodes together
+        self.assertEqual(scheduled(TREE, by_level), [4, 1, 2, 3, 5])
+        self.assertEqual(scheduled([("+", "M", "M"), ("+", 1, "M"), ("*", "M", "M"), ("+", 2, 3)], by_level),
+                         [1, 3, 2, 4])
+
+    def test_wrong_order(self):
+        with self.assertRaises(Exception):
+            scheduled(TREE, lambda node, inputs: [node])
+        with self.assertRaises(Exception):
+            scheduled(TREE, lambda node, inputs: list(reversed(depth_first(node, inputs))))
+
+    def test_deep_chain(self):
+        depth = sys.getrecursionlimit() * 5
+        sizes = {}
+
+        for name, policy in POLICIES.items():
+            text = str(compile_to_cpp(chain_ir(depth), scheduling_policy = policy))
+            sizes[name] = len(text.splitlines())
+            self.assertEqual(text.count(" + M;"), depth, name)
+
+        self.assertEqual(len(set(sizes.values())), 1)
+
+    def test_programs(self):
+        programs = read_programs()
+
+        for name in ["qsort.sis", "fibs.sis", "calls.sis", "rets.sis", "smoke.sis"]:
+            default = str(compile_to_cpp(programs[name]))
+            self.assertEqual(str(compile_to_cpp(programs[name], scheduling_policy = depth_first)), default, name)
+
+            self.assertTrue(defined_before_use(default), name)
+
+            for policy in [by_level, fewest_live]:
+                text = str(compile_to_cpp(programs[name], scheduling_policy = policy))
+                self.assertEqual(len(text.splitlines()), len(default.splitlines()), name)
+                self.assertTrue(defined_before_use(text), name)
+
+
+    def test_policy_per_call(self):
+        ir      = function_ir(TREE)
+        default = str(compile_to_cpp(ir))
+        fewest  = str(compile_to_cpp(ir, scheduling_policy = fewest_live))
+        self.assertNotEqual(fewest, default)
+
+        # policies can be given by name
+        self.assertEqual(str(compile_ir(ir, scheduling_policy = "fewest_live")), fewest)
+        self.assertEqual(stream_to_cpp(io.StringIO(json.dumps(ir)), scheduling_policy = "fewest_live"), fewest)
+        with self.assertRaises(Exception):
+            compile_ir(ir, scheduling_policy = "random")
+
+        # the policy is kept in the scopes, not in the code generator
+        self.assertFalse(hasattr(compiler.cpp, "scheduling_policy"))
+        self.assertEqual(str(compile_to_cpp(ir)), default)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import unittest
+
+from parser.parse_file  import parse_file
+from ast_.compilation   import Compilation
+from exporters.symbols  import SymbolTable, prepend_params, append_params
+
+
+def param(name, index):
+    return [name, dict(type = dict(name = "integer"), index = index)]
+
+
+shadowing = """function main(M, N : integer returns integer)
+  let
+    M := N + 1
+  in
+    M
+  end let
+end function
+"""
+
+
+class ScopeSymbolsTest(unittest.TestCase):
+    """Variables are found in scopes by the scope's symbol table."""
+
+    def test_find(self):
+        table = SymbolTable([param("a", 0), param("b", 1), param("a", 2)])
+        self.assertEqual(table.find("a")[0], 0)
+        self.assertEqual(table.find("b")[0], 1)
+        self.assertIsNone(table.find("c"))
+
+    def test_inserted_params(self):
+        context = Compilation()
+        scope   = dict(id = "scope", params = [param("a", 0), param("b", 1)])
+        context.json_nodes["scope"] = scope
+
+        table = SymbolTable(scope["params"])
+        context.symbols["scope"] = table
+
+        prepend_params(context, scope, [param("c", 0), param("b", 1)])
+        append_params(context, scope, [param("d", 4), param("a", 5)])
+
+        self.assertTrue(table.describes(scope["params"]))
+        self.assertEqual([p[1]["index"] for p in scope["params"][:4]], [0, 1, 2, 3])
+
+        # the table gives the same answers as a new one
+        fresh = SymbolTable(scope["params"])
+        for name in "abcde":
+            self.assertEqual(table.find(name), fresh.find(name), name)
+        self.assertEqual(table.find("b")[0], 1)
+        self.assertEqual(table.find("a")[0], 2)
+
+    def test_shadowing(self):
+        # the let's M hides the function's M
+        context = Compilation()
+        let     = parse_file(shadowing, locations = False, context = context)[0].emit_json(context, None)["nodes"][0]
+        body    = let["body"]
+
+        self.assertEqual([p[0] for p in body["params"]], ["M", "M", "N"])
+        self.assertEqual(body["edges"][0][0]["index"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import json
+import os
+import sys
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from parser.parse_file import parse_file
+from ast_.compilation  import Compilation
+from ast_.location     import location_to_json
+
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "sample", "sample_sisal_programs")
+
+
+def emit_ir(text, locations = True, engine = "peg"):
+    context   = Compilation()
+    functions = parse_file(text, locations, engine = engine, context = context)
+    return json.dumps([f.emit_json(context, None) for f in functions], default = location_to_json)
+
+
+def compiles(text):
+    try:
+        emit_ir(text)
+    except Exception:
+        return False
+    return True
+
+
+class ThreadSafetyTest(unittest.TestCase):
+    """Modules compiled in parallel threads give the same IR as compiled one by one."""
+
+    def setUp(self):
+        texts = [open(os.path.join(programs_dir, name)).read()
+                    for name in sorted(os.listdir(programs_dir)) if name.endswith(".sis")]
+        self.texts = [text for text in texts if compiles(text)]
+
+    def test_same_ir(self):
+        jobs = [(text, locations, engine) for text in self.texts
+                                          for locations in [True, False]
+                                          for engine in ["peg", "rd"]] * 4
+
+        serial = [emit_ir(*job) for job in jobs]
+
+        # switch threads as often as possible, so they interleave inside compilations
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers = 8) as executor:
+                parallel = list(executor.map(lambda job: emit_ir(*job), jobs))
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(parallel, serial)
+
+    def test_separate_contexts(self):
+        first  = Compilation()
+        second = Compilation()
+        parse_file(self.texts[0], context = first)
+        parse_file(self.texts[0], context = second)
+
+        self.assertEqual(sorted(first.nodes), sorted(second.nodes))
+        self.assertEqual(sorted(first.functions), sorted(second.functions))
+        self.assertTrue(all(first.nodes[n] is not second.nodes[n] for n in first.nodes))
+
+
+if __name__ == '__main__':
+    unittest.main()
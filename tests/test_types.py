@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+from .context import sample
+
+import contextlib
+import io
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from parser.parse_file     import parse_file
+from ast_.compilation      import Compilation
+from ast_.location         import set_emit_locations
+from sisal_type.sisal_type import *
+from compiler.nodes        import get_type
+
+import sisal_parse
+
+
+class TypesTest(unittest.TestCase):
+    """Sisal types are interned, each distinct type is one canonical object."""
+
+    def tearDown(self):
+        set_emit_locations(True)
+
+    def test_canonical(self):
+        self.assertIs(IntegerType(), IntegerType())
+        self.assertIs(ArrayType(ArrayType(RealType())), ArrayType(ArrayType(RealType())))
+        self.assertIsNot(ArrayType(RealType()), ArrayType(IntegerType()))
+
+        ids = [t.type_id for t in [IntegerType(), RealType(), ArrayType(IntegerType())]]
+        self.assertEqual(len(set(ids)), 3)
+        for type_id, t in zip(ids, [IntegerType(), RealType(), ArrayType(IntegerType())]):
+            self.assertIs(BaseType.by_id[type_id], t)
+
+    def test_located(self):
+        located = ArrayType(IntegerType("1:9-1:16"), "1:0-1:16")
+
+        self.assertIs(located.canonical, ArrayType(IntegerType()))
+        self.assertEqual(located, ArrayType(IntegerType()))
+        self.assertEqual(located.type_id, ArrayType(IntegerType()).type_id)
+        self.assertEqual(located.emit_json(),
+                         {"location": "1:0-1:16", "element": {"location": "1:9-1:16", "name": "integer"}})
+        self.assertEqual(str(located), "array of integer")
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            IntegerType().location = "1:1-1:2"
+
+    def test_cached_json(self):
+        integer = IntegerType("2:3-2:10")
+        self.assertIs(integer.emit_json(), integer.emit_json())
+
+        set_emit_locations(False)
+        self.assertEqual(integer.emit_json(), {"name": "integer"})
+
+    def test_json_and_pickle(self):
+        array = ArrayType(RealType("1:9-1:13"), "1:0-1:13")
+
+        self.assertIs(canonical_type(array.emit_json()), ArrayType(RealType()))
+        self.assertEqual(type_from_json(array.emit_json()).emit_json(), array.emit_json())
+        self.assertIs(pickle.loads(pickle.dumps(array)).canonical, ArrayType(RealType()))
+
+    def test_compiler_types(self):
+        self.assertIs(get_type({"location": "1:1-1:8", "name": "integer"}), get_type({"name": "integer"}))
+        self.assertIs(get_type({"element": {"name": "real"}}).descr, get_type({"name": "real"}))
+
+    def test_type_mismatches(self):
+        def mismatches(text, check_types = True):
+            context   = Compilation(check_types = check_types)
+            functions = parse_file(text, context = context)
+            for f in functions:
+                f.emit_json(context, None)
+            return context.type_mismatches
+
+        self.assertEqual(mismatches("function main(M : integer returns integer)\n  M + 1\nend function\n"), [])
+
+        found = mismatches("function main(M : integer returns array of integer)\n  M\nend function\n")
+        self.assertEqual(len(found), 1)
+        self.assertIn("integer vs. array of integer", found[0])
+
+        # the check is off by default
+        self.assertEqual(mismatches("function main(M : integer returns array of integer)\n  M\nend function\n", False), [])
+
+    def test_check_types_option(self):
+        with tempfile.NamedTemporaryFile("w", suffix = ".sis", delete = False) as source:
+            source.write("function main(M : integer returns array of integer)\n  M\nend function\n")
+        try:
+            for args, warnings in [([], 0), (["--check-types"], 1)]:
+                stdout, stderr = io.StringIO(), io.StringIO()
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    sisal_parse.main(["sisal_parse.py", source.name] + args)
+
+                self.assertEqual(json.loads(stdout.getvalue())["functions"][0]["functionName"], "main")
+                lines = stderr.getvalue().splitlines()
+                self.assertEqual(len(lines), warnings)
+                for line in lines:
+                    self.assertTrue(line.startswith("warning: Type mismatch"))
+        finally:
+            os.remove(source.name)
+
+
+if __name__ == '__main__':
+    unittest.main()